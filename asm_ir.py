@@ -0,0 +1,359 @@
+# asm_ir.py
+# Assembler geçişlerinin (pass1/pass2) ortak kullandığı satır ara gösterimi (IR)
+#
+# Kaynak bir kez ayrıştırılır: yorumlar, etiketler, komut adı, boyut soneki, operandlar
+# ve direktif argümanları SourceLine kayıtlarına yazılır. Komut boyutları ve adresler de
+# burada hesaplanır; böylece pass1'in etiket adresleri pass2'nin ürettiği kodla tutarlıdır.
+
+import re
+from functools import lru_cache
+
+from expressions import NUMBER_PATTERN, compile_expression, parse_number
+
+# Satır türleri
+LABEL = 0        # Yalnızca etiket (veya boş komut)
+INSTRUCTION = 1
+DIRECTIVE = 2
+EQU = 3          # .equ / .set sabit tanımı
+
+# Bölüm başlangıç adresleri
+SECTION_STARTS = {
+    'text': 0,
+    'data': 0x0200,
+    'bss': 0x0400
+}
+
+# Ek kelime (extension word) gerektiren adresleme modları
+SRC_EXTENSION_MODES = ('immediate', 'indexed', 'absolute', 'symbolic')
+DST_EXTENSION_MODES = ('indexed', 'absolute', 'symbolic')
+
+_INDEXED_RE = re.compile(r'^-?\d+\(R\d+\)$')
+_AUTOINC_RE = re.compile(r'^@R\d+\+$')
+_INDIRECT_RE = re.compile(r'^@R\d+$')
+_REGISTER_RE = re.compile(r'^R\d+$')
+_SYMBOL_RE = re.compile(r'^[A-Za-z_]\w*$')
+_USECT_RE = re.compile(r'\"([^\"]+)\"\s*,\s*(\d+)')
+_SECT_RE = re.compile(r'\"([^\"]+)\"')
+_WORD_SPLIT_RE = re.compile(r'\s*,\s*')
+
+# Immediate (#...) değer biçimleri: (desen, değer dönüştürücü)
+IMMEDIATE_FORMATS = (
+    (re.compile(r"^'(.)'$"), lambda m: ord(m.group(1))),
+    (re.compile(r'^(-?\d+)$'), lambda m: int(m.group(1)) & 0xFFFF),
+    # Taban önekli/sonekli sayılar .equ ifadeleriyle aynı dilbilgisini kullanır
+    (re.compile(rf'^({NUMBER_PATTERN})$'), lambda m: parse_number(m.group(1))),
+)
+
+class SourceLine:
+    """Tek bir kaynak satırının ayrıştırılmış hali"""
+    __slots__ = ('number', 'kind', 'label', 'mnemonic', 'suffix', 'byte', 'operands', 'modes',
+                 'args', 'section', 'address', 'size')
+
+    def __init__(self, number, kind, label=None, mnemonic='', suffix='', operands=(), modes=(), args=''):
+        self.number = number      # 1'den başlayan satır numarası
+        self.kind = kind
+        self.label = label
+        self.mnemonic = mnemonic  # Büyük harfli komut adı (sonek hariç) veya küçük harfli direktif
+        self.suffix = suffix      # 'B', 'W' veya ''
+        self.byte = 1 if suffix == 'B' else 0
+        self.operands = operands  # Virgülle ayrılmış operand metinleri
+        self.modes = modes        # Operandların sözdizimsel adresleme modları
+        self.args = args          # Direktif/.equ argüman metni
+        self.section = 'text'
+        self.address = 0
+        self.size = 0             # Bayt cinsinden
+
+    def moved(self, number, section, address):
+        """Satırın başka bir satır numarası, bölüm ve adrese taşınmış kopyası"""
+        line = SourceLine.__new__(SourceLine)
+        line.number = number
+        line.kind = self.kind
+        line.label = self.label
+        line.mnemonic = self.mnemonic
+        line.suffix = self.suffix
+        line.byte = self.byte
+        line.operands = self.operands
+        line.modes = self.modes
+        line.args = self.args
+        line.section = section
+        line.address = address
+        line.size = self.size
+        return line
+
+    def __repr__(self):
+        return (f"SourceLine({self.number}, {self.kind}, label={self.label!r}, mnemonic={self.mnemonic!r}, "
+                f"operands={self.operands!r}, args={self.args!r}, address=0x{self.address:04X}, size={self.size})")
+
+@lru_cache(maxsize=4096)
+def operand_mode(operand):
+    """Operandın adresleme modunu yalnızca sözdiziminden belirler"""
+    if operand.startswith('#'):
+        return 'immediate'
+    if operand.startswith('&'):
+        return 'absolute'
+    if _INDEXED_RE.match(operand):
+        return 'indexed'
+    if _AUTOINC_RE.match(operand):
+        return 'indirect_autoinc'
+    if _INDIRECT_RE.match(operand):
+        return 'indirect'
+    if _REGISTER_RE.match(operand):
+        return 'register'
+    if _SYMBOL_RE.match(operand):
+        return 'symbolic'
+    raise ValueError(f"Gecersiz operand: {operand}")
+
+@lru_cache(maxsize=4096)
+def immediate_value(operand):
+    """#sayı operandının değeri; sayısal olmayan (ör. #SEMBOL) operandlar için None"""
+    value_str = operand[1:].strip()
+    for pattern, convert in IMMEDIATE_FORMATS:
+        match = pattern.match(value_str)
+        if match:
+            return convert(match)
+    return None
+
+def instruction_size(line, opcode_table):
+    """Komutun pass2'de üreteceği kod boyutunu (bayt) döndürür"""
+    mnemonic = line.mnemonic
+    operands = line.operands
+    if mnemonic in opcode_table["double_operand"]:
+        if len(operands) != 2:
+            raise ValueError(f"Line {line.number}: {mnemonic} iki operand bekliyor")
+        src, dst = line.modes
+        return 2 + (2 if src in SRC_EXTENSION_MODES else 0) + (2 if dst in DST_EXTENSION_MODES else 0)
+    if mnemonic in opcode_table["single_operand"]:
+        if mnemonic == "RETI":
+            return 2
+        if len(operands) != 1:
+            raise ValueError(f"Line {line.number}: {mnemonic} tek operand bekliyor")
+        return 2 + (2 if line.modes[0] in SRC_EXTENSION_MODES else 0)
+    if mnemonic in opcode_table["jump"]:
+        return 2
+    # Tanınmayan komutlar kod üretmez
+    return 0
+
+class Fragment:
+    """Önceden ayrıştırılmış, bölüm değiştirmeyen satır dizisi (ör. .include dosyası)
+
+    tokenize() akışta str yerine bir Fragment gördüğünde satırlarını yeniden ayrıştırmadan
+    bulunduğu konuma taşır. Satır numaraları ve adresler parçanın başına görelidir.
+    """
+    __slots__ = ('program', 'size', 'line_count')
+
+    def __init__(self, lines, opcode_table):
+        self.program = tuple(tokenize(lines, opcode_table))
+        self.size = sum(line.size for line in self.program)  # Bayt cinsinden
+        self.line_count = len(lines)
+
+def _emulate(line, emulated):
+    """Emüle komutu (TST, POP, RET, ...) karşılık gelen gerçek komuta çevirir; B/W soneki korunur"""
+    mnemonic, templates = emulated
+    expected = 1 if any('{0}' in template for template in templates) else 0
+    if len(line.operands) != expected:
+        raise ValueError(f"Line {line.number}: {line.mnemonic} {'tek operand bekliyor' if expected else 'operand almaz'}")
+    operands = line.operands
+    if line.mnemonic == "BR" and _SYMBOL_RE.match(operands[0]) and not _REGISTER_RE.match(operands[0]):
+        # BR etiket: CALL gibi BR #etiket olarak kodlanır
+        operands = ('#' + operands[0],)
+    line.mnemonic = mnemonic
+    line.operands = tuple(template.format(*operands) for template in templates)
+
+def _instruction(number, label, text):
+    """Etiketten sonra kalan komut metnini bir SourceLine'a çevirir"""
+    parts = text.split(None, 1)
+    if not parts:
+        return SourceLine(number, LABEL, label)
+    mnemonic = parts[0].upper()
+
+    suffix = ''
+    if mnemonic[-2:] in ('.B', '.W'):
+        suffix = mnemonic[-1]
+        mnemonic = mnemonic[:-2]
+    operand_text = parts[1] if len(parts) > 1 else ""
+    operands = tuple(op.strip() for op in operand_text.split(',')) if operand_text else ()
+    return SourceLine(number, INSTRUCTION, label, mnemonic, suffix, operands)
+
+# Bölümü veya konum sayacını değiştiren direktifler
+LAYOUT_DIRECTIVES = frozenset(('.org', '.usect', '.sect', '.text', '.data', '.bss', '.end'))
+
+def parse_line(number, text, opcode_table):
+    """Tek bir kaynak satırını konumdan bağımsız SourceLine'a çevirir; boş satırda None döner
+
+    Komut ve .word boyutları da burada hesaplanır; bölüm ve adresi Layout atar.
+    """
+    code = text.split(';', 1)[0].strip()  # Yorumları çıkar
+    if not code:
+        return None
+
+    label = None
+    directive = code[0] == '.'
+    parts = code.split(None, 2) if not directive and '.' in code else ()
+    if len(parts) >= 3 and parts[1].lower() in ('.equ', '.set'):
+        # .equ/.set: Sabit değer tanımı
+        return SourceLine(number, EQU, parts[0].rstrip(':'), parts[1].lower(), args=parts[2].strip())
+
+    if not directive and ':' in code:
+        # Etiket tanımı
+        label_part, code = code.split(':', 1)
+        label = label_part.strip()
+        code = code.strip()
+
+    if code.startswith('.'):
+        parts = code.split(None, 1)
+        args = parts[1].strip() if len(parts) > 1 else ''
+        line = SourceLine(number, DIRECTIVE, label, parts[0].lower(), args=args)
+        if line.mnemonic == '.word':
+            # .word: Her değer bir kelime
+            line.operands = tuple(_WORD_SPLIT_RE.split(args)) if args else ()
+            line.size = 2 * len(line.operands)
+        return line
+
+    line = _instruction(number, label, code)
+    if line.kind == INSTRUCTION:
+        emulated = opcode_table["emulated"].get(line.mnemonic)
+        if emulated:
+            _emulate(line, emulated)
+        if line.mnemonic in opcode_table["double_operand"] or line.mnemonic in opcode_table["single_operand"]:
+            line.modes = tuple(map(operand_mode, line.operands))
+            if line.modes and line.modes[0] == 'immediate' and \
+                    immediate_value(line.operands[0]) in opcode_table["constant_generator"]:
+                # Sabit üreteci (R2/R3) ek kelime gerektirmez
+                line.modes = ('constant',) + line.modes[1:]
+        line.size = instruction_size(line, opcode_table)
+    return line
+
+class Layout:
+    """Satırlara bölüm ve adres atayan konum sayacı durumu"""
+    __slots__ = ('section_addresses', 'section', 'location')
+
+    def __init__(self):
+        self.section_addresses = dict(SECTION_STARTS)
+        self.section = 'text'
+        self.location = self.section_addresses[self.section]
+
+    def place(self, line):
+        """Satırı geçerli konuma yerleştirir ve sayacı ilerletir; .end için False döndürür"""
+        line.section = self.section
+        line.address = self.location
+        if line.kind == DIRECTIVE and line.mnemonic in LAYOUT_DIRECTIVES:
+            return self._directive(line)
+        if line.size:
+            self.location += line.size
+            self.section_addresses[self.section] = self.location
+        return True
+
+    def place_fragment(self, fragment, number):
+        """Önceden ayrıştırılmış parçanın satırlarını geçerli konuma taşınmış kopyalar olarak döndürür"""
+        section, location = self.section, self.location
+        lines = tuple(line.moved(number + line.number, section, location + line.address)
+                      for line in fragment.program)
+        self.location += fragment.size
+        self.section_addresses[section] = self.location
+        return lines
+
+    def _directive(self, line):
+        name, args, number = line.mnemonic, line.args, line.number
+        if name == '.org':
+            # .org: Başlangıç adresini belirler
+            try:
+                self.location = int(args, 16) if args.lower().startswith('0x') else int(args, 0)
+            except ValueError:
+                raise ValueError(f"Line {number}: Gecersiz .org adresi: '{args}'")
+        elif name == '.usect':
+            # .usect: Özel bölüm için yer ayırır
+            match = _USECT_RE.match(args)
+            if match:
+                sect_name = match.group(1)
+                self.section_addresses[sect_name] = self.section_addresses.get(sect_name, 0) + int(match.group(2))
+        elif name == '.sect':
+            # .sect: Yeni bir bölümü başlatır
+            match = _SECT_RE.match(args)
+            if match:
+                self.section = match.group(1)
+                self.location = self.section_addresses.setdefault(self.section, 0)
+        elif name == '.end':
+            return False  # Kod sonu
+        else:
+            self.section = name[1:]
+            self.location = self.section_addresses.get(self.section, SECTION_STARTS[self.section])
+        return True
+
+def location_expression(line):
+    """.equ/.set ifadesindeki $ yerine satırın adresini koyar"""
+    return line.args.replace('$', f'(0x{line.address:X})')
+
+def relayout(program, symbol_table, constants):
+    """Satırlara adresleri yeniden atar; kayan etiketleri ve onlara bağlı sabitleri günceller
+
+    $ içeren sabitler kendi satırlarının adresine bağlıdır: satır kaydıysa ifade yeni
+    adresle yeniden tanımlanır.
+    """
+    layout = Layout()
+    changed = []
+    moved = []
+    for line in program:
+        address = line.address
+        if not layout.place(line):
+            break
+        if line.kind == EQU:
+            # .set ile yeniden tanımlanan sabitte yalnızca geçerli tanım güncellenir
+            if line.address != address and '$' in line.args and constants.lines.get(line.label) == line.number:
+                constants.define(line.label, compile_expression(location_expression(line)), line.number)
+                moved.append(line.label)
+        elif line.label:
+            entry = symbol_table.get(line.label)
+            if isinstance(entry, dict) and not entry.get('is_constant') and entry.get('value') != line.address:
+                entry['value'] = line.address
+                changed.append(line.label)
+    changed += constants.update(symbol_table, changed, moved)
+    return changed
+
+def tokenize_items(items, opcode_table):
+    """Akış öğelerini (satır metni veya Fragment) sırayla ayrıştırır
+
+    Her öğe için (öğe, SourceLine demeti, öğeden sonraki satır numarası) üretir; .end
+    direktifinden sonraki öğeler ayrıştırılmaz. Artımlı derleme satırları öğe bazında tutar.
+    """
+    layout = Layout()
+    number = 0
+    for item in items:
+        if type(item) is Fragment:
+            lines = layout.place_fragment(item, number)
+            number += item.line_count
+            yield item, lines, number
+            continue
+        number += 1
+        line = parse_line(number, item, opcode_table)
+        if line is None:
+            yield item, (), number
+        elif layout.place(line):
+            yield item, (line,), number
+        else:
+            yield item, (line,), number
+            return
+
+def tokenize(lines, opcode_table):
+    """Kaynak satırlarını SourceLine listesine çevirir; bölüm, adres ve boyutları atar
+
+    .end direktifinden sonraki satırlar ayrıştırılmaz. Akıştaki Fragment öğeleri
+    yeniden ayrıştırılmadan bulundukları konuma kopyalanır.
+    """
+    program = []
+    layout = Layout()
+    number = 0
+
+    for text in lines:
+        if type(text) is Fragment:
+            program.extend(layout.place_fragment(text, number))
+            number += text.line_count
+            continue
+        number += 1
+        line = parse_line(number, text, opcode_table)
+        if line is None:
+            continue
+        program.append(line)
+        if not layout.place(line):
+            break  # Kod sonu
+
+    return program
@@ -0,0 +1,379 @@
+#!/usr/bin/env python3
+# benchmarks.py
+# Assembler, linker, loader ve simülatör bileşenleri için basit performans ölçümleri
+#
+# Kullanım: python benchmarks.py [isim ...]   (isim verilmezse hepsi çalışır)
+
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from array import array
+
+from asm_ir import INSTRUCTION, tokenize
+from linker import SectionWords, apply_relocations, link, read_elf
+from elf32 import ET_EXEC, CodeImage, write_elf
+from encoder import encoder_for, np
+from expressions import compile_expression
+from loader import MSP430ELFLoader, MSP430VirtualMemory
+from simulator import MSP430CPU
+from test4 import Assembler, _include_cache, include_cache_stats, _parse_literal_operand, opcode_table, encode_lines, parse_operand, pass1, pass2
+
+def bench_relocations(counts=(1_000, 10_000, 100_000, 1_000_000)):
+    """Relocation yamalama süresinin relocation sayısıyla doğrusal büyüdüğünü gösterir"""
+    print("\n=== Linker relocation yamalama ===")
+    print("Relocation | Süre (ms) | ns/relocation")
+    print("-----------+-----------+--------------")
+
+    # 16-bit adres uzayının tamamını dolduran bir text bölümü
+    word_count = 0x8000
+    symbols = {'target': {'value': 0x4400, 'defined': True}}
+
+    for count in counts:
+        linked_text = CodeImage()
+        linked_text.write(0, array('H', bytes(word_count * 2)))
+        relocations = [
+            {'offset': (i % word_count) * 2, 'symbol': '#target', 'type': 'ABSOLUTE_16', 'section': 'text'}
+            for i in range(count)
+        ]
+        start = time.perf_counter()
+        apply_relocations(linked_text, CodeImage(), relocations, symbols)
+        elapsed = time.perf_counter() - start
+        print(f"{count:>10} | {elapsed * 1000:>9.2f} | {elapsed * 1e9 / count:>12.1f}")
+
+def bench_read_elf(rows=500_000):
+    """Büyük bir nesne dosyasının ayrıştırma süresini ve tepe bellek kullanımını ölçer"""
+    print("\n=== read_elf akış ayrıştırıcı ===")
+    fd, path = tempfile.mkstemp(suffix='.elf')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            f.write(".text Section (Machine Code):\nAddress | Code\n---------------\n")
+            for i in range(rows):
+                f.write(f"{(i * 2) & 0xFFFF:04X}    | {i & 0xFFFF:04X}\n")
+        size = os.path.getsize(path)
+
+        start = time.perf_counter()
+        obj = read_elf(path)
+        elapsed = time.perf_counter() - start
+
+        # tracemalloc süreyi bozduğu için bellek ayrı bir çalıştırmada ölçülür
+        del obj
+        tracemalloc.start()
+        obj = read_elf(path)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"Dosya: {size / 1e6:.1f} MB, {len(obj['text'])} kelime")
+        print(f"Süre: {elapsed * 1000:.1f} ms, tepe bellek: {peak / 1e6:.2f} MB")
+    finally:
+        os.remove(path)
+
+def bench_memory(accesses=1_000_000):
+    """Sanal bellek okuma/yazma erişimlerinin saniyedeki sayısını ölçer"""
+    print("\n=== Sanal bellek erişimi ===")
+    memory = MSP430VirtualMemory()
+    addresses = [0x4400 + ((i * 2) % 0xBB00) for i in range(accesses)]
+
+    start = time.perf_counter()
+    for addr in addresses:
+        memory.read_memory(addr, 2)
+    elapsed = time.perf_counter() - start
+    print(f"read_memory : {accesses / elapsed / 1e6:.2f} M erişim/s")
+
+    start = time.perf_counter()
+    for addr in addresses:
+        memory.write_memory(addr, b'\x34\x12')
+    elapsed = time.perf_counter() - start
+    print(f"write_memory: {accesses / elapsed / 1e6:.2f} M erişim/s")
+
+    start = time.perf_counter()
+    for addr in addresses:
+        memory.read_word(addr)
+    elapsed = time.perf_counter() - start
+    print(f"read_word   : {accesses / elapsed / 1e6:.2f} M erişim/s")
+
+def bench_loader(words=0xBB00 // 2):
+    """Tam bir FLASH görüntüsünün (~47 KiB) belleğe yüklenme süresini ölçer"""
+    print("\n=== Loader toplu bölüm yükleme ===")
+    text = SectionWords()
+    for i in range(words):
+        text.append(i * 2, i)
+    fd, path = tempfile.mkstemp(suffix='.elf')
+    os.close(fd)
+    try:
+        write_elf(path, text, SectionWords(), {}, elf_type=ET_EXEC)
+        loader = MSP430ELFLoader(MSP430VirtualMemory())
+        start = time.perf_counter()
+        loader.load_linked_elf(path)
+        elapsed = time.perf_counter() - start
+        print(f"{words} kelime: {elapsed * 1000:.2f} ms")
+    finally:
+        os.remove(path)
+
+def _link_bundled(directory):
+    """Paketteki main.asm/utils.asm kaynaklarını derleyip bağlar; bağlanmış ELF yolunu döndürür"""
+    root = os.path.dirname(os.path.abspath(__file__))
+    objects = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for name in ('main', 'utils'):
+            with open(os.path.join(root, name + '.asm'), encoding='utf-8') as f:
+                source = f.read()
+            objects.append(os.path.join(directory, name + '.elf'))
+            Assembler(output=objects[-1]).assemble(source)
+        linked = os.path.join(directory, 'linked_output.elf')
+        link(objects, linked)
+    return linked
+
+def bench_simulator(max_cycles=2_000_000):
+    """Bağlanmış main/utils programında yorumlayıcıyı blok çevirisi ve döngü atlamayla karşılaştırır"""
+    print("\n=== Komut kümesi simülatörü (main.asm + utils.asm) ===")
+    modes = (
+        ("Yorumlayıcı          ", False, False),
+        ("Blok çevirisi        ", True, False),
+        ("Blok + döngü atlama  ", True, True),
+    )
+    with tempfile.TemporaryDirectory() as directory:
+        linked = _link_bundled(directory)
+        results = []
+        for label, translate, fast_forward in modes:
+            memory = MSP430VirtualMemory()
+            loader = MSP430ELFLoader(memory)
+            with contextlib.redirect_stdout(io.StringIO()):
+                loader.load_linked_elf(linked, text_base=0, data_base=0)
+            cpu = MSP430CPU(memory, translate=translate, fast_forward=fast_forward)
+            cpu.reset(pc=loader.entry)
+            cpu.regs[1] = 0x2400
+            stats = cpu.run(max_cycles)
+            results.append(stats)
+            print(f"{label}: {stats['instructions']} komut, {stats['cycles']} çevrim, "
+                  f"{stats['seconds'] * 1000:.1f} ms, {stats['ips'] / 1e6:.3f} M komut/s")
+    interpreted, translated, skipped = results
+    print(f"Blok önbelleği: {skipped['block_hits']} isabet, {skipped['block_misses']} ıskalama")
+    print(f"Atlanan bekleme çevrimi: {skipped['skipped_cycles']}")
+    # Aynı çevrim bütçesinde geçen sürelerin oranı (atlanan çevrimler komut sayılmaz)
+    print(f"Hızlanma: blok {interpreted['seconds'] / translated['seconds']:.1f}x, "
+          f"blok + atlama {interpreted['seconds'] / skipped['seconds']:.1f}x")
+
+# Tüm adresleme modlarını içeren, etiketli tekrar eden kaynak bloğu
+ASM_BLOCK = (
+    "    MOV #0x10, R4", "    ADD @R5+, R7", "    MOV 2(R4), 4(R5)", "    MOV &0x0200, R4",
+    "    SUB #1, R5", "    JNE L{i}", "L{i}:", "    MOV.B @R4, R5",
+)
+
+def bench_assembler(blocks=5_000):
+    """Büyük bir kaynağın ayrıştırma (IR) ve iki geçiş sürelerini ölçer"""
+    print("\n=== Assembler geçişleri ===")
+    lines = [line.format(i=i) for i in range(blocks) for line in ASM_BLOCK]
+    # Geçişlerin tanılama çıktısı ölçüme dahil edilmez
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        program = tokenize(lines, opcode_table)
+        parsed = time.perf_counter()
+        symbol_table = pass1(program)
+        first = time.perf_counter()
+        pass2(program, symbol_table, opcode_table)
+        second = time.perf_counter()
+        machine_code = pass2(program, symbol_table, opcode_table)[0]
+    # Makine kodunun bellek maliyeti: parçaların paylaştığı array('H') tamponları
+    buffers = {id(buffer): buffer for buffer in (getattr(run.words, 'obj', run.words) for run in machine_code.runs)}
+    code_bytes = sum(map(sys.getsizeof, buffers.values()))
+    print(f"{len(lines)} satır: ayrıştırma {(parsed - start) * 1000:.1f} ms, "
+          f"pass1 {(first - parsed) * 1000:.1f} ms, pass2 {(second - first) * 1000:.1f} ms")
+    print(f"{len(machine_code)} kelime makine kodu: {code_bytes / 1024:.0f} KiB "
+          f"({code_bytes / len(machine_code):.1f} bayt/kelime, {len(machine_code.runs)} tampon)")
+
+def bench_encoder(count=1_000_000, blocks=5_000):
+    """Tablo tabanlı kodlayıcının toplu ilk kelime ve tam kodlama hızını ölçer"""
+    print("\n=== Komut kodlayıcı ===")
+    encoder = encoder_for(opcode_table)
+    keys = list(encoder.base_words)
+    fields = [(keys[i % len(keys)], i & 0xF, (i >> 4) & 0xF) for i in range(count)]
+    start = time.perf_counter()
+    encoder.words(fields)
+    batch = time.perf_counter() - start
+
+    lines = [line.format(i=i) for i in range(blocks) for line in ASM_BLOCK]
+    with contextlib.redirect_stdout(io.StringIO()):
+        program = tokenize(lines, opcode_table)
+        symbol_table = pass1(program)
+        instructions = sum(1 for line in program if line.kind == INSTRUCTION)
+        full = float('inf')
+        for _ in range(3):
+            start = time.perf_counter()
+            encode_lines(program, symbol_table, opcode_table)
+            full = min(full, time.perf_counter() - start)
+    path = "NumPy" if np is not None else "saf Python"
+    print(f"Toplu ilk kelime ({path}): {count / batch / 1e6:.2f} M komut/s")
+    print(f"encode_lines: {instructions} komut, {instructions / full / 1e6:.2f} M komut/s")
+
+# Her adresleme modundan bir operand örneği
+OPERAND_SAMPLES = {
+    'register': 'R12',
+    'indexed': '-4(R5)',
+    'symbolic': 'COUNTER',
+    'absolute': '&0x0200',
+    'indirect': '@R6',
+    'indirect_autoinc': '@R7+',
+    'immediate': '#0x1234',
+    'immediate (sembol)': '#LIMIT',
+}
+
+def bench_operands(calls=200_000):
+    """parse_operand'ın her adresleme modu için önbelleksiz ve önbellekli hızını ölçer"""
+    print("\n=== Operand çözümleme ===")
+    print("Mod                 | Önbelleksiz (ns) | Önbellekli (ns)")
+    print("--------------------+------------------+----------------")
+    symbol_table = {'LIMIT': {'value': 0x100, 'defined': True}}
+    for mode, operand in OPERAND_SAMPLES.items():
+        start = time.perf_counter()
+        for _ in range(calls // 10):
+            _parse_literal_operand.cache_clear()
+            parse_operand(operand, symbol_table)
+        cold = (time.perf_counter() - start) / (calls // 10)
+
+        symbol_cache = {}
+        start = time.perf_counter()
+        for _ in range(calls):
+            parse_operand(operand, symbol_table, 0, symbol_cache)
+        warm = (time.perf_counter() - start) / calls
+        print(f"{mode:<19} | {cold * 1e9:>16.0f} | {warm * 1e9:>14.0f}")
+
+def bench_expressions(constants=3_000):
+    """Aygıt başlığı benzeri .equ sabitlerinin derlenme ve değerlendirilme süresini ölçer"""
+    print("\n=== .equ ifade motoru ===")
+    lines = ["PERIPH_BASE .equ 0x0100"]
+    for i in range(constants):
+        lines.append(f"REG{i} .equ PERIPH_BASE+{i * 2}")
+        lines.append(f"BIT{i} .equ (1<<{i % 16})|0x{i & 0xFF:X}")
+    compile_expression.cache_clear()
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        pass1(lines)
+        cold = time.perf_counter() - start
+        start = time.perf_counter()
+        symbol_table = pass1(lines)
+        warm = time.perf_counter() - start
+    print(f"{len(lines)} sabit: ilk derleme {cold * 1000:.1f} ms, önbellekli {warm * 1000:.1f} ms "
+          f"(REG{constants - 1} = 0x{symbol_table[f'REG{constants - 1}']['value']:04X})")
+
+    # En kötü durum: her sabit bir sonrakine ileri referans verir (ters sıralı zincir)
+    chain = [f"CHAIN{i} .equ CHAIN{i + 1}+1" for i in range(constants)] + [f"CHAIN{constants} .equ 0"]
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        symbol_table = pass1(chain)
+        elapsed = time.perf_counter() - start
+    print(f"{len(chain)} ileri referanslı zincir: {elapsed * 1000:.1f} ms (CHAIN0 = {symbol_table['CHAIN0']['value']})")
+
+# Biri benzersiz etiketli iki makro ve onları sık çağıran kaynak
+MACRO_SOURCE = (
+    ".macro LOAD src, dst", "    MOV src, dst", "    ADD #1, dst", ".endm",
+    ".macro DELAY reg", "wait?: DEC reg", "    JNE wait?", ".endm",
+)
+
+def bench_macros(calls=50_000):
+    """Makro genişletme hızını ölçer (önbellekli ve benzersiz etiketli çağrılar)"""
+    print("\n=== Makro genişletme ===")
+    lines = list(MACRO_SOURCE)
+    for i in range(calls):
+        lines.append(f"    LOAD R{i % 16}, R5")
+        lines.append(f"    DELAY R{i % 8}")
+    assembler = Assembler()
+    start = time.perf_counter()
+    assembler.parse_macros(lines)
+    expanded = sum(1 for _ in assembler.expand_macros(lines))
+    elapsed = time.perf_counter() - start
+    print(f"{2 * calls} çağrı -> {expanded} satır: {elapsed * 1000:.1f} ms "
+          f"({elapsed * 1e9 / expanded:.0f} ns/satır)")
+
+    # 64K girişli tablo: genişletme bellek kullanımı tekrar sayısından bağımsızdır
+    lines = ["ENTRIES .equ 0x8000", ".rept ENTRIES*2", "    .word 0x1234", ".endr"]
+    start = time.perf_counter()
+    expanded = sum(1 for _ in Assembler().expand_macros(lines))
+    elapsed = time.perf_counter() - start
+    # tracemalloc süreyi bozduğu için bellek ayrı bir çalıştırmada ölçülür
+    tracemalloc.start()
+    sum(1 for _ in Assembler().expand_macros(lines))
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f".rept tablosu: {expanded} satır, {elapsed * 1000:.1f} ms, tepe bellek {peak / 1e3:.1f} KB")
+
+    # Pasif .if dalındaki satırlar ayrıştırılmadan atlanır
+    lines = ["VARIANT .equ 2", ".if VARIANT == 1"] + [line.format(i=i) for i in range(calls // 8) for line in ASM_BLOCK]
+    lines += [".else", "    NOP", ".endif"]
+    start = time.perf_counter()
+    expanded = sum(1 for _ in Assembler().expand_macros(lines))
+    elapsed = time.perf_counter() - start
+    print(f"Pasif .if dalı: {len(lines)} satır -> {expanded} satır, {elapsed * 1000:.1f} ms")
+
+def bench_includes(modules=100, registers=5_000):
+    """Ortak bir başlığı .include eden modüllerin derlenme süresini ölçer (ilk ve önbellekli)"""
+    print("\n=== .include önbelleği ===")
+    with tempfile.TemporaryDirectory() as directory:
+        with open(os.path.join(directory, 'regs.inc'), 'w') as f:
+            f.writelines(f"REG{i} .equ 0x{0x0100 + 2 * i:04X} ; register {i}\n" for i in range(registers))
+        source = '.include "regs.inc"\nstart: MOV #REG5, R4\n'
+        _include_cache.clear()
+        include_cache_stats.update(hits=0, misses=0)
+        times = []
+        with contextlib.redirect_stdout(io.StringIO()):
+            for _ in range(modules):
+                start = time.perf_counter()
+                Assembler(include_paths=[directory]).assemble(source)
+                times.append(time.perf_counter() - start)
+    warm = sum(times[1:]) / (len(times) - 1)
+    print(f"{registers} satırlık başlık, {modules} modül: ilk {times[0] * 1000:.1f} ms, "
+          f"önbellekli {warm * 1000:.1f} ms/modül ({include_cache_stats['hits']} isabet, "
+          f"{include_cache_stats['misses']} ıskalama)")
+
+def bench_incremental(blocks=5_000):
+    """Tek satırlık düzenlemeden sonra tam ve artımlı derleme sürelerini karşılaştırır"""
+    print("\n=== Artımlı derleme ===")
+    lines = ['.text', 'start:']
+    for i in range(blocks):
+        lines += [f'l{i}: MOV #{i}, R4', f'    ADD l{i}, R5', '    NOP']
+    edits = (
+        ('aynı boyut', f'l{blocks // 2}: MOV #7, R4'),
+        ('boyut değişir', f'l{blocks // 2}: MOV #7, 2(R4)'),
+    )
+    assembler = Assembler()
+    results = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        assembler.reassemble('\n'.join(lines))
+        for name, text in edits:
+            edited = list(lines)
+            edited[2 + 3 * (blocks // 2)] = text
+            source = '\n'.join(edited)
+            start = time.perf_counter()
+            Assembler().assemble(source)
+            full = time.perf_counter() - start
+            start = time.perf_counter()
+            assembler.reassemble(source)
+            results.append((name, full, time.perf_counter() - start))
+            assembler.reassemble('\n'.join(lines))
+    for name, full, incremental in results:
+        print(f"{len(lines)} satır, {name}: tam {full * 1000:.1f} ms, artımlı {incremental * 1000:.1f} ms")
+
+BENCHMARKS = {
+    'relocations': bench_relocations,
+    'read_elf': bench_read_elf,
+    'memory': bench_memory,
+    'loader': bench_loader,
+    'simulator': bench_simulator,
+    'assembler': bench_assembler,
+    'encoder': bench_encoder,
+    'operands': bench_operands,
+    'expressions': bench_expressions,
+    'macros': bench_macros,
+    'includes': bench_includes,
+    'incremental': bench_incremental,
+}
+
+if __name__ == '__main__':
+    names = sys.argv[1:] or list(BENCHMARKS)
+    for name in names:
+        if name not in BENCHMARKS:
+            print(f"Bilinmeyen benchmark: {name} (seçenekler: {', '.join(BENCHMARKS)})")
+            sys.exit(1)
+        BENCHMARKS[name]()
@@ -0,0 +1,140 @@
+# build_cache.py
+# Assembler ve linker çıktıları için içerik adresli, kalıcı derleme önbelleği
+#
+# Anahtar, girdilerin (kaynak ve include dosyaları, araç sürümü, seçenekler) SHA-256
+# özetidir; değer üretilen dosyalardır (nesne dosyası, varsa liste dosyası). Her giriş
+# önbellek dizininde anahtarıyla adlandırılmış bir klasördür. Toplam boyut sınırı
+# aşıldığında en uzun süredir kullanılmayan girişler silinir (LRU).
+
+import hashlib
+import json
+import os
+import shutil
+import sys
+import tempfile
+from functools import lru_cache
+
+# Önbellek varsayılan olarak kapalıdır; --cache ile açıldığında bu dizin kullanılır
+DEFAULT_CACHE_DIR = os.environ.get('MSP430_CACHE_DIR') or os.path.join(
+    os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache'), 'msp430')
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+def digest(*parts):
+    """Parçaların sırası ve sınırları korunarak SHA-256 özetini döndürür"""
+    h = hashlib.sha256()
+    for part in parts:
+        data = part if isinstance(part, bytes) else str(part).encode('utf-8')
+        h.update(len(data).to_bytes(8, 'little'))
+        h.update(data)
+    return h.hexdigest()
+
+def file_digest(path):
+    """Dosya içeriğinin SHA-1 özeti (.include önbelleğiyle aynı özet)"""
+    with open(path, 'rb') as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+@lru_cache(maxsize=None)
+def toolchain_version(*module_names):
+    """Araç modüllerinin kaynak kodundan türetilen sürüm; kod değişince önbellek geçersizleşir"""
+    parts = []
+    for name in module_names:
+        with open(sys.modules[name].__file__, 'rb') as f:
+            parts.append(f.read())
+    return digest(*parts)[:16]
+
+class BuildCache:
+    """Boyutu sınırlı, LRU tahliyeli içerik adresli dosya önbelleği"""
+
+    def __init__(self, directory=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _entry(self, key):
+        return os.path.join(self.directory, key[:2], key)
+
+    def get(self, key, targets):
+        """targets (ad -> hedef yol) dosyalarının tümü önbellekteyse kopyalar ve True döndürür"""
+        entry = self._entry(key)
+        try:
+            for name, target in targets.items():
+                shutil.copyfile(os.path.join(entry, name), target)
+            os.utime(entry)  # LRU için son kullanım zamanı
+        except OSError:
+            self.misses += 1
+            return False
+        self.hits += 1
+        return True
+
+    def put(self, key, sources):
+        """sources (ad -> kaynak yol) dosyalarını tek bir giriş olarak atomik biçimde saklar"""
+        entry = self._entry(key)
+        parent = os.path.dirname(entry)
+        os.makedirs(parent, exist_ok=True)
+        staging = tempfile.mkdtemp(dir=parent)
+        try:
+            for name, source in sources.items():
+                shutil.copyfile(source, os.path.join(staging, name))
+            os.replace(staging, entry)
+        except OSError:
+            # Aynı girişi başka bir süreç yazmış olabilir
+            shutil.rmtree(staging, ignore_errors=True)
+
+    def load_json(self, key):
+        """JSON olarak saklanan küçük bir girişi (ör. include manifestosu) okur"""
+        try:
+            with open(os.path.join(self._entry(key), 'manifest.json'), encoding='utf-8') as f:
+                value = json.load(f)
+            os.utime(self._entry(key))
+            return value
+        except (OSError, ValueError):
+            return None
+
+    def store_json(self, key, value):
+        """Küçük bir değeri JSON girişi olarak saklar; var olan giriş değiştirilir"""
+        entry = self._entry(key)
+        os.makedirs(os.path.dirname(entry), exist_ok=True)
+        fd, path = tempfile.mkstemp(dir=os.path.dirname(entry))
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(value, f)
+        shutil.rmtree(entry, ignore_errors=True)
+        self.put(key, {'manifest.json': path})
+        os.remove(path)
+
+    def _entries(self):
+        """(son kullanım zamanı, boyut, yol) listesi"""
+        entries = []
+        if not os.path.isdir(self.directory):
+            return entries
+        for prefix in os.scandir(self.directory):
+            if not prefix.is_dir():
+                continue
+            for entry in os.scandir(prefix.path):
+                try:
+                    size = sum(f.stat().st_size for f in os.scandir(entry.path))
+                    entries.append((entry.stat().st_mtime, size, entry.path))
+                except OSError:
+                    continue
+        return entries
+
+    def size(self):
+        return sum(size for _, size, _ in self._entries())
+
+    def evict(self):
+        """Toplam boyut sınırın altına inene kadar en eski girişleri siler"""
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+            self.evictions += 1
+        return total
+
+    def summary(self):
+        total = self.evict()
+        return (f"Önbellek: {self.hits} isabet, {self.misses} ıskalama, {self.evictions} silinen "
+                f"({total / 2**20:.1f} / {self.max_bytes / 2**20:.1f} MB, {self.directory})")
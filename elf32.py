@@ -0,0 +1,427 @@
+# elf32.py
+# MSP430 için ikili ELF32 (EM_MSP430) nesne/çalıştırılabilir dosya yazıcısı ve okuyucusu
+
+import struct
+import sys
+from array import array
+from bisect import bisect_right
+
+ELF_MAGIC = b'\x7fELF'
+
+ELFCLASS32 = 1
+ELFDATA2LSB = 1
+EV_CURRENT = 1
+# GCC gibi ELFOSABI_STANDALONE: readelf klasik MSP430 relocation tiplerini kullanır
+ELFOSABI_STANDALONE = 255
+
+ET_REL = 1
+ET_EXEC = 2
+EM_MSP430 = 105
+
+SHT_NULL = 0
+SHT_PROGBITS = 1
+SHT_SYMTAB = 2
+SHT_STRTAB = 3
+SHT_NOBITS = 8
+SHT_REL = 9
+
+SHF_WRITE = 0x1
+SHF_ALLOC = 0x2
+SHF_EXECINSTR = 0x4
+
+SHN_UNDEF = 0
+SHN_ABS = 0xFFF1
+
+STB_LOCAL = 0
+STB_GLOBAL = 1
+STT_NOTYPE = 0
+STT_OBJECT = 1
+STT_FUNC = 2
+
+PT_LOAD = 1
+PF_X = 0x1
+PF_W = 0x2
+PF_R = 0x4
+
+# binutils elf/msp430.h relocation tipleri
+R_MSP430_10_PCREL = 2
+R_MSP430_16 = 3
+
+RELOC_TYPES = {
+    'ABSOLUTE_16': R_MSP430_16,
+    'PC_RELATIVE': R_MSP430_10_PCREL,
+}
+RELOC_NAMES = {v: k for k, v in RELOC_TYPES.items()}
+
+# Yapı düzenleri (little endian)
+EHDR = struct.Struct('<16sHHIIIIIHHHHHH')
+SHDR = struct.Struct('<IIIIIIIIII')
+PHDR = struct.Struct('<IIIIIIII')
+SYM = struct.Struct('<IIIBBH')
+REL = struct.Struct('<II')
+
+# Bölüm adı -> (ELF adı, sh_flags)
+PROGBITS_SECTIONS = {
+    'text': ('.text', SHF_ALLOC | SHF_EXECINSTR),
+    'data': ('.data', SHF_ALLOC | SHF_WRITE),
+}
+
+class SectionWords:
+    """Bir bölümün adres/kelime çiftlerini iki kompakt dizi içinde saklar"""
+    __slots__ = ('addresses', 'words')
+
+    def __init__(self, addresses=None, words=None):
+        self.addresses = array('H') if addresses is None else addresses
+        self.words = array('H') if words is None else words
+
+    @classmethod
+    def from_buffer(cls, base, words):
+        """Ardışık bir kelime tamponunu (ör. memoryview) kopyalamadan sarar"""
+        return cls(range(base, base + 2 * len(words), 2), words)
+
+    def append(self, addr, word):
+        self.addresses.append(addr & 0xFFFF)
+        self.words.append(word & 0xFFFF)
+
+    def __len__(self):
+        return len(self.words)
+
+    def __iter__(self):
+        return zip(self.addresses, self.words)
+
+class SectionBuffer:
+    """Ardışık kelimelerden oluşan bölüm parçası: taban adres ve büyüyebilen array('H')
+
+    words bir array('H') ya da onun üzerindeki memoryview olabilir; parçalar kopyalanmadan
+    nesne yazıcısı, GUI ve linker arasında paylaşılır.
+    """
+    __slots__ = ('base', 'words')
+
+    def __init__(self, base, words=None):
+        self.base = base
+        self.words = array('H') if words is None else words
+
+    @property
+    def end(self):
+        return self.base + 2 * len(self.words)
+
+    def view(self):
+        return memoryview(self.words)
+
+    def __len__(self):
+        return len(self.words)
+
+    def __iter__(self):
+        return zip(range(self.base, self.end, 2), self.words)
+
+class CodeImage:
+    """Assembler/linker çıktısı: adres/kelime demetleri yerine ardışık SectionBuffer parçaları
+
+    write() bir önceki parçanın bittiği adrese yazılan kelimeleri aynı tampona ekler; böylece
+    .org veya bölüm değişmedikçe tüm kod tek bir array('H') içinde tutulur. Yineleme eski
+    biçimle uyumlu (adres, kelime) çiftleri üretir.
+    """
+    __slots__ = ('runs', '_ends')
+
+    def __init__(self, runs=()):
+        self.runs = list(runs)
+        self._ends = {run.end: run for run in self.runs}
+
+    def write(self, address, words):
+        """Kelimeleri (array('H') veya memoryview) address adresinden başlayarak ekler"""
+        if not len(words):
+            return
+        run = self._ends.pop(address, None)
+        if run is None or type(run.words) is not array:
+            if run is not None:
+                self._ends[address] = run
+            run = SectionBuffer(address)
+            self.runs.append(run)
+        run.words.extend(words)
+        self._ends[run.end] = run
+
+    def split(self, low, high):
+        """[low, high) aralığındaki kelimeleri low'a göre, kalanları mutlak adresle iki görüntüye ayırır"""
+        inside, outside = [], []
+        for run in self.runs:
+            view = run.view()
+            start = min(max(low, run.base), run.end)
+            stop = min(max(high, start), run.end)
+            first, last = (start - run.base) >> 1, (stop - run.base) >> 1
+            # Dilimler memoryview olduğundan kelimeler kopyalanmaz
+            for target, base, words in ((outside, run.base, view[:first]), (inside, start - low, view[first:last]),
+                                        (outside, stop, view[last:])):
+                if len(words):
+                    target.append(SectionBuffer(base, words))
+        return CodeImage(inside), CodeImage(outside)
+
+    def size(self, low=0, high=0x10000):
+        """[low, high) aralığındaki kelime sayısı"""
+        return sum(max(0, min(high, run.end) - max(low, run.base)) >> 1 for run in self.runs)
+
+    def __len__(self):
+        return sum(len(run.words) for run in self.runs)
+
+    def __iter__(self):
+        for run in self.runs:
+            yield from run
+
+    def __repr__(self):
+        return f"CodeImage({', '.join(f'0x{run.base:04X}+{len(run)}' for run in self.runs)})"
+
+def is_elf32(filename):
+    """Dosyanın ikili ELF olup olmadığını sihirli sayıdan anlar"""
+    with open(filename, 'rb') as f:
+        return f.read(4) == ELF_MAGIC
+
+def _section_images(section):
+    """Bölümü ardışık parçalarına ayırır; her parça için (taban adres, bayt dizisi) döndürür
+
+    Aralarında boşluk olan parçalar ayrı PROGBITS bölümlerine yazılır; boşluk sıfırla
+    doldurulmaz (ör. .org 0xF800 ile reset vektörü 0xFFFE). Örtüşen yazımlarda sonraki kazanır.
+    """
+    if not len(section):
+        return []
+    if isinstance(section, CodeImage):
+        pieces = [(run.base, run.view()) for run in section.runs if len(run)]
+    elif isinstance(section.addresses, range):
+        pieces = [(section.addresses.start, section.words)]
+    else:
+        pieces = [(addr, array('H', (word,))) for addr, word in section]
+
+    clusters = []
+    for base, end in sorted((base, base + 2 * len(words)) for base, words in pieces):
+        if clusters and base <= clusters[-1][1]:
+            clusters[-1][1] = max(clusters[-1][1], end)
+        else:
+            clusters.append([base, end])
+    starts = [base for base, _ in clusters]
+    images = [array('H', bytes(end - base)) for base, end in clusters]
+    views = [memoryview(image) for image in images]
+    # Parçalar kelime kelime değil, dilim ataması ile kopyalanır
+    for base, words in pieces:
+        i = bisect_right(starts, base) - 1
+        start = (base - starts[i]) >> 1
+        views[i][start:start + len(words)] = memoryview(words)
+    del views
+    if sys.byteorder != 'little':
+        for image in images:
+            image.byteswap()
+    return [(base, image.tobytes()) for base, image in zip(starts, images)]
+
+class _StringTable:
+    """ELF string tablosu oluşturucu (aynı isim bir kez yazılır)"""
+
+    def __init__(self):
+        self.data = bytearray(b'\x00')
+        self.offsets = {'': 0}
+
+    def add(self, name):
+        if name not in self.offsets:
+            self.offsets[name] = len(self.data)
+            self.data += name.encode('utf-8') + b'\x00'
+        return self.offsets[name]
+
+def _symbol_fields(info, section_index):
+    """Sembol tablosu girişini (st_info, st_shndx, st_value) alanlarına çevirir"""
+    if not isinstance(info, dict):
+        return (STB_GLOBAL << 4) | STT_NOTYPE, SHN_UNDEF, 0
+
+    if not info.get('defined', False) or info.get('type') == 'external':
+        shndx = SHN_UNDEF
+    else:
+        shndx = section_index.get(info.get('section'), SHN_ABS)
+
+    bind = STB_GLOBAL if info.get('is_global', False) or shndx == SHN_UNDEF else STB_LOCAL
+    sym_type = {'code': STT_FUNC, 'data': STT_OBJECT}.get(info.get('type'), STT_NOTYPE)
+    return (bind << 4) | sym_type, shndx, int(info.get('value', 0)) & 0xFFFF
+
+def write_elf(filename, text, data, symbol_table, relocation_entries=(), elf_type=ET_REL, entry=0):
+    """text/data bölümlerini, sembolleri ve relocation girişlerini ELF32 dosyasına yazar"""
+    sections = {'text': text, 'data': data}
+
+    # Bölüm başlığı sırası: NULL, .text, .data, .symtab, .strtab, .rel.*, .shstrtab
+    shstrtab = _StringTable()
+    headers = [(0, SHT_NULL, 0, 0, b'', 0, 0, 0, 0)]
+    section_index = {}
+    for name, (elf_name, flags) in PROGBITS_SECTIONS.items():
+        # Boş bölüm de tek başlıkla yazılır; semboller ve relocation'lar ilk parçaya bağlanır
+        section_index[name] = len(headers)
+        for base, image in _section_images(sections[name]) or [(0, b'')]:
+            headers.append((shstrtab.add(elf_name), SHT_PROGBITS, flags, base, image, 0, 0, 2, 0))
+
+    # Semboller: önce yereller, sonra globaller (ELF kuralı)
+    strtab = _StringTable()
+    local_syms = []
+    global_syms = []
+    for name, info in symbol_table.items():
+        st_info, shndx, value = _symbol_fields(info, section_index)
+        entry_fields = (strtab.add(name), value, 0, st_info, 0, shndx)
+        (global_syms if st_info >> 4 == STB_GLOBAL else local_syms).append((name, entry_fields))
+
+    # Relocation'da geçip tabloda olmayan semboller tanımsız global olarak eklenir
+    known = set(symbol_table)
+    for rel in relocation_entries:
+        name = rel['symbol'].lstrip('#@')
+        if name not in known:
+            known.add(name)
+            global_syms.append((name, (strtab.add(name), 0, 0, (STB_GLOBAL << 4) | STT_NOTYPE, 0, SHN_UNDEF)))
+
+    ordered = [('', (0, 0, 0, 0, 0, SHN_UNDEF))] + local_syms + global_syms
+    symbol_index = {name: i for i, (name, _) in enumerate(ordered) if name}
+    symtab = bytearray(SYM.size * len(ordered))
+    for i, (_, fields) in enumerate(ordered):
+        SYM.pack_into(symtab, i * SYM.size, *fields)
+
+    symtab_index = len(headers)
+    strtab_index = symtab_index + 1
+    headers.append((shstrtab.add('.symtab'), SHT_SYMTAB, 0, 0, bytes(symtab), strtab_index,
+                    1 + len(local_syms), 4, SYM.size))
+    headers.append((shstrtab.add('.strtab'), SHT_STRTAB, 0, 0, bytes(strtab.data), 0, 0, 1, 0))
+
+    # Her hedef bölüm için ayrı .rel.<bölüm>
+    for name, (elf_name, _) in PROGBITS_SECTIONS.items():
+        rels = [rel for rel in relocation_entries if rel['section'] == name]
+        if not rels:
+            continue
+        payload = bytearray(REL.size * len(rels))
+        for i, rel in enumerate(rels):
+            r_type = RELOC_TYPES.get(rel['type'], R_MSP430_16)
+            r_sym = symbol_index[rel['symbol'].lstrip('#@')]
+            REL.pack_into(payload, i * REL.size, rel['offset'] & 0xFFFF, (r_sym << 8) | r_type)
+        headers.append((shstrtab.add('.rel' + elf_name), SHT_REL, 0, 0, bytes(payload), symtab_index,
+                        section_index[name], 4, REL.size))
+
+    shstrndx = len(headers)
+    name_off = shstrtab.add('.shstrtab')
+    headers.append((name_off, SHT_STRTAB, 0, 0, bytes(shstrtab.data), 0, 0, 1, 0))
+
+    # Çalıştırılabilir dosyada her dolu PROGBITS bölümü için bir PT_LOAD
+    loadable = [i for i, header in enumerate(headers) if elf_type == ET_EXEC and header[1] == SHT_PROGBITS and header[4]]
+    phoff = EHDR.size if loadable else 0
+    offset = EHDR.size + PHDR.size * len(loadable)
+
+    out = bytearray(offset)
+    file_offsets = [0]
+    for name_off, sh_type, flags, addr, payload, link, info, align, entsize in headers[1:]:
+        offset = (offset + align - 1) & ~(align - 1)
+        out += bytes(offset - len(out))
+        file_offsets.append(offset)
+        out += payload
+        offset += len(payload)
+
+    shoff = (len(out) + 3) & ~3
+    out += bytes(shoff - len(out))
+    for i, (name_off, sh_type, flags, addr, payload, link, info, align, entsize) in enumerate(headers):
+        out += SHDR.pack(name_off, sh_type, flags, addr, file_offsets[i], len(payload), link, info, align, entsize)
+
+    for n, i in enumerate(loadable):
+        _, _, flags, addr, payload, _, _, _, _ = headers[i]
+        p_flags = PF_R | (PF_X if flags & SHF_EXECINSTR else 0) | (PF_W if flags & SHF_WRITE else 0)
+        PHDR.pack_into(out, EHDR.size + n * PHDR.size, PT_LOAD, file_offsets[i], addr, addr,
+                       len(payload), len(payload), p_flags, 2)
+
+    ident = ELF_MAGIC + bytes([ELFCLASS32, ELFDATA2LSB, EV_CURRENT, ELFOSABI_STANDALONE]) + bytes(8)
+    EHDR.pack_into(out, 0, ident, elf_type, EM_MSP430, EV_CURRENT, entry & 0xFFFF, phoff, shoff, 0,
+                   EHDR.size, PHDR.size, len(loadable), SHDR.size, len(headers), shstrndx)
+
+    with open(filename, 'wb') as f:
+        f.write(out)
+    return filename
+
+def _cstring(buf, offset):
+    end = buf.index(0, offset)
+    return buf[offset:end].decode('utf-8')
+
+def parse_elf(buf):
+    """ELF32 içeriğini (bytes/bytearray) ayrıştırır; bölüm kelimeleri kopyalanmadan memoryview olarak döner"""
+    view = memoryview(buf)
+    ident, elf_type, machine, _, entry, _, shoff, _, _, _, _, _, shnum, shstrndx = EHDR.unpack_from(view, 0)
+    if ident[:4] != ELF_MAGIC or ident[4] != ELFCLASS32 or ident[5] != ELFDATA2LSB:
+        raise ValueError("Geçersiz ELF32 little-endian dosyası")
+    if machine != EM_MSP430:
+        raise ValueError(f"Desteklenmeyen makine tipi: {machine}")
+
+    headers = [SHDR.unpack_from(view, shoff + i * SHDR.size) for i in range(shnum)]
+    shstr_off = headers[shstrndx][4]
+    names = [_cstring(buf, shstr_off + h[0]) for h in headers]
+
+    result = {
+        'text': SectionWords(),
+        'data': SectionWords(),
+        'symbols': {},
+        'relocations': [],
+        'elf_type': elf_type,
+        'entry': entry,
+    }
+
+    section_by_index = {}
+    symbol_names = []
+    parts = {}
+    for i, (name, h) in enumerate(zip(names, headers)):
+        sh_type, sh_addr, sh_offset, sh_size = h[1], h[3], h[4], h[5]
+        key = name.lstrip('.')
+        if sh_type == SHT_PROGBITS and key in PROGBITS_SECTIONS:
+            section_by_index[i] = key
+            words = view[sh_offset:sh_offset + sh_size - (sh_size & 1)]
+            if sys.byteorder == 'little':
+                words = words.cast('H')
+            else:
+                words = array('H', words)
+                words.byteswap()
+            if len(words):
+                parts.setdefault(key, []).append((sh_addr, words))
+    for key, runs in parts.items():
+        if len(runs) == 1:
+            result[key] = SectionWords.from_buffer(*runs[0])
+            continue
+        # Boşluklu bölüm birden fazla PROGBITS parçasıdır: adres/kelime dizilerinde birleştirilir
+        section = result[key]
+        for base, words in runs:
+            section.addresses.extend(range(base, base + 2 * len(words), 2))
+            section.words.extend(words)
+
+    for i, h in enumerate(headers):
+        if h[1] != SHT_SYMTAB:
+            continue
+        str_off = headers[h[6]][4]
+        for n in range(1, h[5] // SYM.size):
+            st_name, st_value, _, st_info, _, st_shndx = SYM.unpack_from(view, h[4] + n * SYM.size)
+            name = _cstring(buf, str_off + st_name)
+            symbol_names.append(name)
+            bind, sym_type = st_info >> 4, st_info & 0xF
+            if st_shndx == SHN_UNDEF:
+                section, kind = 'none', 'external'
+            elif st_shndx == SHN_ABS:
+                section, kind = 'const', 'absolute'
+            else:
+                section, kind = section_by_index.get(st_shndx, 'none'), 'relative'
+            kind = {STT_FUNC: 'code', STT_OBJECT: 'data'}.get(sym_type, kind)
+            result['symbols'][name] = {
+                'value': st_value,
+                'type': kind,
+                'section': section,
+                'defined': st_shndx != SHN_UNDEF,
+                'is_global': bind == STB_GLOBAL
+            }
+
+    for h in headers:
+        if h[1] != SHT_REL:
+            continue
+        section = section_by_index.get(h[7], 'text')
+        for n in range(h[5] // REL.size):
+            r_offset, r_info = REL.unpack_from(view, h[4] + n * REL.size)
+            result['relocations'].append({
+                'offset': r_offset,
+                'symbol': symbol_names[(r_info >> 8) - 1],
+                'type': RELOC_NAMES.get(r_info & 0xFF, 'ABSOLUTE_16'),
+                'section': section
+            })
+
+    return result
+
+def read_elf32(filename):
+    """ELF32 dosyasını tek okumada yazılabilir bir tampona alır ve ayrıştırır"""
+    with open(filename, 'rb') as f:
+        buf = bytearray(f.read())
+    return parse_elf(buf)
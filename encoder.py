@@ -0,0 +1,123 @@
+# encoder.py
+# Tablo tabanlı MSP430 komut kodlayıcısı
+#
+# Her (komut, B/W, As, Ad) dörtlüsünün taban kelimesi opcode tablosundan bir kez hesaplanır;
+# bir komutu kodlamak tek bir sözlük araması ve register alanlarının OR'lanmasıdır.
+# words() bir komut listesinin ilk kelimelerini tek çağrıda üretir; NumPy kuruluysa register
+# alanları taban kelime vektörüne toplu olarak eklenir.
+
+from array import array
+
+from asm_ir import immediate_value
+
+try:
+    import numpy as np
+except ImportError:
+    np = None  # Saf Python yolu kullanılır
+
+# Komut biçimleri
+DOUBLE = 0  # Format I: iki operand
+SINGLE = 1  # Format II: tek operand
+JUMP = 2    # Format III: koşullu/koşulsuz atlama
+
+# Yalnızca kelime (W) boyutunda geçerli tek operandlı komutlar
+WORD_ONLY = frozenset(('SWPB', 'SXT', 'CALL', 'RETI'))
+
+REGISTER_NUMBERS = {f'R{i}': i for i in range(16)}
+
+# Koşullu atlamaların ters koşulları (JN'nin tersi yoktur)
+INVERTED_JUMPS = {
+    'JNE': 'JEQ', 'JEQ': 'JNE', 'JNZ': 'JZ', 'JZ': 'JNZ',
+    'JNC': 'JC', 'JC': 'JNC', 'JLO': 'JHS', 'JHS': 'JLO',
+    'JGE': 'JL', 'JL': 'JGE',
+}
+
+# NumPy yolunun kendini amorti ettiği en küçük toplu kodlama boyutu
+NUMPY_MIN_BATCH = 256
+
+def build_base_words(opcode_table):
+    """(komut, B/W, As, Ad) -> taban kelime tablosunu üretir; register alanları sıfırdır"""
+    table = {}
+    for mnemonic, opcode in opcode_table["double_operand"].items():
+        for byte in (0, 1):
+            for As in range(4):
+                for Ad in (0, 1):
+                    table[mnemonic, byte, As, Ad] = (opcode << 12) | (Ad << 7) | (byte << 6) | (As << 4)
+    for mnemonic, base in opcode_table["single_operand"].items():
+        for byte in ((0,) if mnemonic in WORD_ONLY else (0, 1)):
+            for As in range(4):
+                table[mnemonic, byte, As, 0] = base | (byte << 6) | (As << 4)
+    for mnemonic, base in opcode_table["jump"].items():
+        table[mnemonic, 0, 0, 0] = base
+    return table
+
+class Encoder:
+    """Opcode tablosundan türetilmiş, tablo tabanlı komut kodlayıcı"""
+
+    def __init__(self, opcode_table):
+        self.base_words = build_base_words(opcode_table)
+        self.constants = dict(opcode_table["constant_generator"])  # Değer -> (register, As)
+        self.formats = {}
+        for fmt, group in ((DOUBLE, "double_operand"), (SINGLE, "single_operand"), (JUMP, "jump")):
+            self.formats.update(dict.fromkeys(opcode_table[group], fmt))
+
+    def key(self, mnemonic, byte=0, As=0, Ad=0):
+        """Tablo anahtarını doğrular ve döndürür"""
+        key = (mnemonic, byte, As, Ad)
+        if key not in self.base_words:
+            raise ValueError(f"Gecersiz komut bicimi: {mnemonic}{'.B' if byte else ''}")
+        return key
+
+    def constant(self, operand):
+        """Sabit üreteciyle (R2/R3) kodlanabilen #sayı operandı için (register, As); değilse None"""
+        if not operand.startswith('#'):
+            return None
+        return self.constants.get(immediate_value(operand))
+
+    def word(self, key, src_reg=0, dst_reg=0):
+        """Tek bir komutun ilk kelimesi; tek operandlı komutta register dst_reg alanındadır"""
+        return self.base_words[key] | (src_reg << 8) | dst_reg
+
+    def relaxed_jump(self, mnemonic, target):
+        """Menzil dışı atlamanın uzun biçimi: BR #hedef (MOV #hedef, PC)
+
+        Koşullu atlamada BR, ters koşullu kısa bir atlamayla geçilir; tersi olmayan JN için
+        JN +1 / JMP +2 / BR #hedef dizisi kullanılır.
+        """
+        branch = (self.word(('MOV', 0, 0x3, 0), 0, 0), target & 0xFFFF)
+        if mnemonic == 'JMP':
+            return branch
+        inverse = INVERTED_JUMPS.get(mnemonic)
+        if inverse is not None:
+            return (self.word((inverse, 0, 0, 0), 0, 2),) + branch
+        return (self.word((mnemonic, 0, 0, 0), 0, 1), self.word(('JMP', 0, 0, 0), 0, 2)) + branch
+
+    def relaxed_size(self, mnemonic):
+        """Uzun biçimli atlamanın bayt cinsinden boyutu"""
+        return 2 * len(self.relaxed_jump(mnemonic, 0))
+
+    def words(self, fields):
+        """(anahtar, kaynak reg, hedef alan) listesinin ilk kelimelerini tek çağrıda üretir"""
+        base_words = self.base_words
+        if np is not None and len(fields) >= NUMPY_MIN_BATCH:
+            count = len(fields)
+            keys, src_regs, dst_fields = zip(*fields)
+            words = np.fromiter((base_words[key] for key in keys), dtype=np.uint16, count=count)
+            words |= np.fromiter(src_regs, dtype=np.uint16, count=count) << 8
+            words |= np.fromiter(dst_fields, dtype=np.uint16, count=count)
+            return array('H', words.tobytes())
+        return array('H', [base_words[key] | (src_reg << 8) | dst_field for key, src_reg, dst_field in fields])
+
+_encoders = {}
+_last = (None, None)  # Son kullanılan (opcode tablosu, kodlayıcı)
+
+def encoder_for(opcode_table):
+    """Opcode tablosu başına bir kez oluşturulan kodlayıcıyı döndürür"""
+    global _last
+    if _last[0] is opcode_table:
+        return _last[1]
+    entry = _encoders.get(id(opcode_table))
+    if entry is None or entry[0] is not opcode_table:
+        entry = _encoders[id(opcode_table)] = (opcode_table, Encoder(opcode_table))
+    _last = entry
+    return entry[1]
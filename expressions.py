@@ -0,0 +1,304 @@
+# expressions.py
+# .equ/.set ifadeleri için derlenmiş ifade motoru
+#
+# İfade bir kez Pratt ayrıştırıcısıyla iç içe kapanışlara (closure) derlenir ve metnine
+# göre önbelleğe alınır. Derlenmiş ifade sembol değerleri değiştikçe yeniden ayrıştırılmadan,
+# ifade uzunluğunda doğrusal sürede yeniden değerlendirilebilir.
+
+import re
+from functools import lru_cache
+
+# Sayı sabiti biçimleri: 0x1F, 1Fh, 101b, 0b101, 42 (.equ ifadeleri ve #immediate operandları ortak kullanır)
+NUMBER_PATTERN = r'0[xX][0-9A-Fa-f]+|[0-9][0-9A-Fa-f]*[hH]|[01]+[bB]|0[bB][01]+|[0-9]+'
+
+# Sayının hemen ardından harf/rakam gelemez (ör. 0b1h yanlışlıkla 0b1 ve h olarak bölünmez)
+_TOKEN_RE = re.compile(rf'((?:{NUMBER_PATTERN})(?![0-9A-Za-z_]))|([A-Za-z_]\w*)|(<<|>>|==|!=|<=|>=|&&|\|\||[-+*/%&|^~()<>!])')
+
+def _truncating_div(a, b):
+    """Sıfıra doğru yuvarlanan tamsayı bölme (assembler anlamı)"""
+    if b == 0:
+        raise ValueError("Sıfıra bölme")
+    q = abs(a) // abs(b)
+    return q if (a < 0) == (b < 0) else -q
+
+def _truncating_mod(a, b):
+    return a - _truncating_div(a, b) * b
+
+# İkili operatörler: bağlama gücü ve işlem (Python öncelik sırası)
+# Karşılaştırma ve mantık operatörleri (.if koşulları için) 1 veya 0 üretir
+_BINARY = {
+    '||': (2, lambda a, b: int(bool(a or b))),
+    '&&': (4, lambda a, b: int(bool(a and b))),
+    '==': (6, lambda a, b: int(a == b)),
+    '!=': (6, lambda a, b: int(a != b)),
+    '<': (8, lambda a, b: int(a < b)),
+    '<=': (8, lambda a, b: int(a <= b)),
+    '>': (8, lambda a, b: int(a > b)),
+    '>=': (8, lambda a, b: int(a >= b)),
+    '|': (10, lambda a, b: a | b),
+    '^': (20, lambda a, b: a ^ b),
+    '&': (30, lambda a, b: a & b),
+    '<<': (40, lambda a, b: a << b),
+    '>>': (40, lambda a, b: a >> b),
+    '+': (50, lambda a, b: a + b),
+    '-': (50, lambda a, b: a - b),
+    '*': (60, lambda a, b: a * b),
+    '/': (60, _truncating_div),
+    '%': (60, _truncating_mod),
+}
+_UNARY = {
+    '-': lambda a: -a,
+    '+': lambda a: a,
+    '~': lambda a: ~a,
+    '!': lambda a: int(not a),
+}
+_UNARY_POWER = 70
+
+def parse_number(text):
+    """NUMBER_PATTERN ile eşleşen sayı sabitini çözer: 42, 0x1F, 1Fh, 101b, 0b101"""
+    if text.isdigit():
+        return int(text)
+    lower = text.lower()
+    if lower.startswith('0x'):
+        return int(text[2:], 16)
+    if lower.endswith('h'):
+        return int(text[:-1], 16)
+    if lower.endswith('b'):
+        return int(text[:-1], 2)
+    return int(text[2:], 2)
+
+def _tokenize(text):
+    """Sayıları int, sembol ve operatörleri str olarak döndürür"""
+    tokens = []
+    length = 0
+    for number, word, op in _TOKEN_RE.findall(text):
+        token = number or word or op
+        length += len(token)
+        tokens.append(parse_number(number) if number else token)
+    # Eşleşmeyen karakter findall tarafından atlanır; uzunluk farkı hatayı gösterir
+    compact = ''.join(text.split())
+    if length != len(compact):
+        raise ValueError(f"Geçersiz karakter: '{_TOKEN_RE.sub('', compact)[:1]}'")
+    return tokens
+
+class Expression:
+    """Derlenmiş ifade: evaluate(lookup) sembolleri lookup(name) ile çözer"""
+    __slots__ = ('text', 'references', 'symbols', 'operators', '_code')
+
+    def __init__(self, text, references, operators, code):
+        self.text = text
+        self.references = references                     # Sembol geçişleri (tekrarlarıyla, soldan sağa)
+        self.symbols = tuple(dict.fromkeys(references))  # Tekrarsız semboller
+        self.operators = operators                       # İkili operatörler (soldan sağa)
+        self._code = code
+
+    def evaluate(self, lookup):
+        return self._code(lookup)
+
+    def __repr__(self):
+        return f"Expression({self.text!r})"
+
+def _binary(apply, left, right):
+    """İkili düğüm; sabit alt ifadeler derleme anında katlanır"""
+    left_constant = isinstance(left, int)
+    right_constant = isinstance(right, int)
+    if left_constant and right_constant:
+        return apply(left, right)
+    if left_constant:
+        return lambda lookup: apply(left, right(lookup))
+    if right_constant:
+        return lambda lookup: apply(left(lookup), right)
+    return lambda lookup: apply(left(lookup), right(lookup))
+
+class _Parser:
+    """Pratt (öncelik tırmanma) ayrıştırıcısı; her düğüm bir sabite veya kapanışa derlenir"""
+
+    def __init__(self, text):
+        self.tokens = _tokenize(text)
+        self.position = 0
+        self.references = []
+        self.operators = []
+
+    def next(self):
+        if self.position >= len(self.tokens):
+            raise ValueError("Beklenmeyen ifade sonu")
+        token = self.tokens[self.position]
+        self.position += 1
+        return token
+
+    def parse(self, min_power=0):
+        token = self.next()
+        if isinstance(token, int):
+            left = token
+        elif token[0].isalpha() or token[0] == '_':
+            self.references.append(token)
+            left = lambda lookup, name=token: lookup(name)
+        elif token == '(':
+            left = self.parse()
+            if self.position >= len(self.tokens) or self.tokens[self.position] != ')':
+                raise ValueError("')' bekleniyor")
+            self.position += 1
+        elif token in _UNARY:
+            operand = self.parse(_UNARY_POWER)
+            apply = _UNARY[token]
+            left = apply(operand) if isinstance(operand, int) else \
+                lambda lookup, operand=operand: apply(operand(lookup))
+        else:
+            raise ValueError(f"Beklenmeyen '{token}'")
+
+        tokens = self.tokens
+        while self.position < len(tokens):
+            binary = _BINARY.get(tokens[self.position]) if isinstance(tokens[self.position], str) else None
+            if binary is None or binary[0] <= min_power:
+                break
+            self.operators.append(tokens[self.position])
+            self.position += 1
+            left = _binary(binary[1], left, self.parse(binary[0]))
+        return left
+
+@lru_cache(maxsize=8192)
+def compile_expression(text):
+    """İfadeyi bir kez ayrıştırıp derler; aynı metin için önbellekteki nesneyi döndürür"""
+    parser = _Parser(text)
+    if not parser.tokens:
+        raise ValueError("Boş ifade")
+    code = parser.parse()
+    if parser.position != len(parser.tokens):
+        raise ValueError(f"Beklenmeyen '{parser.tokens[parser.position]}'")
+    if isinstance(code, int):
+        code = lambda lookup, constant=code: constant
+    return Expression(text, tuple(parser.references), tuple(parser.operators), code)
+
+# Çözülemeyen sabitler için geçici değer
+UNRESOLVED_VALUE = 0xFF7F
+
+def evaluate(expression, symbol_table):
+    """Derlenmiş ifadeyi sembol tablosuna göre 16-bit değere çevirir"""
+    def lookup(sym):
+        if sym not in symbol_table:
+            raise ValueError(f"Bilinmeyen sembol: {sym}")
+        sym_entry = symbol_table[sym]
+        if isinstance(sym_entry, dict):
+            if not sym_entry.get('defined', False):
+                raise ValueError(f"Tanımsız sembol: {sym}")
+            return sym_entry['value']
+        return sym_entry
+
+    result = expression.evaluate(lookup)
+    if not -32768 <= result <= 65535:
+        raise ValueError(f"16-bit sınırı aşıldı: {result}")
+    return result & 0xFFFF
+
+class ConstantGraph:
+    """.equ/.set sabitlerinin bağımlılık grafiği
+
+    Sabitler topolojik sırayla tek geçişte çözülür; döngüler yol bilgisiyle raporlanır.
+    Bir sembol değiştiğinde yalnızca ona (dolaylı olarak) bağlı sabitler yeniden hesaplanır.
+    """
+
+    def __init__(self):
+        self.expressions = {}  # Sabit adı -> Expression
+        self.lines = {}        # Sabit adı -> tanımlandığı satır
+        self.dependents = {}   # Sembol adı -> ona doğrudan bağlı sabitler
+
+    def define(self, name, expression, line=None):
+        """Sabiti (yeniden) tanımlar ve bağımlılık kenarlarını günceller"""
+        previous = self.expressions.get(name)
+        if previous is not None:
+            for sym in previous.symbols:
+                self.dependents.get(sym, set()).discard(name)
+        self.expressions[name] = expression
+        self.lines[name] = line
+        for sym in expression.symbols:
+            self.dependents.setdefault(sym, set()).add(name)
+
+    def remove(self, name):
+        """Sabiti ve bağımlılık kenarlarını grafikten çıkarır; ona bağlı olanlar korunur"""
+        expression = self.expressions.pop(name, None)
+        if expression is not None:
+            for sym in expression.symbols:
+                self.dependents.get(sym, set()).discard(name)
+        self.lines.pop(name, None)
+
+    def order(self, names):
+        """names kümesindeki sabitleri bağımlılıklarından sonra gelecek şekilde sıralar"""
+        expressions = self.expressions
+        state = {}  # 1: yığında, 2: tamamlandı
+        ordered = []
+        for root in [name for name in expressions if name in names]:
+            if state.get(root):
+                continue
+            state[root] = 1
+            stack = [(root, iter(expressions[root].symbols))]
+            while stack:
+                name, deps = stack[-1]
+                for dep in deps:
+                    if dep not in expressions or dep not in names:
+                        continue
+                    mark = state.get(dep)
+                    if mark == 1:
+                        path = [entry[0] for entry in stack]
+                        cycle = path[path.index(dep):] + [dep]
+                        message = f"Döngüsel .equ bağımlılığı: {' -> '.join(cycle)}"
+                        if self.lines.get(dep) is not None:
+                            message = f"Line {self.lines[dep]}: {message}"
+                        raise ValueError(message)
+                    if not mark:
+                        state[dep] = 1
+                        stack.append((dep, iter(expressions[dep].symbols)))
+                        break
+                else:
+                    state[name] = 2
+                    ordered.append(name)
+                    stack.pop()
+        return ordered
+
+    def _evaluate(self, names, symbol_table):
+        """Sabitleri sırayla hesaplar; değeri değişenlerin listesini döndürür"""
+        changed = []
+        for name in self.order(names):
+            entry = symbol_table.get(name)
+            if not isinstance(entry, dict):
+                continue
+            try:
+                value, defined = evaluate(self.expressions[name], symbol_table), True
+            except ValueError:
+                # Dış ya da tanımsız sembole bağlı: linker/relocation ile çözülür
+                value, defined = UNRESOLVED_VALUE, False
+            if entry.get('value') != value or entry.get('defined') != defined:
+                entry['value'] = value
+                entry['defined'] = defined
+                changed.append(name)
+        return changed
+
+    def resolve(self, symbol_table):
+        """Henüz tanımlanmamış tüm sabitleri çözer
+
+        Dış (.ref/.global) sembole bağlı sabitler tanımsız kalabilir; hiçbir yerde bildirilmemiş
+        bir sembole bağlı sabit ise sabit ve sembol adıyla hata verir.
+        """
+        pending = {name for name in self.expressions
+                   if not symbol_table.get(name, {}).get('defined', False)}
+        changed = self._evaluate(pending, symbol_table)
+        for name in self.order(pending):
+            entry = symbol_table.get(name)
+            if not isinstance(entry, dict) or entry.get('defined'):
+                continue
+            missing = next((sym for sym in self.expressions[name].symbols if sym not in symbol_table), None)
+            if missing is not None:
+                message = f"Tanımsız sembol: '{missing}' ('{name}' sabitinde)"
+                if self.lines.get(name) is not None:
+                    message = f"Line {self.lines[name]}: {message}"
+                raise ValueError(message)
+        return changed
+
+    def update(self, symbol_table, changed, redefined=()):
+        """changed sembollerine bağlı sabitleri ve yeniden tanımlanan sabitleri artımlı olarak hesaplar"""
+        affected = set(redefined)
+        queue = list(changed) + list(redefined)
+        while queue:
+            for name in self.dependents.get(queue.pop(), ()):
+                if name not in affected:
+                    affected.add(name)
+                    queue.append(name)
+        return self._evaluate(affected, symbol_table)
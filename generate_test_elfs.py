@@ -1,6 +1,6 @@
 import os
 import sys
-os.chdir(r"C:\Users\sedan\OneDrive\Masaüstü\Sistem")
+os.chdir(os.path.dirname(os.path.abspath(__file__)))  # Betiğin bulunduğu dizinde çalış
 print(f"Çalışma dizini: {os.getcwd()}")
 from test4 import assemble, create_object_file, pass1, pass2, opcode_table  # Gerekli fonksiyonları import et
 
@@ -3,99 +3,78 @@
 
 import os
 import re
+from array import array
 
-def read_elf(filename):
-    print(f"\n=== {filename} dosyası okunuyor ===")
-    
-    with open(filename, 'r') as f:
-        lines = f.readlines()
+from build_cache import DEFAULT_CACHE_DIR, DEFAULT_MAX_BYTES, BuildCache, digest, file_digest, toolchain_version
+from elf32 import ET_EXEC, CodeImage, SectionWords, is_elf32, read_elf32, write_elf
+
+# Bölüm başlıkları ve tablo satırları için önceden derlenmiş desenler
+_SECTION_RE = re.compile(r'\.(text|data|symtab|rel\S*) Section')
+_WORD_ROW_RE = re.compile(r'\s*([0-9A-Fa-f]+)\s*\|\s*(-?[0-9A-Fa-f]+)')
+_SECTION_MODES = {'text': 'text', 'data': 'data', 'symtab': 'symtab'}
+
+def read_elf(filename, verbose=False):
+    """Nesne dosyasını okur: ikili ELF32 veya eski metin listesi biçimi"""
+    if verbose:
+        print(f"\n=== {filename} dosyası okunuyor ===")
+    if is_elf32(filename):
+        return read_elf32(filename)
+    return _read_listing(filename, verbose)
+
+def _read_listing(filename, verbose=False):
+    """Metin tabanlı nesne listesini satır satır, tek geçişte ayrıştırır"""
 
-    text_section = []
-    data_section = []
+    text_section = SectionWords()
+    data_section = SectionWords()
     symbol_table = {}
     relocation_entries = []
+    sections = {'text': text_section, 'data': data_section}
 
     mode = None
-    for i, line in enumerate(lines):
-        line = line.strip()
-
-        if line.startswith('.text Section'):
-            mode = 'text'
-            print(f"  Text section başladı (satır {i+1})")
-            continue
-        elif line.startswith('.data Section'):
-            mode = 'data'
-            print(f"  Data section başladı (satır {i+1})")
-            continue
-        elif line.startswith('.symtab Section'):
-            mode = 'symtab'
-            print(f"  Symbol table başladı (satır {i+1})")
-            continue
-        elif line.startswith('.rel.text Section') or (line.startswith('.rel') and 'Section' in line):
-            mode = 'relocation'
-            print(f"  Relocation section başladı (satır {i+1})")
-            continue
-
-        if not line or line.startswith(('---', 'Address', 'Value', 'Symbol', 'Offset')):
-            continue
-
-        if mode == 'text':
-            if '|' in line:
-                parts = line.split('|')
-                if len(parts) >= 2:
-                    try:
-                        addr = int(parts[0].strip(), 16)
-                        code = int(parts[1].strip(), 16)
-                        text_section.append((addr, code))
-                    except ValueError:
-                        continue
-
-        elif mode == 'data':
-            if '|' in line:
-                parts = line.split('|')
-                if len(parts) >= 2:
-                    try:
-                        addr = int(parts[0].strip(), 16)
-                        val = int(parts[1].strip(), 16)
-                        data_section.append((addr, val))
-                    except ValueError:
-                        continue
-
-        elif mode == 'symtab':
-            if '|' in line:
-                parts = [x.strip() for x in line.split('|')]
-                if len(parts) >= 6:
+    target = None
+    with open(filename, 'r') as f:
+        for line in f:
+            if line[:1] == '.':
+                match = _SECTION_RE.match(line)
+                if match:
+                    mode = _SECTION_MODES.get(match.group(1), 'relocation')
+                    target = sections.get(mode)
+                    if verbose:
+                        print(f"  {mode} bölümü başladı")
+                continue
+
+            if target is not None:
+                # text/data satırı: "ADDR | WORD [| tip]"
+                match = _WORD_ROW_RE.match(line)
+                if match:
+                    target.append(int(match.group(1), 16), int(match.group(2), 16))
+                continue
+
+            if mode is None or '|' not in line:
+                continue
+
+            parts = [x.strip() for x in line.split('|')]
+            if mode == 'symtab':
+                if len(parts) >= 6 and parts[0] != 'Symbol':
                     try:
-                        sym = parts[0]
-                        val = parts[1]
-                        typ = parts[2]
-                        sect = parts[3]
-                        defined = parts[4].lower() == 'true'
-                        global_flag = parts[5].lower() == 'true'
-                        symbol_table[sym] = {
-                            'value': int(val, 16),
-                            'type': typ,
-                            'section': sect,
-                            'defined': defined,
-                            'is_global': global_flag
+                        symbol_table[parts[0]] = {
+                            'value': int(parts[1], 16),
+                            'type': parts[2],
+                            'section': parts[3],
+                            'defined': parts[4].lower() == 'true',
+                            'is_global': parts[5].lower() == 'true'
                         }
                     except ValueError:
                         continue
 
-        elif mode == 'relocation':
-            if '|' in line:
-                parts = [x.strip() for x in line.split('|')]
-                if len(parts) >= 4:
+            elif mode == 'relocation':
+                if len(parts) >= 4 and parts[0] != 'Offset':
                     try:
-                        offset = int(parts[0], 16)
-                        symbol = parts[1]
-                        typ = parts[2]
-                        sect = parts[3]
                         relocation_entries.append({
-                            'offset': offset,
-                            'symbol': symbol,
-                            'type': typ,
-                            'section': sect
+                            'offset': int(parts[0], 16),
+                            'symbol': parts[1],
+                            'type': parts[2],
+                            'section': parts[3]
                         })
                     except ValueError:
                         continue
@@ -107,9 +86,105 @@ def read_elf(filename):
         'relocations': relocation_entries
     }
 
-def link(elf_files, output_file='linked_output.elf'):
-    linked_text = []
-    linked_data = []
+# Giriş noktası olarak aranan semboller (öncelik sırasıyla)
+ENTRY_SYMBOLS = ('RESET', 'main', '_start')
+
+def _run_index(image):
+    """Kelime indeksi -> (parça başlangıcı, kelimeler) tablosu; aynı adreste ilk parça geçerli"""
+    index = [None] * 0x8000
+    # Sondan başa doldurulur: önceki parçalar örtüşen aralığı sonrakilerin üzerine yazar
+    for run in reversed(image.runs):
+        first, last = run.base >> 1, min(run.end, 0x10000) >> 1
+        if first < last:
+            index[first:last] = [(run.base, run.words)] * (last - first)
+    return index
+
+def apply_relocations(linked_text, linked_data, relocations, global_symbol_table):
+    """Relocation girişlerini birleşik bölüm tamponlarına yerinde yamalar
+
+    Bölüm başına bir kez kurulan kelime -> parça tablosuyla her relocation O(1) sürede
+    yamalanır. Aynı adresi içeren birden fazla parça varsa ilki yamalanır.
+    """
+    indexes = {'text': _run_index(linked_text), 'data': _run_index(linked_data)}
+    for rel in relocations:
+        symbol = rel['symbol']
+        target_symbol = symbol.lstrip('#@')
+        sym_info = global_symbol_table.get(target_symbol)
+        if sym_info is None or not sym_info['defined']:
+            raise ValueError(f"Tanımsız sembol: {symbol}")
+
+        index = indexes.get(rel['section'])
+        offset = rel['offset']
+        run = index[offset >> 1] if index is not None and 0 <= offset < 0x10000 else None
+        if run is not None:
+            base, words = run
+            words[(offset - base) >> 1] = sym_info['value'] & 0xFFFF
+
+def _extent(section):
+    """Bölümün en düşük ve en yüksek adresi arasındaki bayt sayısı (boşluklar dahil)"""
+    if not len(section):
+        return 0
+    addresses = section.addresses
+    if isinstance(addresses, range):
+        return 2 * len(addresses)
+    return max(addresses) - min(addresses) + 2
+
+def _append_section(linked, section, base):
+    """Bir nesnenin bölümünü taban adres kadar kaydırarak birleşik bölüme ekler"""
+    if isinstance(section.addresses, range):
+        # İkili ELF'ten okunan ardışık bölüm: kelimeler tek seferde kopyalanır
+        if len(section):
+            linked.write(section.addresses[0] + base, section.words)
+        return
+    for addr, word in section:
+        linked.write(addr + base, array('H', (word,)))
+
+def write_listing(filename, linked_text, linked_data, global_symbol_table, all_relocations, elf_files):
+    """Bağlanmış çıktının okunabilir metin listesini yazar (--listing)"""
+    with open(filename, 'w') as f:
+        f.write("MSP430 Linked Executable\n")
+        f.write("========================\n\n")
+
+        f.write(".text Section (Machine Code):\n")
+        f.write("Address | Code\n")
+        f.write("--------+------\n")
+        for addr, code in sorted(linked_text):
+            f.write(f"{addr:04X}    | {code:04X}\n")
+
+        if linked_data:
+            f.write("\n.data Section (Literals):\n")
+            f.write("Address | Value\n")
+            f.write("--------+-------\n")
+            for addr, val in sorted(linked_data):
+                f.write(f"{addr:04X}    | {val:04X}\n")
+
+        f.write("\n.symtab Section (Symbol Table):\n")
+        f.write("Symbol      | Value | Type      | Section | Defined | Global | File\n")
+        f.write("------------+-------+-----------+---------+---------+--------+----------\n")
+        for sym, info in sorted(global_symbol_table.items()):
+            f.write(f"{sym:<11} | {info['value']:04X}  | {info['type']:<9} | {info['section']:<7} | {str(info['defined']):<7} | {str(info.get('is_global', False)):<6} | {info.get('source_file', 'N/A')}\n")
+
+        if all_relocations:
+            f.write("\n.relocations (Processed):\n")
+            f.write("Offset | Symbol      | Type        | Section | Status   | File\n")
+            f.write("-------+-------------+-------------+---------+----------+----------\n")
+            for rel in all_relocations:
+                symbol = rel['symbol']
+                status = "RESOLVED" if symbol in global_symbol_table and global_symbol_table[symbol]['defined'] else "UNRESOLVED"
+                f.write(f"{rel['offset']:04X}   | {symbol:<11} | {rel['type']:<11} | {rel['section']:<7} | {status:<8} | {rel['source_file']}\n")
+
+        f.write(f"\n--- Linking Summary ---\n")
+        f.write(f"Total text instructions: {len(linked_text)}\n")
+        f.write(f"Total data entries: {len(linked_data)}\n")
+        f.write(f"Total symbols: {len(global_symbol_table)}\n")
+        f.write(f"Total relocations: {len(all_relocations)}\n")
+        f.write(f"Files linked: {', '.join(elf_files)}\n")
+
+
+def link(elf_files, output_file='linked_output.elf', listing=None):
+    # Birleşik bölümler ardışık array('H') tamponlarıdır (aynı adreste ilk giriş yamalanır)
+    linked_text = CodeImage()
+    linked_data = CodeImage()
     global_symbol_table = {}
     all_relocations = []
 
@@ -131,7 +206,12 @@ def link(elf_files, output_file='linked_output.elf'):
             updated_info['source_file'] = filename
 
             if sym in global_symbol_table:
-                if info['defined'] and global_symbol_table[sym]['defined']:
+                existing = global_symbol_table[sym]
+                if info['defined'] and existing['defined']:
+                    # Ortak bir .include başlığından gelen aynı değerli sabitler çakışma sayılmaz
+                    if (info.get('section') == 'const' and existing.get('section') == 'const'
+                            and info['value'] == existing['value']):
+                        continue
                     raise ValueError(f"Sembol çakışması: '{sym}'")
                 elif info['defined']:
                     global_symbol_table[sym] = updated_info
@@ -139,10 +219,8 @@ def link(elf_files, output_file='linked_output.elf'):
                 global_symbol_table[sym] = updated_info
 
         # Text ve Data adreslerini güncelle
-        for addr, code in obj['text']:
-            linked_text.append((addr + file_text_start, code))
-        for addr, val in obj['data']:
-            linked_data.append((addr + file_data_start, val))
+        _append_section(linked_text, obj['text'], file_text_start)
+        _append_section(linked_data, obj['data'], file_data_start)
 
         for rel in obj['relocations']:
             updated_rel = rel.copy()
@@ -153,76 +231,63 @@ def link(elf_files, output_file='linked_output.elf'):
             updated_rel['source_file'] = filename
             all_relocations.append(updated_rel)
 
-        current_text_offset += len(obj['text']) * 2
-        current_data_offset += len(obj['data']) * 2
+        current_text_offset += _extent(obj['text'])
+        current_data_offset += _extent(obj['data'])
 
     # Relocation çözümlemesi
-    for rel in all_relocations:
-        offset = rel['offset']
-        symbol = rel['symbol']
-        target_symbol = symbol.lstrip('#@')
-        if target_symbol not in global_symbol_table or not global_symbol_table[target_symbol]['defined']:
-            raise ValueError(f"Tanımsız sembol: {symbol}")
-
-        symbol_address = global_symbol_table[target_symbol]['value']
-        if rel['section'] == 'text':
-            for i, (addr, code) in enumerate(linked_text):
-                if addr == offset:
-                    linked_text[i] = (addr, symbol_address)
-                    break
-        elif rel['section'] == 'data':
-            for i, (addr, val) in enumerate(linked_data):
-                if addr == offset:
-                    linked_data[i] = (addr, symbol_address)
-                    break
+    apply_relocations(linked_text, linked_data, all_relocations, global_symbol_table)
 
     # Çıktı dosyası oluştur
-    with open(output_file, 'w') as f:
-        f.write("MSP430 Linked Executable\n")
-        f.write("========================\n\n")
-
-        f.write(".text Section (Machine Code):\n")
-        f.write("Address | Code\n")
-        f.write("--------+------\n")
-        for addr, code in sorted(linked_text):
-            f.write(f"{addr:04X}    | {code:04X}\n")
-
-        if linked_data:
-            f.write("\n.data Section (Literals):\n")
-            f.write("Address | Value\n")
-            f.write("--------+-------\n")
-            for addr, val in sorted(linked_data):
-                f.write(f"{addr:04X}    | {val:04X}\n")
-
-        f.write("\n.symtab Section (Symbol Table):\n")
-        f.write("Symbol      | Value | Type      | Section | Defined | Global | File\n")
-        f.write("------------+-------+-----------+---------+---------+--------+----------\n")
-        for sym, info in sorted(global_symbol_table.items()):
-            f.write(f"{sym:<11} | {info['value']:04X}  | {info['type']:<9} | {info['section']:<7} | {str(info['defined']):<7} | {str(info.get('is_global', False)):<6} | {info.get('source_file', 'N/A')}\n")
-
-        if all_relocations:
-            f.write("\n.relocations (Processed):\n")
-            f.write("Offset | Symbol      | Type        | Section | Status   | File\n")
-            f.write("-------+-------------+-------------+---------+----------+----------\n")
-            for rel in all_relocations:
-                symbol = rel['symbol']
-                status = "RESOLVED" if symbol in global_symbol_table and global_symbol_table[symbol]['defined'] else "UNRESOLVED"
-                f.write(f"{rel['offset']:04X}   | {symbol:<11} | {rel['type']:<11} | {rel['section']:<7} | {status:<8} | {rel['source_file']}\n")
-
-        f.write(f"\n--- Linking Summary ---\n")
-        f.write(f"Total text instructions: {len(linked_text)}\n")
-        f.write(f"Total data entries: {len(linked_data)}\n")
-        f.write(f"Total symbols: {len(global_symbol_table)}\n")
-        f.write(f"Total relocations: {len(all_relocations)}\n")
-        f.write(f"Files linked: {', '.join(elf_files)}\n")
+    entry = next((global_symbol_table[sym]['value'] for sym in ENTRY_SYMBOLS
+                  if global_symbol_table.get(sym, {}).get('defined')), 0)
+    write_elf(output_file, linked_text, linked_data, global_symbol_table, elf_type=ET_EXEC, entry=entry)
+    if listing:
+        write_listing(listing, linked_text, linked_data, global_symbol_table, all_relocations, elf_files)
 
     print(f"✓ Linking tamamlandı! Çıktı: {output_file}")
 
+def cached_link(elf_files, output_file='linked_output.elf', listing=None, cache=None):
+    """Girdi dosyaları ve seçenekler değişmediyse bağlı çıktıyı önbellekten alır, değilse link() çağırır"""
+    if cache is None:
+        return link(elf_files, output_file, listing)
+    outputs = {'linked.elf': output_file}
+    if listing:
+        outputs['linked.lst'] = listing
+    # Liste dosyası girdi adlarını da içerdiği için adlar anahtara dahildir
+    key = digest('link', toolchain_version(__name__, 'elf32', 'build_cache'), *sorted(outputs),
+                 *elf_files, *map(file_digest, elf_files))
+    if cache.get(key, outputs):
+        print(f"✓ Linking önbellekten alındı! Çıktı: {output_file}")
+        return
+    link(elf_files, output_file, listing)
+    cache.put(key, outputs)
+
 if __name__ == '__main__':
     import sys
     args = sys.argv[1:]
     output = "linked_output.elf"
+    listing = None
     files = []
+    cache_size = DEFAULT_MAX_BYTES
+    # Kalıcı önbellek yalnızca --cache veya --cache-dir ile açılır (--no-cache eski betikler için kabul edilir)
+    cache_dir = DEFAULT_CACHE_DIR if "--cache" in args else None
+    no_cache = "--no-cache" in args
+    args = [arg for arg in args if arg not in ("--cache", "--no-cache")]
+
+    if "--cache-dir" in args:
+        c_index = args.index("--cache-dir")
+        cache_dir = args[c_index + 1]
+        args = args[:c_index] + args[c_index + 2:]
+
+    if "--cache-size" in args:
+        s_index = args.index("--cache-size")
+        cache_size = int(float(args[s_index + 1]) * 1024 * 1024)
+        args = args[:s_index] + args[s_index + 2:]
+
+    if "--listing" in args:
+        l_index = args.index("--listing")
+        listing = args[l_index + 1]
+        args = args[:l_index] + args[l_index + 2:]
 
     if "-o" in args:
         o_index = args.index("-o")
@@ -232,13 +297,16 @@ if __name__ == '__main__':
         files = args
 
     if not files:
-        print("Kullanım: python linker.py file1.elf [file2.elf ...] [-o output.elf]")
+        print("Kullanım: python linker.py file1.elf [file2.elf ...] [-o output.elf] [--listing output.lst] "
+              "[--cache | --cache-dir dizin] [--cache-size MB]")
         sys.exit(1)
 
+    cache = None if no_cache or cache_dir is None else BuildCache(cache_dir, cache_size)
     try:
-        link(files, output_file=output)
+        cached_link(files, output_file=output, listing=listing, cache=cache)
     except Exception as e:
         print(f"\n❌ Hata: {e}")
         import traceback
         traceback.print_exc()
-        sys.exit(1)
\ No newline at end of file
+    if cache is not None:
+        print(cache.summary())
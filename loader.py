@@ -1,8 +1,12 @@
 #!/usr/bin/env python3
 import os
 import struct
+import sys
+from array import array
 from typing import Tuple, Optional
 
+from linker import read_elf
+
 try:
     import matplotlib.pyplot as plt
     from matplotlib.table import Table
@@ -11,15 +15,11 @@ except ImportError:
     MATPLOTLIB_AVAILABLE = False
     print("Matplotlib bulunamadı, metin tabanlı görselleştirme kullanılacak.")
 
+# Bölge tablosunda birden fazla bölgeyi içeren sayfa işareti
+_SPLIT_PAGE = object()
+
 class MSP430VirtualMemory:
     def __init__(self):
-        self.memory = {
-            'SFR': bytearray(0x200),    # 0x0000-0x01FF
-            'PERIPH': bytearray(0x1A00), # 0x0200-0x1BFF
-            'RAM': bytearray(0x800),    # 0x1C00-0x23FF
-            'FLASH': bytearray(0xBBC0), # 0x4400-0xFFBF
-            'VECTORS': bytearray(0x40)  # 0xFFC0-0xFFFF
-        }
         self.region_ranges = {
             'SFR': (0x0000, 0x01FF),
             'PERIPH': (0x0200, 0x1BFF),
@@ -27,37 +27,124 @@ class MSP430VirtualMemory:
             'FLASH': (0x4400, 0xFFBF),
             'VECTORS': (0xFFC0, 0xFFFF)
         }
+        # Tüm adres uzayı tek bir 64 KiB tampon; bölgeler bu tamponun kopyasız görünümleri
+        self.buffer = bytearray(0x10000)
+        self.bytes = memoryview(self.buffer)
+        self.words = self.bytes.cast('H')  # little-endian host varsayılır
+        self.memory = {region: self.bytes[start:end + 1] for region, (start, end) in self.region_ranges.items()}
+        # Yazma bildirimleri: hook(adres, uzunluk) (ör. simülatör komut önbelleği)
+        self.write_hooks = []
 
-    def get_memory_region(self, address: int) -> Tuple[str, int]:
+        # 256 girişli sayfa (adres >> 8) -> bölge tablosu
+        self.page_regions = [None] * 256
         for region, (start, end) in self.region_ranges.items():
-            if start <= address <= end:
-                return region, address - start
-        raise ValueError(f"Geçersiz adres: 0x{address:04X}")
+            for page in range(start >> 8, (end >> 8) + 1):
+                if self.page_regions[page] is None and start <= page << 8 and (page << 8) | 0xFF <= end:
+                    self.page_regions[page] = region
+                else:
+                    self.page_regions[page] = _SPLIT_PAGE
+
+    def get_memory_region(self, address: int) -> Tuple[str, int]:
+        region = self.page_regions[(address >> 8) & 0xFF] if 0 <= address <= 0xFFFF else None
+        if region is _SPLIT_PAGE:
+            # Sayfa sınırına denk gelmeyen bölge sınırı (ör. FLASH/VECTORS 0xFFC0)
+            for name, (start, end) in self.region_ranges.items():
+                if start <= address <= end:
+                    return name, address - start
+            region = None
+        if region is None:
+            raise ValueError(f"Geçersiz adres: 0x{address:04X}")
+        return region, address - self.region_ranges[region][0]
 
     def write_memory(self, address: int, data: bytes) -> bool:
         try:
-            region, offset = self.get_memory_region(address)
-            end_offset = offset + len(data)
-            if end_offset > len(self.memory[region]):
+            region, _ = self.get_memory_region(address)
+            end_address = address + len(data)
+            if end_address - 1 > self.region_ranges[region][1]:
                 print(f"HATA: {region} bölgesinde taşma, adres: 0x{address:04X}")
                 return False
-            self.memory[region][offset:end_offset] = data
+            self.bytes[address:end_address] = data
+            for hook in self.write_hooks:
+                hook(address, len(data))
             return True
         except ValueError as e:
             print(f"HATA: Bellek yazma: {e}")
             return False
 
-    def read_memory(self, address: int, size: int) -> Optional[bytes]:
+    def read_memory(self, address: int, size: int) -> Optional[memoryview]:
+        """Bölge sınırında kırpılmış, kopyasız bir görünüm döndürür"""
         try:
-            region, offset = self.get_memory_region(address)
-            return bytes(self.memory[region][offset:offset + size])
+            region, _ = self.get_memory_region(address)
+            end_address = min(address + size, self.region_ranges[region][1] + 1)
+            return self.bytes[address:end_address]
         except ValueError as e:
             print(f"HATA: Bellek okuma: {e}")
             return None
 
+    def read_word(self, address: int) -> int:
+        """Çift adresteki 16-bit kelimeyi okur (bölge kontrolü yapmaz)"""
+        return self.words[(address & 0xFFFF) >> 1]
+
+    def write_word(self, address: int, value: int):
+        """Çift adrese 16-bit kelime yazar (bölge kontrolü yapmaz)"""
+        self.words[(address & 0xFFFF) >> 1] = value & 0xFFFF
+        for hook in self.write_hooks:
+            hook(address & 0xFFFE, 2)
+
 class MSP430ELFLoader:
-    def __init__(self, memory: MSP430VirtualMemory):
+    def __init__(self, memory: MSP430VirtualMemory, verbose: int = 0):
+        # verbose: 0 = yalnızca özet, 1 = blok (koşu) başına, 2 = kelime başına çıktı
         self.memory = memory
+        self.verbose = verbose
+        self.entry = 0
+
+    @staticmethod
+    def _runs(section):
+        """Bölümü ardışık adreslerden oluşan (başlangıç adresi, kelimeler) koşularına ayırır"""
+        addresses, words = section.addresses, section.words
+        if isinstance(addresses, range):
+            # İkili ELF bölümleri zaten tek bir ardışık koşudur
+            if len(addresses):
+                yield addresses.start, words
+            return
+        start = 0
+        count = len(addresses)
+        for i in range(1, count + 1):
+            if i == count or addresses[i] != addresses[i - 1] + 2:
+                yield addresses[start], words[start:i]
+                start = i
+
+    @staticmethod
+    def _to_bytes(words):
+        """Kelime dizisini tek seferde little-endian bayt dizisine paketler"""
+        if isinstance(words, memoryview) and sys.byteorder == 'little':
+            return words.cast('B')
+        packed = array('H', words)
+        if sys.byteorder != 'little':
+            packed.byteswap()
+        return memoryview(packed).cast('B')
+
+    def _load_run(self, mode: str, target_addr: int, words) -> int:
+        """Bir koşuyu tek dilim atamasıyla belleğe yazar; yüklenen kelime sayısını döndürür"""
+        if self.memory.write_memory(target_addr, self._to_bytes(words)):
+            if self.verbose >= 2:
+                for i, value in enumerate(words):
+                    print(f"{mode.upper()} girişi: 0x{target_addr + 2 * i:04X} -> 0x{value:04X}")
+            elif self.verbose:
+                print(f"{mode.upper()} bloğu: 0x{target_addr:04X} ({len(words)} kelime)")
+            return len(words)
+
+        # Koşu bölge sınırını aşıyorsa kelime kelime yüklenir
+        loaded = 0
+        for i, value in enumerate(words):
+            addr = target_addr + 2 * i
+            if self.memory.write_memory(addr, struct.pack('<H', value)):
+                if self.verbose >= 2:
+                    print(f"{mode.upper()} girişi: 0x{addr:04X} -> 0x{value:04X}")
+                loaded += 1
+            else:
+                print(f"HATA: Adres 0x{addr:04X} yüklenemedi")
+        return loaded
 
     def load_linked_elf(self, filename: str, text_base: int = 0x4400, data_base: int = 0x1C00) -> bool:
         if not os.path.exists(filename):
@@ -65,56 +152,22 @@ class MSP430ELFLoader:
             return False
 
         print(f"ELF dosyası yükleniyor: {filename}")
-        mode = None
-        text_count = 0
-        data_count = 0
-        data_section_found = False
-
-        with open(filename, "r", encoding="utf-8") as f:
-            for line in f:
-                line = line.strip()
-                if line.startswith(".text Section"):
-                    mode = 'text'
-                    print(".text bölümü okunuyor")
-                    continue
-                elif line.startswith(".data Section"):
-                    mode = 'data'
-                    data_section_found = True
-                    print(".data bölümü okunuyor")
-                    continue
-                elif line.startswith((".symtab", ".relocations")):
-                    mode = None
-                    continue
-                if not line or line.startswith(("---", "Address", "Value", "Symbol", "Offset")):
-                    continue
-
-                if mode in ['text', 'data']:
-                    if "|" in line:
-                        parts = line.split("|")
-                        if len(parts) >= 2:
-                            try:
-                                addr = int(parts[0].strip(), 16)
-                                value = int(parts[1].strip(), 16)
-                                target_addr = addr + (text_base if mode == 'text' else data_base)
-                                data = struct.pack('<H', value)
-                                if self.memory.write_memory(target_addr, data):
-                                    print(f"{mode.upper()} girişi: 0x{target_addr:04X} -> 0x{value:04X}")
-                                    if mode == 'text':
-                                        text_count += 1
-                                    else:
-                                        data_count += 1
-                                else:
-                                    print(f"HATA: Adres 0x{target_addr:04X} yüklenemedi")
-                            except ValueError:
-                                print(f"UYARI: Satır işlenemedi: '{line}'")
-                        else:
-                            print(f"UYARI: Geçersiz satır formatı: '{line}'")
-
-        if data_section_found and data_count == 0:
-            print("UYARI: .data bölümü bulundu ama veri girişi yok!")
-
-        print(f"Yükleme tamam: {text_count} .text, {data_count} .data girişi")
-        return text_count > 0 or data_count > 0
+        try:
+            obj = read_elf(filename)
+        except (ValueError, struct.error) as e:
+            print(f"HATA: ELF dosyası okunamadı: {e}")
+            return False
+
+        self.entry = obj.get('entry', 0)
+        counts = {'text': 0, 'data': 0}
+        for mode, base in (('text', text_base), ('data', data_base)):
+            if self.verbose:
+                print(f".{mode} bölümü okunuyor")
+            for start, words in self._runs(obj[mode]):
+                counts[mode] += self._load_run(mode, start + base, words)
+
+        print(f"Yükleme tamam: {counts['text']} .text, {counts['data']} .data girişi")
+        return counts['text'] > 0 or counts['data'] > 0
 
 class MSP430SimpleVisualizer:
     def __init__(self, memory: MSP430VirtualMemory):
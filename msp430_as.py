@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+# msp430_as.py
+# GUI'siz çoklu dosya assembler (msp430-as): her .asm kaynağı kendi .elf nesne dosyasına derlenir
+#
+# Kullanım: python msp430_as.py kaynak.asm [kaynak2.asm ...] [-o çıktı_dizini] [-j iş_sayısı] [-I dizin ...] [--listing] [-v] [-O]
+#                               [--cache | --cache-dir dizin] [--cache-size MB]
+# Çıkış durumu: 0 = tüm dosyalar derlendi, 1 = en az bir dosya derlenemedi, 2 = hatalı kullanım
+
+import contextlib
+import io
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from build_cache import DEFAULT_CACHE_DIR, DEFAULT_MAX_BYTES, BuildCache, digest, file_digest, toolchain_version
+from test4 import Assembler
+
+# Nesne dosyasının içeriğini belirleyen modüller (önbellek sürümü)
+ASSEMBLER_MODULES = ('test4', 'asm_ir', 'encoder', 'expressions', 'elf32', 'peephole')
+
+def object_path(source, output_dir=None):
+    """Kaynak dosya için nesne dosyası yolunu döndürür (main.asm -> main.elf)"""
+    base = os.path.splitext(os.path.basename(source))[0] + ".elf"
+    return os.path.join(output_dir if output_dir is not None else os.path.dirname(source), base)
+
+def _object_key(cache, manifest_key):
+    """Manifestodaki include dosyalarının güncel özetleriyle nesne anahtarını üretir
+
+    Arama yolunda bulunan dosyadan önce gelen ve derlemede yok olan bir yol artık varsa
+    .include başka bir dosyaya çözülür; bu durumda önbellek kullanılmaz.
+    """
+    manifest = cache.load_json(manifest_key)
+    if not isinstance(manifest, dict):
+        return None
+    if any(os.path.exists(path) for path in manifest['shadows']):
+        return None
+    try:
+        return digest(manifest_key, *(file_digest(path) for path, _ in manifest['includes']))
+    except OSError:
+        return None
+
+def assemble_file(source, output, listing=False, verbose=False, include_paths=(), cache_dir=None, optimize=False):
+    """Tek bir kaynağı derler; (kaynak, çıktı, süre, hata mesajı veya None, önbellekten mi) döndürür
+
+    cache_dir verilirse çıktı önce kalıcı önbellekte aranır; isabette pass1/pass2 hiç çalışmaz.
+    Anahtar kaynak içeriği, include dosyalarının içerikleri, assembler sürümü ve seçeneklerdir.
+    optimize (-O) peephole iyileştirmesini açar; raporu -v ile görülür.
+    """
+    start = time.perf_counter()
+    log = io.StringIO()
+    cached = False
+    try:
+        with open(source, 'rb') as f:
+            data = f.read()
+        listing_file = os.path.splitext(output)[0] + ".lst" if listing else None
+        # .include önce kaynağın kendi dizininde, sonra -I dizinlerinde aranır
+        include_paths = [os.path.dirname(source) or '.'] + list(include_paths)
+        outputs = {'object.elf': output}
+        if listing_file:
+            outputs['listing.lst'] = listing_file
+
+        if cache_dir:
+            cache = BuildCache(cache_dir)
+            # Include kümesi derlemeden önce bilinmediği için önce kaynağın manifestosuna bakılır
+            manifest_key = digest('asm', toolchain_version(*ASSEMBLER_MODULES), *sorted(outputs),
+                                  '-O' if optimize else '', *map(os.path.abspath, include_paths), data)
+            object_key = _object_key(cache, manifest_key)
+            cached = object_key is not None and cache.get(object_key, outputs)
+
+        if not cached:
+            assembler = Assembler(output=output, listing=listing_file, include_paths=include_paths, optimize=optimize)
+            # Assembler'ın tanılama çıktısı yalnızca -v ile gösterilir
+            with contextlib.redirect_stdout(sys.stdout if verbose else log):
+                assembler.assemble(data.decode('utf-8'))
+            if cache_dir:
+                includes = sorted(assembler.included.items())
+                cache.store_json(manifest_key, {'includes': includes, 'shadows': sorted(assembler.include_shadows)})
+                cache.put(digest(manifest_key, *(included for _, included in includes)), outputs)
+        error = None
+    except Exception as e:
+        error = str(e) or type(e).__name__
+    return source, output, time.perf_counter() - start, error, cached
+
+def assemble_files(sources, output_dir=None, jobs=None, listing=False, verbose=False, include_paths=(), cache_dir=None, optimize=False):
+    """Kaynakları süreç havuzunda derler; sonuçları giriş sırasıyla döndürür
+
+    Her süreç .include önbelleğini kendi içinde tutar; ortak başlıklar süreç başına bir kez ayrıştırılır.
+    """
+    outputs = [object_path(source, output_dir) for source in sources]
+    args = [(source, output, listing, verbose, tuple(include_paths), cache_dir, optimize)
+            for source, output in zip(sources, outputs)]
+    jobs = min(jobs or os.cpu_count() or 1, len(sources))
+    if jobs <= 1:
+        return [assemble_file(*arg) for arg in args]
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        return list(executor.map(assemble_file, *zip(*args)))
+
+def main(argv=None):
+    args = list(sys.argv[1:] if argv is None else argv)
+    usage = ("Kullanım: python msp430_as.py kaynak.asm [kaynak2.asm ...] [-o çıktı_dizini] [-j iş_sayısı] [-I dizin ...] "
+             "[--listing] [-v] [-O] [--cache | --cache-dir dizin] [--cache-size MB]")
+
+    output_dir = None
+    jobs = None
+    include_paths = []
+    cache_size = DEFAULT_MAX_BYTES
+    listing = "--listing" in args
+    verbose = "-v" in args
+    # Kalıcı önbellek yalnızca --cache veya --cache-dir ile açılır (--no-cache eski betikler için kabul edilir)
+    cache_dir = DEFAULT_CACHE_DIR if "--cache" in args else None
+    no_cache = "--no-cache" in args
+    optimize = "-O" in args
+    args = [arg for arg in args if arg not in ("--listing", "-v", "--cache", "--no-cache", "-O")]
+    try:
+        if "--cache-dir" in args:
+            c_index = args.index("--cache-dir")
+            cache_dir = args[c_index + 1]
+            args = args[:c_index] + args[c_index + 2:]
+        if "--cache-size" in args:
+            s_index = args.index("--cache-size")
+            cache_size = int(float(args[s_index + 1]) * 1024 * 1024)
+            args = args[:s_index] + args[s_index + 2:]
+        if "-o" in args:
+            o_index = args.index("-o")
+            output_dir = args[o_index + 1]
+            args = args[:o_index] + args[o_index + 2:]
+        if "-j" in args:
+            j_index = args.index("-j")
+            jobs = int(args[j_index + 1])
+            args = args[:j_index] + args[j_index + 2:]
+            if jobs < 1:
+                raise ValueError
+        while "-I" in args:
+            i_index = args.index("-I")
+            include_paths.append(args[i_index + 1])
+            args = args[:i_index] + args[i_index + 2:]
+    except (IndexError, ValueError):
+        print(usage)
+        return 2
+
+    sources = args
+    if not sources or any(source.startswith("-") for source in sources):
+        print(usage)
+        return 2
+
+    # Aynı ada sahip iki kaynak aynı nesne dosyasının üzerine yazmamalı
+    outputs = [os.path.normpath(object_path(source, output_dir)) for source in sources]
+    duplicates = sorted({output for output in outputs if outputs.count(output) > 1})
+    if duplicates:
+        print(f"HATA: Birden fazla kaynak aynı çıktıyı üretiyor: {', '.join(duplicates)}")
+        return 2
+    if output_dir is not None:
+        os.makedirs(output_dir, exist_ok=True)
+
+    start = time.perf_counter()
+    if no_cache:
+        cache_dir = None
+    results = assemble_files(sources, output_dir, jobs, listing, verbose, include_paths, cache_dir, optimize)
+    elapsed = time.perf_counter() - start
+
+    failed = 0
+    for source, output, seconds, error, cached in results:
+        if error is None:
+            print(f"✓ {source} -> {output} ({seconds * 1000:.1f} ms{', önbellekten' if cached else ''})")
+        else:
+            failed += 1
+            print(f"❌ {source}: {error} ({seconds * 1000:.1f} ms)")
+    print(f"{len(results) - failed}/{len(results)} dosya derlendi, toplam {elapsed * 1000:.1f} ms")
+    if cache_dir:
+        # Süreçlerin isabetleri burada toplanır; boyut sınırı derleme sonunda uygulanır
+        cache = BuildCache(cache_dir, cache_size)
+        cache.hits = sum(1 for result in results if result[4])
+        cache.misses = len(results) - cache.hits
+        print(cache.summary())
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
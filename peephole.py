@@ -0,0 +1,141 @@
+# peephole.py
+# pass1 ile pass2 arasında çalışan gözetleme deliği (peephole) iyileştiricisi
+#
+# Komut listesi kayan bir pencereyle taranır; her kural penceredeki gereksiz komutları siler
+# ya da daha kısa eşdeğerleriyle değiştirir. Her turdan sonra satırlar yeniden yerleştirilir,
+# etiket adresleri sembol tablosunda güncellenir ve etiketlere bağlı .equ sabitleri
+# ConstantGraph ile yeniden hesaplanır. Değişiklik kalmayana kadar tur tekrarlanır
+# (ör. silinen MOV R5, R5 sonrası bir sonraki komuta atlayan JMP de silinir).
+
+from asm_ir import INSTRUCTION, LABEL, SourceLine, relayout
+
+def _label_only(line):
+    """Silinen komutun etiketini yerinde tutan boş satır"""
+    if not line.label:
+        return []
+    label = SourceLine(line.number, LABEL, line.label)
+    label.section = line.section
+    label.address = line.address
+    return [label]
+
+def _label_free(name, symbol_table, constants):
+    """Sabitin değeri (dolaylı olarak) hiçbir etiket adresine bağlı değilse True"""
+    expression = constants.expressions.get(name)
+    if expression is None:
+        return False
+    for sym in expression.symbols:
+        entry = symbol_table.get(sym)
+        if not (isinstance(entry, dict) and entry.get('is_constant')) or not _label_free(sym, symbol_table, constants):
+            return False
+    return True
+
+def _mov_self(lines, i, symbol_table, constants, opcode_table):
+    """MOV Rn, Rn: register ve durum bayrakları değişmez"""
+    line = lines[i]
+    if line.mnemonic == 'MOV' and not line.byte and line.modes == ('register', 'register') \
+            and line.operands[0] == line.operands[1]:
+        return 1, _label_only(line)
+    return None
+
+def _cmp_zero(lines, i, symbol_table, constants, opcode_table):
+    """CMP #SIFIR, hedef -> TST hedef (CMP #0, hedef): sabit üreteci ek kelimeyi kaldırır"""
+    line = lines[i]
+    if line.mnemonic != 'CMP' or line.modes[0] != 'immediate':
+        return None
+    name = line.operands[0][1:].strip()
+    entry = symbol_table.get(name)
+    if not (isinstance(entry, dict) and entry.get('is_constant') and entry.get('defined')) or entry['value'] != 0:
+        return None
+    if not _label_free(name, symbol_table, constants):
+        return None  # Adresler kaydıkça değeri değişebilir
+    tst = line.moved(line.number, line.section, line.address)
+    tst.operands = ('#0', line.operands[1])
+    tst.modes = ('constant', line.modes[1])
+    tst.size = line.size - 2
+    return 1, [tst]
+
+def _push_pop(lines, i, symbol_table, constants, opcode_table):
+    """PUSH Rn ardından POP Rn: yığın ve register eski haline döner"""
+    line = lines[i]
+    if line.mnemonic != 'PUSH' or line.byte or line.modes != ('register',) or line.operands[0] in ('R0', 'R1'):
+        return None
+    if i + 1 >= len(lines):
+        return None
+    pop = lines[i + 1]
+    # POP Rn, MOV @R1+, Rn olarak ayrıştırılır; etiketli POP'a başka yerden atlanabilir
+    if pop.kind == INSTRUCTION and not pop.label and pop.mnemonic == 'MOV' and not pop.byte \
+            and pop.operands == ('@R1+', line.operands[0]):
+        return 2, _label_only(line)
+    return None
+
+def _jump_next(lines, i, symbol_table, constants, opcode_table):
+    """Hemen sonraki komuta atlama: atlama olsa da olmasa da akış aynıdır"""
+    line = lines[i]
+    if line.mnemonic not in opcode_table["jump"] or not line.operands:
+        return None
+    entry = symbol_table.get(line.operands[0])
+    if not isinstance(entry, dict) or not entry.get('defined') or entry.get('is_constant') \
+            or entry.get('type') == 'external':
+        return None
+    if entry.get('section') != line.section or entry['value'] != line.address + line.size:
+        return None
+    return 1, _label_only(line)
+
+# Kural adı -> (kural, uygulama başına kazanılan kelime, tahmini çevrim)
+# Çevrimler MSP430x1xx kılavuzundaki Format I/II/III tablolarından: MOV Rn, Rn 1; CMP #N, Rn 2
+# (sabit üreteciyle 1); PUSH Rn 3 + POP Rn 2; atlama 2.
+RULES = {
+    'mov-self': (_mov_self, 1, 1),
+    'cmp-zero': (_cmp_zero, 1, 1),
+    'push-pop': (_push_pop, 2, 5),
+    'jump-next': (_jump_next, 1, 2),
+}
+
+def optimize(program, symbol_table, opcode_table, constants):
+    """Peephole kurallarını değişiklik kalmayana kadar uygular
+
+    (yeni satır listesi, rapor) döndürür; rapor kural adı -> [uygulama, kelime, çevrim]
+    sözlüğüdür. Sembol tablosu yerinde güncellenir.
+    """
+    report = {name: [0, 0, 0] for name in RULES}
+    rules = [(name, rule) for name, (rule, _, _) in RULES.items()]
+    while True:
+        result = []
+        changed = False
+        i = 0
+        while i < len(program):
+            line = program[i]
+            if line.kind == INSTRUCTION:
+                for name, rule in rules:
+                    match = rule(program, i, symbol_table, constants, opcode_table)
+                    if match is not None:
+                        break
+                else:
+                    match = None
+                if match is not None:
+                    consumed, replacement = match
+                    result += replacement
+                    i += consumed
+                    _, words, cycles = RULES[name]
+                    counts = report[name]
+                    counts[0] += 1
+                    counts[1] += words
+                    counts[2] += cycles
+                    changed = True
+                    continue
+            result.append(line)
+            i += 1
+        program = result
+        if not changed:
+            return program, report
+        relayout(program, symbol_table, constants)
+
+def print_report(report):
+    """Kural başına kazanılan kelime ve tahmini çevrim sayısını yazdırır"""
+    print("Peephole iyileştirme raporu:")
+    words = cycles = 0
+    for name, (count, saved_words, saved_cycles) in report.items():
+        print(f"  {name:<10} {count:5} kez, {saved_words:5} kelime, ~{saved_cycles} çevrim")
+        words += saved_words
+        cycles += saved_cycles
+    print(f"  Toplam: {words} kelime ({2 * words} bayt), ~{cycles} çevrim")
@@ -0,0 +1,890 @@
+#!/usr/bin/env python3
+# simulator.py
+# MSP430VirtualMemory üzerinde çalışan MSP430 komut kümesi simülatörü (ISS)
+
+import math
+import sys
+import time
+
+from loader import MSP430ELFLoader, MSP430VirtualMemory
+
+# Özel yazmaçlar
+PC = 0
+SP = 1
+SR = 2
+CG2 = 3
+
+# Durum yazmacı (SR) bitleri
+C_FLAG = 0x0001
+Z_FLAG = 0x0002
+N_FLAG = 0x0004
+GIE = 0x0008
+CPUOFF = 0x0010
+V_FLAG = 0x0100
+ALU_FLAGS = C_FLAG | Z_FLAG | N_FLAG | V_FLAG
+
+# Ön çözümlenmiş operand türleri: (tür, yazmaç, değer)
+OP_REG = 0       # Rn
+OP_CONST = 1     # #N veya sabit üreteci (R2/R3)
+OP_INDEXED = 2   # X(Rn)
+OP_ABS = 3       # &ADDR; sembolik ADDR de çözümlemede mutlak adrese çevrilir
+OP_INDIRECT = 4  # @Rn
+OP_AUTOINC = 5   # @Rn+
+
+# Komut grupları
+FMT_DOUBLE = 0
+FMT_SINGLE = 1
+FMT_JUMP = 2
+
+# Tek operandlı komutlar (bit 9-7)
+RRC, SWPB, RRA, SXT, PUSH, CALL, RETI = range(7)
+
+# Çift operandlı komutlar (bit 15-12)
+MOV, ADD, ADDC, SUBC, SUB, CMP, DADD, BIT, BIC, BIS, XOR, AND = range(0x4, 0x10)
+
+# Sonucu hedefe yazılmayan komutlar
+_NO_WRITEBACK = (CMP, BIT)
+
+# R3 (CG2) ile As'e göre üretilen sabitler; R2 (CG1) As=2/3 için 4 ve 8
+_CG2_CONSTANTS = (0, 1, 2, 0xFFFF)
+_CG1_CONSTANTS = {2: 4, 3: 8}
+
+# Tüm ALU bayraklarını yeniden hesaplayan komutlar
+_FLAG_WRITERS = (ADD, ADDC, SUBC, SUB, CMP, BIT, XOR, AND)
+
+# Atlama koşulları (bit 12-10) için üretilen Python ifadeleri; regs[2] = SR
+_JUMP_CONDITIONS = (
+    "not regs[2] & 2",                        # JNE/JNZ
+    "regs[2] & 2",                            # JEQ/JZ
+    "not regs[2] & 1",                        # JNC
+    "regs[2] & 1",                            # JC
+    "regs[2] & 4",                            # JN
+    "not ((regs[2] >> 2) ^ (regs[2] >> 8)) & 1",  # JGE
+    "((regs[2] >> 2) ^ (regs[2] >> 8)) & 1",  # JL
+)
+
+# Bir temel bloğa çevrilecek en fazla komut sayısı
+MAX_BLOCK_INSTRUCTIONS = 32
+
+# Tek operandlı komut çevrim sayıları (As'e göre)
+_SINGLE_CYCLES = {
+    RRC: (1, 4, 3, 3), SWPB: (1, 4, 3, 3), RRA: (1, 4, 3, 3), SXT: (1, 4, 3, 3),
+    PUSH: (3, 5, 4, 4), CALL: (4, 5, 4, 5), RETI: (5, 5, 5, 5),
+}
+
+class Instruction:
+    """Ön çözümlenmiş tek bir komut (PC anahtarlı önbellekte saklanır)"""
+    __slots__ = ('pc', 'size', 'fmt', 'op', 'byte', 'src', 'dst', 'target', 'cycles')
+
+    def __init__(self, pc, size, fmt, op, byte=0, src=None, dst=None, target=0, cycles=1):
+        self.pc = pc
+        self.size = size
+        self.fmt = fmt
+        self.op = op
+        self.byte = byte
+        self.src = src
+        self.dst = dst
+        self.target = target
+        self.cycles = cycles
+
+class MSP430CPU:
+    def __init__(self, memory: MSP430VirtualMemory, translate: bool = True, fast_forward: bool = True):
+        # translate=False: her komut tek tek yorumlanır (doğrulama için)
+        # fast_forward=False: boşta bekleme döngüleri atlanmadan tur tur yürütülür
+        self.memory = memory
+        self.translate = translate
+        self.fast_forward = fast_forward
+        self.words = memory.words
+        self.bytes = memory.bytes
+        self.regs = [0] * 16
+        self.cycles = 0
+        self.instructions = 0
+        self.halted = False
+
+        # PC -> Instruction önbelleği ve önbellekteki komutların kapsadığı kelimeler
+        self.decode_cache = {}
+        self.code_map = bytearray(0x8000)
+
+        # Başlangıç PC -> derlenmiş blok fonksiyonu, kelime -> o kelimeyi kapsayan bloklar
+        self.blocks = {}
+        self.block_words = {}
+        self.block_hits = 0
+        self.block_misses = 0
+        self.code_dirty = False
+        # Boşta bekleme döngülerinde kapalı formda atlanan çevrimler
+        self.skipped_cycles = 0
+        memory.write_hooks.append(self.invalidate)
+
+        self._handlers = (self._exec_double, self._exec_single, self._exec_jump)
+
+    # ------------------------------------------------------------------
+    # Sıfırlama ve önbellek yönetimi
+    # ------------------------------------------------------------------
+
+    def reset(self, pc=None):
+        """Yazmaçları sıfırlar; PC verilmezse reset vektöründen (0xFFFE) okunur"""
+        self.regs = [0] * 16
+        self.regs[PC] = self.words[0xFFFE >> 1] if pc is None else pc & 0xFFFF
+        self.cycles = 0
+        self.instructions = 0
+        self.halted = False
+
+    def invalidate(self, address, length=2):
+        """Yazılan adres aralığını kapsayan önbellekteki komutları geçersiz kılar"""
+        code_map = self.code_map
+        address &= 0xFFFF
+        for w in range(address >> 1, min((address + length + 1) >> 1, 0x8000)):
+            if code_map[w]:
+                code_map[w] = 0
+                for start in self.block_words.pop(w, ()):
+                    if self.blocks.pop(start, None) is not None:
+                        self.code_dirty = True
+                # Bir komut en fazla 3 kelimedir: w'yi kapsayan komut w-2..w arasında başlar
+                for pc in (w * 2, w * 2 - 2, w * 2 - 4):
+                    ins = self.decode_cache.get(pc)
+                    if ins is not None and pc + ins.size > w * 2:
+                        del self.decode_cache[pc]
+
+    def fetch(self, pc):
+        """PC'deki komutu önbellekten getirir, yoksa çözümleyip önbelleğe ekler"""
+        ins = self.decode_cache.get(pc)
+        if ins is None:
+            ins = self.decode(pc)
+            self.decode_cache[pc] = ins
+            for w in range(pc >> 1, (pc + ins.size) >> 1):
+                self.code_map[w & 0x7FFF] = 1
+        return ins
+
+    # ------------------------------------------------------------------
+    # Çözümleme
+    # ------------------------------------------------------------------
+
+    def _decode_src(self, As, reg, ext_pc, byte):
+        """Kaynak operandı çözer; (operand, sonraki uzantı adresi, ek çevrim) döndürür"""
+        words = self.words
+        if reg == CG2:
+            value = _CG2_CONSTANTS[As]
+            return (OP_CONST, reg, value & 0xFF if byte else value), ext_pc, 0
+        if reg == SR and As >= 2:
+            return (OP_CONST, reg, _CG1_CONSTANTS[As]), ext_pc, 0
+        if As == 0:
+            return (OP_REG, reg, 0), ext_pc, 0
+        if As == 1:
+            ext = words[ext_pc >> 1]
+            if reg == SR:
+                return (OP_ABS, reg, ext), ext_pc + 2, 2
+            if reg == PC:
+                return (OP_ABS, reg, (ext_pc + ext) & 0xFFFF), ext_pc + 2, 2
+            return (OP_INDEXED, reg, ext), ext_pc + 2, 2
+        if As == 2:
+            return (OP_INDIRECT, reg, 0), ext_pc, 1
+        if reg == PC:
+            ext = words[ext_pc >> 1]
+            return (OP_CONST, reg, ext & 0xFF if byte else ext), ext_pc + 2, 1
+        return (OP_AUTOINC, reg, 0), ext_pc, 1
+
+    def _decode_dst(self, Ad, reg, ext_pc):
+        """Hedef operandı çözer; (operand, sonraki uzantı adresi, ek çevrim) döndürür"""
+        if Ad == 0:
+            return (OP_REG, reg, 0), ext_pc, 1 if reg == PC else 0
+        ext = self.words[ext_pc >> 1]
+        if reg == SR:
+            return (OP_ABS, reg, ext), ext_pc + 2, 3
+        if reg == PC:
+            return (OP_ABS, reg, (ext_pc + ext) & 0xFFFF), ext_pc + 2, 3
+        return (OP_INDEXED, reg, ext), ext_pc + 2, 3
+
+    def decode(self, pc):
+        """PC'deki komut kelimesini Instruction kaydına çözer"""
+        word = self.words[pc >> 1]
+
+        if word & 0xE000 == 0x2000:
+            # Atlama: 001 koşul(3) ofset(10)
+            offset = word & 0x03FF
+            if offset & 0x0200:
+                offset -= 0x0400
+            target = (pc + 2 + offset * 2) & 0xFFFF
+            return Instruction(pc, 2, FMT_JUMP, (word >> 10) & 0x7, target=target, cycles=2)
+
+        if word & 0xFC00 == 0x1000:
+            # Tek operandlı: 000100 op(3) B/W As(2) reg(4)
+            op = (word >> 7) & 0x7
+            if op > RETI:
+                raise ValueError(f"Geçersiz komut: 0x{word:04X} (adres 0x{pc:04X})")
+            byte = (word >> 6) & 1
+            As = (word >> 4) & 0x3
+            if op == RETI:
+                return Instruction(pc, 2, FMT_SINGLE, op, cycles=5)
+            src, ext_pc, _ = self._decode_src(As, word & 0xF, pc + 2, byte)
+            cycles = _SINGLE_CYCLES[op][As if src[0] != OP_CONST or src[1] == PC else 0]
+            return Instruction(pc, ext_pc - pc, FMT_SINGLE, op, byte, src, cycles=cycles)
+
+        if word >= 0x4000:
+            # Çift operandlı: op(4) src(4) Ad B/W As(2) dst(4)
+            byte = (word >> 6) & 1
+            src, ext_pc, src_cycles = self._decode_src((word >> 4) & 0x3, (word >> 8) & 0xF, pc + 2, byte)
+            dst, ext_pc, dst_cycles = self._decode_dst((word >> 7) & 1, word & 0xF, ext_pc)
+            return Instruction(pc, ext_pc - pc, FMT_DOUBLE, word >> 12, byte, src, dst,
+                               cycles=1 + src_cycles + dst_cycles)
+
+        raise ValueError(f"Geçersiz komut: 0x{word:04X} (adres 0x{pc:04X})")
+
+    # ------------------------------------------------------------------
+    # Bellek ve operand erişimi
+    # ------------------------------------------------------------------
+
+    def read_word(self, address):
+        return self.words[(address & 0xFFFF) >> 1]
+
+    def write_word(self, address, value):
+        w = (address & 0xFFFF) >> 1
+        self.words[w] = value & 0xFFFF
+        if self.code_map[w]:
+            self.invalidate(w * 2)
+
+    def read_byte(self, address):
+        return self.bytes[address & 0xFFFF]
+
+    def write_byte(self, address, value):
+        address &= 0xFFFF
+        self.bytes[address] = value & 0xFF
+        if self.code_map[address >> 1]:
+            self.invalidate(address & 0xFFFE)
+
+    def _address(self, operand, byte):
+        """Bellek operandının etkin adresini hesaplar (@Rn+ yazmacı burada artırılır)"""
+        kind, reg, value = operand
+        regs = self.regs
+        if kind == OP_ABS:
+            return value
+        if kind == OP_INDEXED:
+            return (regs[reg] + value) & 0xFFFF
+        address = regs[reg]
+        if kind == OP_AUTOINC:
+            regs[reg] = (address + (1 if byte and reg not in (PC, SP) else 2)) & 0xFFFF
+        return address
+
+    def _load(self, address, byte):
+        return self.bytes[address] if byte else self.words[address >> 1]
+
+    def _store(self, address, value, byte):
+        if byte:
+            self.write_byte(address, value)
+        else:
+            self.write_word(address, value)
+
+    def _read_operand(self, operand, byte):
+        """Operand değerini okur; bellek operandı ise (değer, adres) döner"""
+        kind, reg, value = operand
+        if kind == OP_REG:
+            value = self.regs[reg]
+            return (value & 0xFF if byte else value), None
+        if kind == OP_CONST:
+            return value, None
+        address = self._address(operand, byte)
+        return self._load(address, byte), address
+
+    def _write_register(self, reg, value, byte):
+        if reg == CG2:
+            return
+        if reg == PC:
+            value &= 0xFFFE
+        # Bayt işlemi yazmaca yazarken üst baytı temizler
+        self.regs[reg] = value & 0xFF if byte else value & 0xFFFF
+
+    # ------------------------------------------------------------------
+    # Yürütme
+    # ------------------------------------------------------------------
+
+    def _alu(self, op, src, dst, byte):
+        """Çift operandlı ALU işlemini yapar ve bayrakları günceller"""
+        mask, sign = (0xFF, 0x80) if byte else (0xFFFF, 0x8000)
+        regs = self.regs
+        sr = regs[SR]
+
+        if op == MOV:
+            return src
+        if op == BIC:
+            return dst & ~src & mask
+        if op == BIS:
+            return dst | src
+
+        if op in (ADD, ADDC, SUBC, SUB, CMP):
+            if op >= SUBC:
+                src = ~src & mask
+            carry_in = 1 if op in (SUB, CMP) else (sr & C_FLAG if op in (ADDC, SUBC) else 0)
+            full = dst + src + carry_in
+            result = full & mask
+            flags = C_FLAG if full > mask else 0
+            if ~(dst ^ src) & (dst ^ result) & sign:
+                flags |= V_FLAG
+        elif op == DADD:
+            carry = sr & C_FLAG
+            result = 0
+            for shift in range(0, 16 if not byte else 8, 4):
+                digit = ((dst >> shift) & 0xF) + ((src >> shift) & 0xF) + carry
+                carry = 1 if digit > 9 else 0
+                if carry:
+                    digit -= 10
+                result |= (digit & 0xF) << shift
+            flags = C_FLAG if carry else 0
+        elif op == XOR:
+            result = dst ^ src
+            flags = C_FLAG if result else 0
+            if src & dst & sign:
+                flags |= V_FLAG
+        else:
+            # BIT / AND
+            result = dst & src
+            flags = C_FLAG if result else 0
+
+        if result & sign:
+            flags |= N_FLAG
+        if not result:
+            flags |= Z_FLAG
+        regs[SR] = (sr & ~ALU_FLAGS) | flags
+        return result
+
+    def _exec_double(self, ins):
+        op = ins.op
+        byte = ins.byte
+        src, _ = self._read_operand(ins.src, byte)
+        dst = ins.dst
+        if dst[0] == OP_REG:
+            value = self.regs[dst[1]]
+            result = self._alu(op, src, value & 0xFF if byte else value, byte)
+            if op not in _NO_WRITEBACK:
+                self._write_register(dst[1], result, byte)
+        else:
+            address = self._address(dst, byte)
+            value = 0 if op == MOV else self._load(address, byte)
+            result = self._alu(op, src, value, byte)
+            if op not in _NO_WRITEBACK:
+                self._store(address, result, byte)
+
+    def _exec_single(self, ins):
+        op = ins.op
+        regs = self.regs
+
+        if op == RETI:
+            regs[SR] = self.read_word(regs[SP])
+            regs[PC] = self.read_word(regs[SP] + 2)
+            regs[SP] = (regs[SP] + 4) & 0xFFFF
+            return
+
+        byte = ins.byte if op not in (SWPB, SXT, CALL) else 0
+        value, address = self._read_operand(ins.src, byte)
+
+        if op == PUSH:
+            regs[SP] = (regs[SP] - 2) & 0xFFFF
+            self._store(regs[SP], value, byte)
+            return
+        if op == CALL:
+            regs[SP] = (regs[SP] - 2) & 0xFFFF
+            self.write_word(regs[SP], regs[PC])
+            regs[PC] = value & 0xFFFE
+            return
+
+        mask, sign = (0xFF, 0x80) if byte else (0xFFFF, 0x8000)
+        sr = regs[SR]
+        if op == SWPB:
+            result = ((value & 0xFF) << 8) | (value >> 8)
+            flags = None
+        elif op == SXT:
+            result = (value & 0xFF) | (0xFF00 if value & 0x80 else 0)
+            flags = C_FLAG if result else 0
+        else:
+            carry_in = sign if op == RRC and sr & C_FLAG else 0
+            if op == RRA:
+                carry_in = value & sign
+            result = (value >> 1) | carry_in
+            flags = C_FLAG if value & 1 else 0
+
+        if flags is not None:
+            if result & sign:
+                flags |= N_FLAG
+            if not result & mask:
+                flags |= Z_FLAG
+            regs[SR] = (sr & ~ALU_FLAGS) | flags
+
+        kind = ins.src[0]
+        if kind == OP_REG:
+            self._write_register(ins.src[1], result, byte)
+        elif address is not None:
+            self._store(address, result, byte)
+
+    def _exec_jump(self, ins):
+        sr = self.regs[SR]
+        cond = ins.op
+        if cond == 0:
+            taken = not sr & Z_FLAG
+        elif cond == 1:
+            taken = bool(sr & Z_FLAG)
+        elif cond == 2:
+            taken = not sr & C_FLAG
+        elif cond == 3:
+            taken = bool(sr & C_FLAG)
+        elif cond == 4:
+            taken = bool(sr & N_FLAG)
+        elif cond == 5:
+            taken = not (bool(sr & N_FLAG) ^ bool(sr & V_FLAG))
+        elif cond == 6:
+            taken = bool(sr & N_FLAG) ^ bool(sr & V_FLAG)
+        else:
+            taken = True
+        if taken:
+            if ins.target == ins.pc:
+                # "JMP $" sonsuz döngüsü: program sonu kabul edilir
+                self.halted = True
+            self.regs[PC] = ins.target
+
+    # ------------------------------------------------------------------
+    # Temel blok çevirisi
+    # ------------------------------------------------------------------
+
+    def _flag_usage(self, ins):
+        """Komutun bayrakları okuyup okumadığını ve tümünü yazıp yazmadığını döndürür"""
+        if ins.fmt == FMT_JUMP:
+            return ins.op != 7, False
+        if ins.fmt == FMT_SINGLE or self._needs_fallback(ins):
+            # Yorumlayıcıya bırakılan komutlar bayrakları kendisi hesaplar; öncesi canlı sayılır
+            return True, False
+        reads = ins.op in (ADDC, SUBC) or ins.src[:2] == (OP_REG, SR) or ins.dst[1] == SR
+        return reads, ins.op in _FLAG_WRITERS
+
+    @staticmethod
+    def _needs_fallback(ins):
+        """Blok içinde üretilmeyip yorumlayıcı işleyicisine bırakılan komutlar"""
+        if ins.fmt != FMT_DOUBLE:
+            return ins.fmt == FMT_SINGLE
+        kind, reg, _ = ins.src
+        if ins.op == DADD or (reg == PC and kind in (OP_INDIRECT, OP_AUTOINC)):
+            return True
+        # Hedefi SR olan bayrak yazan komutta sonuç bayrakların üzerine yazılır (yorumlayıcı sırası)
+        return ins.dst[:2] == (OP_REG, SR) and ins.op not in (MOV, BIC, BIS)
+
+    @staticmethod
+    def _ends_block(ins):
+        """PC'yi veya SR'yi değiştirebilen komutlar bloğu sonlandırır"""
+        if ins.fmt == FMT_JUMP:
+            return True
+        if ins.fmt == FMT_SINGLE:
+            return ins.op in (CALL, RETI) or (ins.src[0] == OP_REG and ins.src[1] in (PC, SR))
+        return ins.dst[0] == OP_REG and ins.dst[1] in (PC, SR)
+
+    def _is_idle(self, ins):
+        """Yalnızca bayrakları etkileyen, girişteki bayraklardan bağımsız komut mu?"""
+        if ins.fmt != FMT_DOUBLE or self._needs_fallback(ins) or self._flag_usage(ins)[0]:
+            return False
+        if ins.src[0] == OP_AUTOINC:
+            return False
+        return ins.op in _NO_WRITEBACK or ins.dst[:2] == (OP_REG, CG2)
+
+    def _idle_loop(self, instructions):
+        """Kendine dönen bloğun boşta bekleme döngüsü olup olmadığını belirler
+
+        Gövde hiçbir durum değiştirmiyorsa ('spin',), tek bir yazmacı sabit adımla
+        azaltıp sıfıra kadar sayıyorsa ('countdown', yazmaç, adım, maske) döndürür.
+        """
+        body, jump = instructions[:-1], instructions[-1]
+        if all(self._is_idle(ins) for ins in body):
+            return ('spin',)
+        if jump.op != 0:
+            return None
+
+        counter = None
+        last_writer = None
+        for ins in body:
+            if self._is_idle(ins):
+                if ins.op in _FLAG_WRITERS:
+                    last_writer = ins
+                continue
+            kind, reg, _ = ins.dst
+            if (counter is not None or ins.fmt != FMT_DOUBLE or ins.op not in (ADD, SUB)
+                    or ins.src[0] != OP_CONST or kind != OP_REG or reg in (PC, SP, SR, CG2)):
+                return None
+            counter = ins
+            last_writer = ins
+        if counter is None:
+            return None
+
+        reg = counter.dst[1]
+        mask = 0xFF if counter.byte else 0xFFFF
+        # Döngü koşulu sayacın kendisinden ya da TST/CMP #0,Rn sonucundan gelmelidir
+        if last_writer is not counter and not (
+                last_writer is not None and last_writer.op == CMP and last_writer.byte == counter.byte
+                and last_writer.src[:1] == (OP_CONST,) and last_writer.src[2] == 0
+                and last_writer.dst[:2] == (OP_REG, reg)):
+            return None
+        value = counter.src[2]
+        step = value if counter.op == SUB else -value & mask
+        if not step:
+            return None
+        return ('countdown', reg, step, mask)
+
+    def _emit_double(self, ins, lines, next_pc):
+        """Çift operandlı komut için satır içi Python kodu üretir
+
+        (bellek yazıyor mu, bayrak satırı) döndürür; bayrak satırı çağıran tarafından
+        eklenir ya da sonraki koşullu atlamaya kadar ertelenir.
+        """
+        byte = ins.byte
+        M, S = (0xFF, 0x80) if byte else (0xFFFF, 0x8000)
+        op = ins.op
+        subtract = op in (SUBC, SUB, CMP)
+
+        kind, reg, value = ins.src
+        if kind == OP_REG:
+            if reg == PC:
+                src = str(next_pc & M)
+            else:
+                src = f"(regs[{reg}] & 0xFF)" if byte else f"regs[{reg}]"
+        elif kind == OP_CONST:
+            # Sabit kaynak derleme anında katlanır (çıkarmada tümleyeni alınır)
+            src = str(value ^ M if subtract else value)
+        elif kind == OP_ABS:
+            src = f"bytes_[{value}]" if byte else f"words[{value >> 1}]"
+        elif kind == OP_INDEXED:
+            address = f"(regs[{reg}] + {value}) & 0xFFFF"
+            src = f"bytes_[{address}]" if byte else f"words[({address}) >> 1]"
+        elif kind == OP_INDIRECT:
+            src = f"bytes_[regs[{reg}]]" if byte else f"words[regs[{reg}] >> 1]"
+        else:
+            lines.append(f"a = regs[{reg}]")
+            lines.append(f"regs[{reg}] = (a + {1 if byte and reg != SP else 2}) & 0xFFFF")
+            src = "bytes_[a]" if byte else "words[a >> 1]"
+        if kind != OP_CONST:
+            lines.append(f"s = {src}")
+            if subtract:
+                lines.append(f"s ^= {M}")
+            src = "s"
+
+        kind, reg, value = ins.dst
+        memory_dst = kind != OP_REG
+        if memory_dst:
+            lines.append(f"ea = {value}" if kind == OP_ABS else f"ea = (regs[{reg}] + {value}) & 0xFFFF")
+            dst = "bytes_[ea]" if byte else "words[ea >> 1]"
+        elif reg == PC:
+            dst = str(next_pc & M)
+        else:
+            dst = f"(regs[{reg}] & 0xFF)" if byte else f"regs[{reg}]"
+        if op != MOV:
+            lines.append(f"d = {dst}")
+
+        keep = ~ALU_FLAGS & 0xFFFF
+        flags = None
+        if op == MOV:
+            lines.append(f"r = {src}")
+        elif op == BIC:
+            lines.append(f"r = d & ({src} ^ {M})")
+        elif op == BIS:
+            lines.append(f"r = d | {src}")
+        elif op in (ADD, ADDC, SUBC, SUB, CMP):
+            if op in (ADDC, SUBC):
+                lines.append(f"t = d + {src} + (regs[2] & 1)")
+            elif src.isdigit():
+                lines.append(f"t = d + {int(src) + (1 if subtract else 0)}")
+            else:
+                lines.append(f"t = d + {src}" + (" + 1" if subtract else ""))
+            lines.append(f"r = t & {M}")
+            flags = (f"regs[2] = (regs[2] & {keep}) | (t > {M}) | (0 if r else 2)"
+                     f" | (4 if r & {S} else 0) | (256 if ~(d ^ {src}) & (d ^ r) & {S} else 0)")
+        elif op == XOR:
+            lines.append(f"r = d ^ {src}")
+            flags = (f"regs[2] = (regs[2] & {keep}) | (1 if r else 2)"
+                     f" | (4 if r & {S} else 0) | (256 if {src} & d & {S} else 0)")
+        else:
+            # BIT / AND
+            lines.append(f"r = d & {src}")
+            flags = f"regs[2] = (regs[2] & {keep}) | (1 if r else 2) | (4 if r & {S} else 0)"
+
+        if op in _NO_WRITEBACK:
+            return False, flags
+        if not memory_dst:
+            if reg != CG2:
+                lines.append(f"regs[{reg}] = r")
+            return False, flags
+        lines.append("bytes_[ea] = r" if byte else "words[ea >> 1] = r")
+        return True, flags
+
+    def translate_block(self, pc):
+        """pc'den başlayan düz komut dizisini (temel blok) tek bir Python fonksiyonuna derler"""
+        instructions = []
+        address = pc
+        while len(instructions) < MAX_BLOCK_INSTRUCTIONS:
+            try:
+                ins = self.decode(address)
+            except ValueError:
+                if not instructions:
+                    raise
+                break
+            instructions.append(ins)
+            address = (address + ins.size) & 0xFFFF
+            if self._ends_block(ins):
+                break
+
+        # Geriye doğru bayrak canlılığı: sonraki komutların ezdiği bayraklar hesaplanmaz
+        need_flags = [True] * len(instructions)
+        live = True
+        for i in range(len(instructions) - 1, -1, -1):
+            reads, writes = self._flag_usage(instructions[i])
+            need_flags[i] = live
+            live = reads or (live and not writes)
+        live_in = live
+
+        # Son komut bloğun başına dönen koşullu atlamaysa gövde fonksiyon içinde döngüye alınır
+        total_ins = len(instructions)
+        total_cycles = sum(ins.cycles for ins in instructions)
+        last = instructions[-1]
+        loops = last.fmt == FMT_JUMP and last.target == pc and last.pc != pc
+        idle = self._idle_loop(instructions) if loops and self.fast_forward else None
+
+        def done(count, cycles):
+            if loops:
+                return f"return (it * {total_ins} + {count}, it * {total_cycles} + {cycles})"
+            return f"return ({count}, {cycles})"
+
+        lines = []
+        cycles = 0
+        pending = None  # Koşullu atlamaya ertelenen (bayrak satırı, yerel koşullar)
+        for i, ins in enumerate(instructions):
+            next_pc = (ins.pc + ins.size) & 0xFFFF
+            cycles += ins.cycles
+
+            if ins.fmt == FMT_JUMP:
+                materialize = [pending[0]] if pending else []
+                if loops:
+                    # Döngü girişi bayrakları okumuyorsa tur başına SR yazılmaz
+                    if idle == ('spin',):
+                        # Durum değişmediği için kalan turların hepsi aynıdır: doğrudan sona atlanır
+                        advance = [f"cpu.skipped_cycles += (max_it - it - 1) * {total_cycles}", "it = max_it"]
+                    else:
+                        advance = ["it += 1"]
+                    taken = ([] if not live_in else materialize) + advance + ["if it >= max_it:"] + [
+                        f"    {line}" for line in (materialize if not live_in else []) + [
+                            f"regs[0] = {pc}", done(0, 0)]] + ["continue"]
+                else:
+                    halt = ["cpu.halted = True"] if ins.target == ins.pc else []
+                    taken = materialize + [f"regs[0] = {ins.target}"] + halt + [done(i + 1, cycles)]
+                if ins.op == 7:
+                    lines += taken
+                else:
+                    condition = pending[1][ins.op] if pending else _JUMP_CONDITIONS[ins.op]
+                    lines.append(f"if {condition}:")
+                    lines += [f"    {line}" for line in taken]
+                    lines += materialize + [f"regs[0] = {next_pc}", done(i + 1, cycles)]
+                break
+
+            if self._needs_fallback(ins):
+                lines.append(f"regs[0] = {next_pc}")
+                lines.append(f"H[{i}](I[{i}])")
+                if self._ends_block(ins):
+                    lines.append(done(i + 1, cycles))
+                    break
+                stores = True
+            else:
+                stores, flags = self._emit_double(ins, lines, next_pc)
+                following = instructions[i + 1] if i + 1 < total_ins else None
+                if (flags and following is not None and following.fmt == FMT_JUMP
+                        and following.op in (0, 1, 2, 3, 4) and not stores and not self._ends_block(ins)):
+                    # Bayraklar hemen ardından gelen atlamada yerel değişkenlerden sınanır
+                    M, S = (0xFF, 0x80) if ins.byte else (0xFFFF, 0x8000)
+                    carry = f"t > {M}" if ins.op in (ADD, ADDC, SUBC, SUB, CMP) else "r"
+                    pending = (flags, ("r", "not r", f"not ({carry})", carry, f"r & {S}"))
+                elif flags and need_flags[i]:
+                    lines.append(flags)
+                if self._ends_block(ins):
+                    if ins.dst[1] == PC:
+                        lines.append("regs[0] &= 0xFFFE")
+                    else:
+                        lines.append(f"regs[0] = {next_pc}")
+                    lines.append(done(i + 1, cycles))
+                    break
+                if stores:
+                    lines.append("if code_map[ea >> 1]:")
+                    lines.append("    cpu.invalidate(ea & 0xFFFE)")
+
+            if stores:
+                # Kendini değiştiren kod: blok geçersiz kılındıysa burada çıkılır
+                lines.append("if cpu.code_dirty:")
+                lines.append("    cpu.code_dirty = False")
+                lines.append(f"    regs[0] = {next_pc}")
+                lines.append(f"    {done(i + 1, cycles)}")
+        else:
+            lines.append(f"regs[0] = {address}")
+            lines.append(done(total_ins, total_cycles))
+
+        if loops:
+            # Döngü, kalan çevrim bütçesini aşmadan tam turlar halinde yürütülür (bütçe en az bir tur)
+            prologue = ["it = 0", f"max_it = budget // {total_cycles}"]
+            if idle is not None and idle[0] == 'countdown':
+                prologue += self._countdown_prologue(idle, total_cycles)
+            lines = prologue + ["while True:"] + [f"    {line}" for line in lines]
+        elif (self.fast_forward and total_ins == 1 and last.fmt == FMT_DOUBLE and last.op == MOV and not last.byte
+              and last.src[0] == OP_CONST and last.src[2] == pc and last.dst[:2] == (OP_REG, PC)):
+            # BR #kendisi (ör. programın sonundaki sonsuz döngü): durum değişmez, bütçe tam turlarla tüketilir
+            lines = [f"it = budget // {total_cycles}",
+                     f"cpu.skipped_cycles += (it - 1) * {total_cycles}",
+                     f"regs[0] = {pc}",
+                     f"return (it, it * {total_cycles})"]
+
+        name = f"block_{pc:04X}"
+        source = (f"def {name}(regs, budget, words=words, bytes_=bytes_, code_map=code_map, cpu=cpu, H=H, I=I):\n"
+                  + "".join(f"    {line}\n" for line in lines))
+        namespace = {
+            'words': self.words,
+            'bytes_': self.bytes,
+            'code_map': self.code_map,
+            'cpu': self,
+            'H': [self._handlers[ins.fmt] for ins in instructions],
+            'I': instructions,
+        }
+        exec(compile(source, f"<blok 0x{pc:04X}>", 'exec'), namespace)
+        block = namespace[name]
+        block.cycles = total_cycles  # Bloğun (döngüde bir turun) en fazla çevrimi
+
+        self.blocks[pc] = block
+        for w in range(pc >> 1, (pc >> 1) + (address - pc) // 2):
+            w &= 0x7FFF
+            self.code_map[w] = 1
+            self.block_words.setdefault(w, []).append(pc)
+        return block
+
+    @staticmethod
+    def _countdown_prologue(idle, total_cycles):
+        """Geri sayım döngüsünün son tur hariç tüm turlarını kapalı formda atlayan kod"""
+        _, reg, step, mask = idle
+        modulus = mask + 1
+        g = math.gcd(step, modulus)
+        period = modulus // g
+        inverse = pow(step // g, -1, period) if period > 1 else 0
+        # Sayaç c, n tur sonra sıfır olur: c - n * step ≡ 0 (mod 2^16 veya 2^8)
+        value = f"regs[{reg}]" if mask == 0xFFFF else f"(regs[{reg}] & {mask})"
+        turns = f"(c // {g} * {inverse} % {period} or {period})" if g > 1 else f"(c * {inverse} % {period} or {period})"
+        if g > 1:
+            turns = f"({turns} if c % {g} == 0 else max_it)"
+        # Son tur bayrakları gerçek değerleriyle üretmesi için normal yürütülür
+        return [
+            f"c = {value}",
+            f"skip = min({turns}, max_it) - 1",
+            "if skip > 0:",
+            f"    regs[{reg}] = (c - skip * {step}) & {mask}",
+            "    it = skip",
+            f"    cpu.skipped_cycles += skip * {total_cycles}",
+        ]
+
+    def step(self):
+        """Tek bir komutu yürütür ve çevrim sayısını döndürür"""
+        regs = self.regs
+        ins = self.fetch(regs[PC])
+        # Yürütme sırasında PC bir sonraki komutu gösterir
+        regs[PC] = (ins.pc + ins.size) & 0xFFFF
+        self._handlers[ins.fmt](ins)
+        self.cycles += ins.cycles
+        self.instructions += 1
+        return ins.cycles
+
+    def run(self, max_cycles=1_000_000):
+        """max_cycles çevrim dolana kadar yürütür (sınırı geçen son komut tamamlanır); istatistikleri döndürür"""
+        start_cycles = self.cycles
+        start_instructions = self.instructions
+        limit = self.cycles + max_cycles
+        start = time.perf_counter()
+
+        if self.translate:
+            self._run_blocks(limit)
+        else:
+            while self.cycles < limit and not self.halted:
+                if self.regs[SR] & CPUOFF:
+                    self.halted = True
+                    break
+                self.step()
+
+        elapsed = time.perf_counter() - start
+        instructions = self.instructions - start_instructions
+        return {
+            'instructions': instructions,
+            'cycles': self.cycles - start_cycles,
+            'seconds': elapsed,
+            'ips': instructions / elapsed if elapsed > 0 else 0.0,
+            'halted': self.halted,
+            'pc': self.regs[PC],
+            'block_hits': self.block_hits,
+            'block_misses': self.block_misses,
+            'skipped_cycles': self.skipped_cycles,
+        }
+
+    def _run_blocks(self, limit):
+        """Derlenmiş temel blokları çevrim sınırına kadar yürütür
+
+        Kalan bütçe bir bloğun tamamına yetmiyorsa sınıra kadar komut komut ilerlenir; böylece
+        yürütme yorumlayıcıyla aynı komut sınırında durur.
+        """
+        blocks = self.blocks
+        regs = self.regs
+        cycles = self.cycles
+        instructions = 0
+        hits = 0
+        misses = 0
+        try:
+            while cycles < limit and not self.halted:
+                if regs[SR] & CPUOFF:
+                    self.halted = True
+                    break
+                block = blocks.get(regs[PC])
+                if block is None:
+                    misses += 1
+                    block = self.translate_block(regs[PC])
+                else:
+                    hits += 1
+                budget = limit - cycles
+                if budget < block.cycles:
+                    self.cycles = cycles
+                    cycles += self.step()
+                    continue
+                n, c = block(regs, budget)
+                instructions += n
+                cycles += c
+        finally:
+            self.cycles = cycles
+            self.instructions += instructions
+            self.block_hits += hits
+            self.block_misses += misses
+
+def main():
+    args = sys.argv[1:]
+    # --no-fast-forward: çevrim çevrim doğrulama için bekleme döngüleri atlanmaz
+    fast_forward = '--no-fast-forward' not in args
+    args = [arg for arg in args if arg != '--no-fast-forward']
+    if not args:
+        print("Kullanım: python simulator.py linked_output.elf [max_cycles] [--no-fast-forward]")
+        sys.exit(1)
+
+    elf_file = args[0]
+    max_cycles = int(args[1], 0) if len(args) > 1 else 1_000_000
+
+    memory = MSP430VirtualMemory()
+    loader = MSP430ELFLoader(memory)
+    # Bağlayıcı mutlak adresleri bölümlerin bağlandığı adreslere göre çözer: taban eklenmez
+    if not loader.load_linked_elf(elf_file, text_base=0, data_base=0):
+        print("HATA: Program yüklenemedi!")
+        sys.exit(1)
+
+    cpu = MSP430CPU(memory, fast_forward=fast_forward)
+    cpu.reset(pc=loader.entry)
+    cpu.regs[SP] = 0x2400
+    try:
+        stats = cpu.run(max_cycles)
+    except ValueError as e:
+        print(f"HATA: Yürütme durdu: {e}")
+        sys.exit(1)
+
+    print(f"Yürütülen komut: {stats['instructions']}, çevrim: {stats['cycles']}")
+    print(f"Süre: {stats['seconds'] * 1000:.2f} ms, {stats['ips'] / 1e6:.3f} M komut/s")
+    print(f"Durum: {'durdu' if stats['halted'] else 'çevrim sınırı'} (PC=0x{stats['pc']:04X})")
+    print(f"Blok önbelleği: {stats['block_hits']} isabet, {stats['block_misses']} ıskalama")
+    print(f"Atlanan bekleme çevrimi: {stats['skipped_cycles']}")
+    print("Yazmaçlar: " + " ".join(f"R{i}={v:04X}" for i, v in enumerate(cpu.regs)))
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,19 @@
+import hashlib
+import os
 import re
+from array import array
+from functools import lru_cache
+from itertools import repeat
 import tkinter as tk
 from tkinter import ttk, scrolledtext, messagebox
 import json
 
+from asm_ir import DIRECTIVE, DST_EXTENSION_MODES, EQU, INSTRUCTION, LAYOUT_DIRECTIVES, SRC_EXTENSION_MODES, Fragment, SourceLine, immediate_value, location_expression, parse_line, relayout, tokenize, tokenize_items
+from elf32 import CodeImage, SectionBuffer, write_elf
+from encoder import DOUBLE, JUMP, REGISTER_NUMBERS, encoder_for
+from expressions import UNRESOLVED_VALUE, ConstantGraph, compile_expression, evaluate
+import peephole
+
 # MSP430 Opcode Tablosu: Çift, tek operandlı ve atlama talimatları için opcode'lar
 opcode_table = {
     "double_operand": {
@@ -20,13 +31,13 @@ opcode_table = {
         "AND":  0xF,
     },
     "single_operand": {
-        "RRC":  0x10,
-        "SWPB": 0x10,
-        "RRA":  0x10,
-        "SXT":  0x10,
-        "PUSH": 0x12,
-        "CALL": 0x12,
-        "RETI": 0x13,
+        "RRC":  0x1000,
+        "SWPB": 0x1080,
+        "RRA":  0x1100,
+        "SXT":  0x1180,
+        "PUSH": 0x1200,
+        "CALL": 0x1280,
+        "RETI": 0x1300,
     },
     "jump": {
         "JNE":  0x2000,
@@ -37,12 +48,98 @@ opcode_table = {
         "JGE":  0x3400,
         "JL":   0x3800,
         "JMP":  0x3C00,
-    }
+        "JZ":   0x2400,  # JEQ
+        "JNZ":  0x2000,  # JNE
+        "JLO":  0x2800,  # JNC
+        "JHS":  0x2C00,  # JC
+    },
+    # Emüle komutlar: gerçek komut ve operand şablonları ({0}: kullanıcının operandı)
+    # R0: PC, R1: SP, R2: SR, R3: sabit üreteci
+    "emulated": {
+        "NOP":  ("MOV",  ("#0", "R3")),
+        "TST":  ("CMP",  ("#0", "{0}")),
+        "CLR":  ("MOV",  ("#0", "{0}")),
+        "INC":  ("ADD",  ("#1", "{0}")),
+        "INCD": ("ADD",  ("#2", "{0}")),
+        "DEC":  ("SUB",  ("#1", "{0}")),
+        "DECD": ("SUB",  ("#2", "{0}")),
+        "INV":  ("XOR",  ("#-1", "{0}")),
+        "ADC":  ("ADDC", ("#0", "{0}")),
+        "SBC":  ("SUBC", ("#0", "{0}")),
+        "DADC": ("DADD", ("#0", "{0}")),
+        "RLA":  ("ADD",  ("{0}", "{0}")),
+        "RLC":  ("ADDC", ("{0}", "{0}")),
+        "POP":  ("MOV",  ("@R1+", "{0}")),
+        "RET":  ("MOV",  ("@R1+", "R0")),
+        "BR":   ("MOV",  ("{0}", "R0")),
+        "CLRC": ("BIC",  ("#1", "R2")),
+        "CLRZ": ("BIC",  ("#2", "R2")),
+        "CLRN": ("BIC",  ("#4", "R2")),
+        "SETC": ("BIS",  ("#1", "R2")),
+        "SETZ": ("BIS",  ("#2", "R2")),
+        "SETN": ("BIS",  ("#4", "R2")),
+        "DINT": ("BIC",  ("#8", "R2")),
+        "EINT": ("BIS",  ("#8", "R2")),
+    },
+    # Sabit üreteci: immediate değer -> (register, As); ek kelime üretilmez
+    "constant_generator": {
+        0:      ("R3", 0),
+        1:      ("R3", 1),
+        2:      ("R3", 2),
+        0xFFFF: ("R3", 3),
+        4:      ("R2", 2),
+        8:      ("R2", 3),
+    },
 }
 
-# Makro tablosu ve genişletme sayacı
-macro_table = {}  # Makro tanımlarını saklar
-macro_expansion_counter = 0  # Unique etiketler için sayaç
+# Bölüm başlangıç adresleri
+DATA_START = 0x0200
+BSS_START = 0x0400
+
+# Makro gövdesindeki benzersiz etiketler: loop? -> loop.<çağrı sayacı>
+_UNIQUE_LABEL_RE = re.compile(r'(\w+)\?')
+_UNIQUE_SLOT_RE = re.compile(r'(\w)\?')
+
+def _nested_lines(body):
+    """Gövdenin her satırı için iç içe bir tekrarlama bloğunun içinde olup olmadığını döndürür"""
+    nested = []
+    depth = 0
+    for line in body:
+        head = line.split(None, 1)
+        word = head[0].lower() if head else ''
+        nested.append(depth > 0)
+        if word in _REPEAT_BLOCKS:
+            depth += 1
+        elif word in _REPEAT_CLOSERS and depth:
+            depth -= 1
+    return tuple(nested)
+
+def _compile_template(params, body, nested):
+    """Gövde satırlarını str.format şablonlarına çevirir
+
+    Parametreler {i}, benzersiz etiket sonekleri (loop?) {u} yuvası olur. İç içe
+    tekrarlama bloklarındaki sonekler her yineleme için içteki genişletmeye bırakılır.
+    """
+    # Yuva dışındaki süslü parantezler şablonda kaçışlanır
+    body = [line.replace('{', '{{').replace('}', '}}') for line in body]
+    if params:
+        index = {param: i for i, param in enumerate(params)}
+        names = '|'.join(re.escape(param) for param in sorted(index, key=len, reverse=True))
+        # :param: birleştirme biçimi ve tam kelime olarak geçen parametre (#param dahil)
+        pattern = re.compile(rf':({names}):|\b({names})\b')
+        slot = lambda m: '{%d}' % index[m.group(1) or m.group(2)]
+        body = [pattern.sub(slot, line) for line in body]
+    return tuple(line if inner else _UNIQUE_SLOT_RE.sub(r'\1.{u}', line) for line, inner in zip(body, nested))
+
+# Tekrarlama direktifleri ve kapanışları
+_REPEAT_BLOCKS = {'.rept': '.endr', '.irp': '.endr', '.loop': '.endloop'}
+_REPEAT_CLOSERS = frozenset(_REPEAT_BLOCKS.values())
+_LOOP_DEFAULT_COUNT = 1024  # Sayı verilmeyen .loop için üst sınır
+# Koşullu derleme direktifleri
+_CONDITIONALS = ('.if', '.ifdef', '.ifndef', '.elif', '.else', '.endif')
+
+class _LoopBreak(Exception):
+    """.break koşulu sağlandığında en içteki .loop'u sonlandırır"""
 
 class Macro:
     def __init__(self, name, params, body):
@@ -50,475 +147,935 @@ class Macro:
         self.name = name
         self.params = params
         self.body = body
-
-def parse_macros(lines):
-    """Makro tanımlarını ayrıştırır ve macro_table'a ekler"""
-    global macro_table
+        # Gövde tanımlanırken bir kez derlenir; genişletme yalnızca şablon doldurmadır
+        self.nested = _nested_lines(body)
+        self.template = _compile_template(params, body, self.nested)
+        # Çağrı başına benzersiz etiket içerir (iç içe bloklardakiler o blokların yinelemesine aittir)
+        self.unique = any('?' in line for line, inner in zip(body, self.nested) if not inner)
+        # Gövde tekrarlama veya koşul bloğu içeriyorsa genişletme çıktısı yeniden akıştan geçirilir
+        self.blocks = any(line.split(None, 1)[0].lower() in _REPEAT_BLOCKS or
+                          line.split(None, 1)[0].lower() in _CONDITIONALS for line in body)
+        # Parametreden hemen sonra gelen '?' (ör. {0}?) ancak genişletmeden sonra çözülebilir
+        self.late_unique = any('?' in line for line, inner in zip(self.template, self.nested) if not inner)
+
+    def expand(self, args, counter=0):
+        """Argümanları ve çağrı sayacını şablon yuvalarına yerleştirir"""
+        lines = tuple(line.format(*args, u=counter) for line in self.template)
+        if self.late_unique or any('?' in arg for arg in args):
+            lines = tuple(line if inner else _UNIQUE_LABEL_RE.sub(rf'\1.{counter}', line)
+                          for line, inner in zip(lines, self.nested))
+        return lines
+
+@lru_cache(maxsize=1024)
+def _cached_expansion(macro, args):
+    """Aynı argümanlarla tekrarlanan, benzersiz etiketsiz çağrıların genişletmesi"""
+    return macro.expand(args)
+
+def _extract_macros(lines, macro_table):
+    """Makro tanımlarını macro_table'a ekler; makro olmayan satırları döndürür"""
     i = 0
     new_lines = []  # Makro olmayan satırları saklar
-    
+
     while i < len(lines):
         line = lines[i].strip()
         if line.startswith(".macro"):
             # .macro direktifi: Makro tanımını başlatır
             macro_line = line[6:].strip()  # .macro kısmını çıkar
             parts = [p.strip() for p in macro_line.replace(',', ' ').split()]
-            
+
             if len(parts) < 1:
                 raise ValueError(f"Geçersiz makro tanımı: {line}")
-            
+
             name = parts[0]  # Makro adı
             params = parts[1:] if len(parts) > 1 else []  # Parametreler
             body = []  # Makro gövdesi
             i += 1
-            
+
             # Makro gövdesini .endm'ye kadar topla
             while i < len(lines) and not lines[i].strip().startswith(".endm"):
                 body_line = lines[i].strip()
                 if body_line:
                     body.append(body_line)
                 i += 1
-            
+
             if i >= len(lines):
                 raise ValueError(f"Makro '{name}' için .endm bulunamadı")
-            
+
             macro_table[name] = Macro(name, params, body)  # Makroyu kaydet
-            print(f"DEBUG: Makro tanımlandı: {name} parametreler: {params}")
-            print(f"DEBUG: Makro gövdesi: {body}")
         else:
             # Makro değilse, satırı koru
             if not line.startswith(".endm"):
                 new_lines.append(lines[i])
         i += 1
-    
-    lines[:] = new_lines  # Orijinal listeyi güncelle
-
-def expand_macros(lines):
-    """Makro çağrılarını genişletir"""
-    global macro_table, macro_expansion_counter
-    expanded_lines = []
-    
-    for line_num, line in enumerate(lines):
-        original_line = line.strip()
-        
-        # Yorumları ayır
-        comment_pos = original_line.find(';')
-        if comment_pos != -1:
-            code_part = original_line[:comment_pos].strip()
-            comment_part = original_line[comment_pos:]
-        else:
-            code_part = original_line
-            comment_part = ""
-        
-        tokens = code_part.split()
-        
-        if not tokens:
-            expanded_lines.append(line)  # Boş satırı koru
-            continue
-        
-        if tokens[0] in macro_table:
+
+    return new_lines
+
+# Akış sırasında işlenen direktifler; bunları veya bölüm/konum değiştiren direktifleri
+# içeren .include dosyaları önceden ayrıştırılmış parça olarak eklenemez
+_STREAM_DIRECTIVES = frozenset(_CONDITIONALS + tuple(_REPEAT_BLOCKS) + ('.break', '.include'))
+
+class IncludedFile:
+    """Bir kez okunup ayrıştırılan .include dosyası: makrolar, satırlar, sabitler ve IR parçası"""
+
+    def __init__(self, path, digest, text):
+        self.path = path
+        self.digest = digest
+        self.macros = {}
+        lines = _extract_macros(text.split('\n'), self.macros)
+        # Yorumlar ve boş satırlar bir kez atılır
+        self.lines = tuple(code for code in (line.partition(';')[0].strip() for line in lines) if code)
+        heads = [line.split(None, 1)[0] for line in self.lines]
+        self.heads = frozenset(heads)
+        self.plain = not any(head.lower() in _STREAM_DIRECTIVES or head.lower() in LAYOUT_DIRECTIVES
+                             for head in heads)
+        # .if/.ifdef için akışa bildirilecek sabit tanımları ve etiketler
+        self.constants = tuple((parts[0].rstrip(':'), parts[2])
+                               for parts in (line.split(None, 2) for line in self.lines)
+                               if len(parts) >= 3 and parts[1].lower() in ('.equ', '.set'))
+        self.labels = tuple(line.split(':', 1)[0].strip() for line, head in zip(self.lines, heads)
+                            if ':' in head)
+        self.values = self._evaluate_constants()
+        self._fragment = None
+        self._fragment_table = None
+
+    def _evaluate_constants(self):
+        """Yalnızca dosyanın kendi sabitlerine dayanan sabit değerlerini bir kez hesaplar
+
+        Değerler bağlamdan bağımsız olduğunda sözlük, dış sembole bağlı bir sabit varsa None döner.
+        """
+        values = {}
+        known = set()
+        for name, expr in self.constants:
+            try:
+                expression = compile_expression(expr.strip())
+            except ValueError:
+                return None
+            if not known.issuperset(expression.symbols):
+                return None
+            known.add(name)
+            try:
+                values[name] = evaluate(expression, values)
+            except ValueError:
+                values.pop(name, None)
+        self.unresolved = tuple(known.difference(values))
+        return values
+
+    def fragment(self, opcode_table):
+        """Dosyanın IR parçası; opcode tablosu başına ilk kullanımda bir kez üretilir"""
+        if self._fragment_table is not opcode_table:
+            self._fragment = Fragment(self.lines, opcode_table)
+            self._fragment_table = opcode_table
+        return self._fragment
+
+# Süreç boyunca paylaşılan .include önbelleği: gerçek yol -> IncludedFile
+_include_cache = {}
+include_cache_stats = {'hits': 0, 'misses': 0}
+
+def load_include(path):
+    """Dosyayı yol ve içerik özetine göre önbellekten döndürür; içerik değişmişse yeniden ayrıştırır"""
+    with open(path, 'rb') as f:
+        data = f.read()
+    digest = hashlib.sha1(data).hexdigest()
+    included = _include_cache.get(path)
+    if included is not None and included.digest == digest:
+        include_cache_stats['hits'] += 1
+        return included
+    include_cache_stats['misses'] += 1
+    included = IncludedFile(path, digest, data.decode('utf-8'))
+    _include_cache[path] = included
+    return included
+
+def _until_end(items, opcode_table):
+    """Akış öğelerini .end direktifi dahil olmak üzere verir; sonrası tüketilmez"""
+    for item in items:
+        yield item
+        if type(item) is not Fragment and '.end' in item:
+            line = parse_line(0, item, opcode_table)
+            if line is not None and line.kind == DIRECTIVE and line.mnemonic == '.end':
+                return
+
+class _Chunk:
+    """Artımlı derlemede bir akış öğesinin (satır veya Fragment) IR'ı ve ürettiği kod"""
+    __slots__ = ('item', 'lines', 'end', 'base', 'words', 'literals', 'relocations', 'refs', 'relative')
+
+    def __init__(self, item, lines, end):
+        self.item = item
+        self.lines = lines
+        self.end = end  # Öğeden sonraki satır numarası
+
+    def encode(self, symbol_table, opcode_table, symbol_cache):
+        """Öğenin satırlarını kodlar ve başvurduğu sembolleri kaydeder"""
+        # Öğenin satırları ardışık olduğundan kodu tek bir array('H') tutar
+        self.base = self.lines[0].address if self.lines else 0
+        self.words, self.literals, self.relocations = array('H'), [], []
+        refs = set()
+        self.relative = False  # Atlama komutları kendi adreslerine göre kodlanır
+        for line in self.lines:
+            words, literals, relocations, line_refs = encode_line(line, symbol_table, opcode_table, symbol_cache)
+            self.words += words
+            self.literals += literals
+            self.relocations += relocations
+            refs.update(line_refs)
+            if line.kind == INSTRUCTION and line.mnemonic in opcode_table["jump"]:
+                self.relative = True
+        self.refs = frozenset(refs)
+
+    def shift(self, delta):
+        """Üretilmiş kodu yeniden kodlamadan delta bayt kaydırır"""
+        self.base += delta
+        self.literals = [dict(entry, address=entry['address'] + delta) for entry in self.literals]
+        self.relocations = [dict(entry, offset=entry['offset'] + delta) for entry in self.relocations]
+
+# Sembolü tanımlamadan bildiren direktifler
+_DECLARATIONS = ('.global', '.def', '.ref')
+
+class Assembler:
+    """Makro tablosu, sayaçları ve seçenekleri kendine ait, yeniden girilebilir assembler
+
+    Her derleme kendi Assembler nesnesini kullandığında aynı süreçte (thread veya
+    süreç havuzunda) birden fazla kaynak birbirini etkilemeden derlenebilir.
+    """
+
+    def __init__(self, opcode_table=opcode_table, output=None, listing=None, include_paths=(), optimize=False):
+        # output/listing verilmezse assemble() dosya sistemine dokunmaz
+        self.opcode_table = opcode_table
+        self.output = output
+        self.listing = listing
+        self.optimize = optimize  # -O: pass1 ile pass2 arasında peephole iyileştirmesi
+        self.include_paths = list(include_paths)  # .include için aranacak dizinler
+        self.include_stack = []  # Açık .include dosyaları (göreli yollar ve döngü denetimi için)
+        self.included = {}  # Son derlemede okunan include dosyaları: gerçek yol -> içerik özeti
+        self.include_shadows = set()  # Bulunan dosyadan önce aranıp yok olan yollar (sonradan eklenirse onu gölgeler)
+        self.macro_table = {}  # Makro tanımlarını saklar
+        self.macro_expansion_counter = 0  # Unique etiketler için sayaç
+        self.constants = ConstantGraph()  # Son derlemenin .equ/.set bağımlılık grafiği
+        self.stream_constants = {}  # Genişletme sırasında değeri bilinen .equ/.set sabitleri
+        self.stream_symbols = set()  # Genişletme sırasında tanımı görülen etiket ve sabitler (.ifdef için)
+        self.loop_depth = 0  # İç içe .loop derinliği (.break denetimi için)
+        # reassemble() durumu: son derlemenin akışı, öğe bazında IR/kod ve sembol tablosu
+        self._items = None
+        self._chunks = None
+        self._symbol_table = None
+        self._definitions = None  # Sembol adı -> tanım/bildirim sayısı
+        self._relaxed = 0  # Son derlemede uzun biçime çevrilen atlama sayısı
+
+    def parse_macros(self, lines):
+        """Makro tanımlarını ayrıştırır ve self.macro_table'a ekler"""
+        lines[:] = _extract_macros(lines, self.macro_table)  # Orijinal listeyi güncelle
+
+    def expand_macros(self, lines):
+        """Makro çağrılarını, .rept/.irp/.loop ve .if/.else/.endif bloklarını tembel olarak genişletir
+
+        Satırları tek tek üreten bir generator döndürür; tekrarlama blokları yalnızca
+        gövdeleri kadar bellek tutar ve iç içe kullanılabilir. Pasif koşul dallarındaki
+        satırlar ayrıştırılmadan atlanır.
+        """
+        macro_table = self.macro_table
+        lines = iter(lines)
+        conditions = []  # Açık .if blokları: [üst blok etkin mi, bir dal seçildi mi]
+        active = True
+
+        for line in lines:
+            if not active:
+                # Pasif daldaki satırların yalnızca ilk kelimesine bakılır
+                head = line.split(None, 1)
+                if head and head[0].lower() in _CONDITIONALS:
+                    active = self._condition(head[0].lower(), line.partition(';')[0].split(None, 1)[1:],
+                                             conditions, active)
+                continue
+
+            # Yorumları ayır
+            code_part, semicolon, comment = line.partition(';')
+            tokens = code_part.split()
+
+            if not tokens:
+                yield line  # Boş satırı koru
+                continue
+
+            directive = tokens[0].lower()
+            if directive in _CONDITIONALS:
+                active = self._condition(directive, code_part.split(None, 1)[1:], conditions, active)
+                continue
+            if directive == '.include':
+                yield from self._include(code_part.split(None, 1)[1:])
+                continue
+            if directive in _REPEAT_BLOCKS:
+                body = self._collect_block(directive, lines)
+                yield from self._expand_repeat(directive, code_part.split(None, 1)[1:], body)
+                continue
+            if directive == '.break':
+                if not self.loop_depth:
+                    raise ValueError("'.break' yalnızca .loop bloğu içinde kullanılabilir")
+                condition = code_part.split(None, 1)[1:]
+                if not condition or self._stream_value(condition[0], '.break'):
+                    raise _LoopBreak()
+                continue
+
+            if tokens[0] not in macro_table:
+                if len(tokens) >= 3 and tokens[1].lower() in ('.equ', '.set'):
+                    self._track_constant(tokens[0].rstrip(':'), code_part.split(None, 2)[2])
+                elif ':' in tokens[0]:
+                    self.stream_symbols.add(code_part.split(':', 1)[0].strip())
+                yield line  # Normal satırı koru
+                continue
+
             # Makro çağrısı bulundu
             macro = macro_table[tokens[0]]
-            
+
             # Argümanları ayrıştır
-            arg_string = ' '.join(tokens[1:])
-            args = [arg.strip() for arg in arg_string.replace(',', ' ').split() if arg.strip()]
-            
-            print(f"DEBUG: Makro çağrısı bulundu: {tokens[0]} args: {args}")
-            
+            args = tuple(' '.join(tokens[1:]).replace(',', ' ').split())
             if len(args) != len(macro.params):
                 raise ValueError(f"Makro '{macro.name}' {len(macro.params)} parametre bekliyor, {len(args)} verildi")
-            
-            mapping = dict(zip(macro.params, args))  # Parametre-argüman eşleşmesi
-            macro_expansion_counter += 1
-            
-            print(f"DEBUG: Parametre eşleştirmesi: {mapping}")
-            
-            for m_line in macro.body:
-                expanded = m_line
-                
-                # Parametreleri argümanlarla değiştir
-                for param, arg in mapping.items():
-                    expanded = re.sub(rf'#{re.escape(param)}\b', f'#{arg}', expanded)
-                    expanded = re.sub(rf':{re.escape(param)}:', arg, expanded)
-                    expanded = re.sub(rf'\b{re.escape(param)}\b', arg, expanded)
-                
-                # Unique etiketler için sayacı kullan
-                expanded = re.sub(r'(\w+)\?', rf'\1.{macro_expansion_counter}', expanded)
-                
-                if comment_part and not expanded.strip().startswith('.'):
-                    expanded = expanded + " " + comment_part  # Yorumu ekle
-                
-                print(f"DEBUG: Genişletilmiş satır: '{m_line}' -> '{expanded}'")
-                expanded_lines.append(expanded)
-        else:
-            expanded_lines.append(line)  # Normal satırı koru
-    
-    return expanded_lines
 
-def parse_operand(operand, symbol_table=None, bw_bit=0):
-    """Operandları ayrıştırır ve adresleme modunu belirler"""
-    operand = operand.strip()
+            self.macro_expansion_counter += 1
+            if macro.unique or any('?' in arg for arg in args):
+                # Unique etiketler için sayacı kullan; sayaç her çağrıda değiştiği için önbelleğe alınmaz
+                body = macro.expand(args, self.macro_expansion_counter)
+            else:
+                body = _cached_expansion(macro, args)
+            if macro.blocks:
+                body = self.expand_macros(body)
 
-    debug_mode = False
-    if operand == "#ext_var":
-        print(f"\nDEBUG: parse_operand çağrıldı - operand: '{operand}'")
-        debug_mode = True
-        
-    if operand.startswith('#'):
-        # Immediate mod
-        value_str = operand[1:].strip()
-        
-        if re.match(r"^'.'$", value_str):
-            char = value_str[1]
-            result = {'mode': 'immediate', 'value': ord(char), 'As': 0x3, 'register': 'R0'}
-        elif value_str == "''":
-            raise ValueError("Bos karakter literali gecersiz: #''")
-        elif re.match(r'^0b[01]+$', value_str) or re.match(r'^[01]+b$', value_str):
-            bin_val = value_str[2:] if value_str.startswith('0b') else value_str[:-1]
-            result = {'mode': 'immediate', 'value': int(bin_val, 2), 'As': 0x3, 'register': 'R0'}
-        elif re.match(r'^0x[0-9a-fA-F]+$', value_str) or re.match(r'^[0-9a-fA-F]+h$', value_str):
-            hex_val = value_str[2:] if value_str.startswith('0x') else value_str[:-1]
-            result = {'mode': 'immediate', 'value': int(hex_val, 16), 'As': 0x3, 'register': 'R0'}
-        elif value_str.isdigit():
-            result = {'mode': 'immediate', 'value': int(value_str), 'As': 0x3, 'register': 'R0'}
-        else:
-            if symbol_table and value_str in symbol_table:
-                if isinstance(symbol_table[value_str], dict) and 'value' in symbol_table[value_str]:
-                    result = {
-                        'mode': 'immediate',
-                        'value': int(symbol_table[value_str]['value']),
-                        'As': 0x3,
-                        'register': 'R0',
-                        'label': value_str
-                    }
-                else:
-                    result = {'mode': 'immediate', 'value': int(symbol_table[value_str]), 'As': 0x3, 'register': 'R0'}
+            if not semicolon:
+                yield from body
+                continue
+            comment_part = semicolon + comment.rstrip()
+            for expanded in body:
+                # Yorumu direktif olmayan satırlara ekle
+                yield expanded if expanded.lstrip().startswith('.') else expanded + " " + comment_part
+
+        if conditions:
+            raise ValueError("'.if' için .endif bulunamadı")
+
+    def _include(self, args):
+        """.include "dosya": dosyayı önbellekten alır, makrolarını tanımlar ve satırlarını akışa verir"""
+        name = args[0].strip().strip('"') if args else ''
+        if not name:
+            raise ValueError("'.include' bir dosya adı bekliyor")
+        path = self._find_include(name)
+        if path in self.include_stack:
+            raise ValueError(f"Döngüsel .include: {' -> '.join(self.include_stack + [path])}")
+
+        included = load_include(path)
+        self.included[path] = included.digest
+        self.macro_table.update(included.macros)
+        if included.plain and included.heads.isdisjoint(self.macro_table):
+            # Akış direktifi ve makro çağrısı yok: önceden ayrıştırılmış IR doğrudan eklenir
+            if included.values is not None:
+                # Bağlamdan bağımsız sabit değerleri önbellekten alınır
+                for constant in included.unresolved:
+                    self.stream_constants.pop(constant, None)
+                self.stream_constants.update(included.values)
+                self.stream_symbols.update(included.unresolved)
+                self.stream_symbols.update(included.values)
+            else:
+                for constant, expr in included.constants:
+                    self._track_constant(constant, expr)
+            self.stream_symbols.update(included.labels)
+            yield included.fragment(self.opcode_table)
+            return
 
-    elif operand.startswith('&'):
-        # Absolute mod
-        label = operand[1:]
-        if symbol_table and label in symbol_table:
-            if isinstance(symbol_table[label], dict):
-                result = {'mode': 'absolute', 'label': label, 'As': 0x1, 'register': 'R2'}
+        self.include_stack.append(path)
+        try:
+            yield from self.expand_macros(included.lines)
+        finally:
+            self.include_stack.pop()
+
+    def _find_include(self, name):
+        """Dosyayı sırasıyla içeren dosyanın dizininde, include_paths'te ve çalışma dizininde arar"""
+        directories = [os.path.dirname(self.include_stack[-1])] if self.include_stack else []
+        directories += self.include_paths + ['.']
+        for directory in ([''] if os.path.isabs(name) else directories):
+            path = os.path.join(directory, name)
+            if os.path.isfile(path):
+                return os.path.realpath(path)
+            self.include_shadows.add(os.path.abspath(path))
+        raise ValueError(f"Include dosyası bulunamadı: {name}")
+
+    def _condition(self, directive, args, conditions, active):
+        """Koşul direktifini işler; sonraki satırların etkin olup olmadığını döndürür"""
+        arg = args[0].strip() if args else ''
+        if directive in ('.if', '.ifdef', '.ifndef'):
+            # Pasif bir bloğun içindeki koşul hesaplanmaz ve hiçbir dalı etkinleşmez
+            taken = active and self._test(directive, arg)
+            conditions.append([active, taken or not active])
+            return taken
+        if not conditions:
+            raise ValueError(f"'{directive}' için .if bulunamadı")
+        parent, taken = conditions[-1]
+        if directive == '.endif':
+            conditions.pop()
+            return parent
+        if directive == '.else':
+            conditions[-1][1] = True
+            return not taken
+        # .elif: önceki dallardan biri seçilmediyse koşul hesaplanır
+        if taken:
+            return False
+        taken = conditions[-1][1] = self._test(directive, arg)
+        return taken
+
+    def _test(self, directive, arg):
+        """.if/.elif ifadesini veya .ifdef/.ifndef sembolünü değerlendirir"""
+        if not arg:
+            raise ValueError(f"'{directive}' bir argüman bekliyor")
+        if directive == '.ifdef':
+            return arg in self.stream_symbols
+        if directive == '.ifndef':
+            return arg not in self.stream_symbols
+        return self._stream_value(arg, directive) != 0
+
+    def _collect_block(self, directive, lines):
+        """Tekrarlama bloğunun gövdesini (iç içe bloklar dahil) kapanışına kadar toplar"""
+        closers = [_REPEAT_BLOCKS[directive]]
+        body = []
+        for line in lines:
+            tokens = line.partition(';')[0].split(None, 1)
+            word = tokens[0].lower() if tokens else ''
+            if word in _REPEAT_BLOCKS:
+                closers.append(_REPEAT_BLOCKS[word])
+            elif word == closers[-1]:
+                closers.pop()
+                if not closers:
+                    return body
+            if tokens:
+                body.append(line.strip())
+        raise ValueError(f"'{directive}' için {closers[0]} bulunamadı")
+
+    def _expand_repeat(self, directive, args, body):
+        """.rept N, .irp sembol, değerler... ve .loop [N] bloklarını yineleme başına üretir"""
+        args = args[0].strip() if args else ''
+        if directive == '.irp':
+            names = args.replace(',', ' ').split()
+            if not names:
+                raise ValueError("'.irp' bir sembol adı bekliyor")
+            template = Macro('.irp', names[:1], body)
+            iterations = [(value,) for value in names[1:]]
+        else:
+            if args:
+                count = self._stream_value(args, directive)
+            elif directive == '.loop':
+                count = _LOOP_DEFAULT_COUNT
             else:
-                result = {'mode': 'absolute', 'value': int(symbol_table[label]), 'As': 0x1, 'register': 'R2'}
+                raise ValueError("'.rept' bir tekrar sayısı bekliyor")
+            if count < 0:
+                raise ValueError(f"'{directive}' tekrar sayısı negatif olamaz: {count}")
+            template = Macro(directive, [], body)
+            iterations = repeat((), count)
+
+        loop = directive == '.loop'
+        self.loop_depth += loop
+        try:
+            for values in iterations:
+                # Her yineleme benzersiz etiketler için ayrı sayaç değeri alır
+                self.macro_expansion_counter += template.unique
+                try:
+                    yield from self.expand_macros(template.expand(values, self.macro_expansion_counter))
+                except _LoopBreak:
+                    if loop:
+                        break
+                    raise
+        finally:
+            self.loop_depth -= loop
+
+    def _track_constant(self, name, expr):
+        """Akıştaki .equ/.set değerini, önceki sabitlerle hesaplanabiliyorsa kaydeder"""
+        self.stream_symbols.add(name)
         try:
-            addr = int(label, 0)
-            result = {'mode': 'absolute', 'value': addr, 'As': 0x1, 'register': 'R2'}
+            self.stream_constants[name] = evaluate(compile_expression(expr.strip()), self.stream_constants)
         except ValueError:
-            result = {'mode': 'absolute', 'label': label, 'As': 0x1, 'register': 'R2'}
-        
-    elif re.match(r'^-?\d+\(R\d+\)$', operand):
-        # Indexed mod
-        offset, reg = operand[:-1].split('(')
-        result = {
-            'mode': 'indexed',
-            'offset': int(offset),
-            'register': reg,
-            'As': 0x1
-        }
-    
-    elif re.match(r'^@R\d+\+$', operand):
-        # Indirect auto-increment mod
-        reg = operand[1:-1]
-        result = {'mode': 'indirect_autoinc', 'register': reg, 'As': 0x3}
-    
-    elif re.match(r'^@R\d+$', operand):
-        # Indirect mod
-        reg = operand[1:]
-        result = {'mode': 'indirect', 'register': reg, 'As': 0x2}
-    
-    elif re.match(r'^R\d+$', operand):
-        # Register mod
-        result = {'mode': 'register', 'register': operand, 'As': 0x0}
-    
-    elif re.match(r'^[A-Za-z_]\w*$', operand):
-        # Symbolic mod
-        result = {'mode': 'symbolic', 'label': operand, 'As': 0x1, 'register': 'R0'}
-    
-    else:
+            # İleri referanslı veya etiket içeren sabitler pass1'de çözülür
+            self.stream_constants.pop(name, None)
+
+    def _stream_value(self, expr, directive):
+        """Direktif argümanını akışta bilinen sabitlerle hesaplar"""
+        try:
+            value = compile_expression(expr.strip()).evaluate(self._stream_lookup)
+        except ValueError as e:
+            raise ValueError(f"'{directive}' ifadesi çözülemedi '{expr.strip()}': {e}")
+        return value
+
+    def _stream_lookup(self, name):
+        if name not in self.stream_constants:
+            raise ValueError(f"Bilinmeyen sembol: {name}")
+        return self.stream_constants[name]
+
+    def _stream(self, assembly_code):
+        """Makroları ayrıştırır ve genişletilmiş satır akışını döndürür"""
+        lines = assembly_code.strip().split('\n')
+        # Benzersiz etiketler her derlemede aynı olsun diye makrolar baştan okunur
+        self.macro_table = {}
+        self.macro_expansion_counter = 0
+        self.stream_constants = {}
+        self.stream_symbols = set()
+        self.include_stack = []
+        self.included = {}
+        self.include_shadows = set()
+        self.parse_macros(lines)
+        return self.expand_macros(lines)
+
+    def assemble(self, assembly_code):
+        """Assembly kodunu derler; output verilmişse ELF nesne dosyasını da yazar"""
+        # Makroları ayrıştır ve genişlet
+        lines = self._stream(assembly_code)
+
+        # Kaynak bir kez ayrıştırılır; iki geçiş de aynı IR'ı kullanır
+        program = tokenize(lines, self.opcode_table)
+        # Sembol tablosunu oluştur
+        self.constants = ConstantGraph()
+        symbol_table = pass1(program, self.opcode_table, self.constants)
+        if self.optimize:
+            # Gereksiz komutlar atılır; etiket adresleri ve bağlı sabitler yeniden hesaplanır
+            program, report = peephole.optimize(program, symbol_table, self.opcode_table, self.constants)
+            peephole.print_report(report)
+        # Menzil dışı atlamalar uzatılır; adresler sabit noktaya kadar yeniden atanır
+        relaxed = relax_jumps(program, symbol_table, self.opcode_table, self.constants)
+        if self.optimize and relaxed:
+            print(f"  Uzun biçime çevrilen atlama: {relaxed}")
+        # Makine kodunu üret
+        machine_code, literals, relocation_entries, relocation_data = pass2(program, symbol_table, self.opcode_table)
+        self._write(machine_code, symbol_table, literals, relocation_entries, relocation_data)
+        return machine_code, symbol_table, literals, relocation_entries, relocation_data
+
+    def reassemble(self, assembly_code):
+        """Önceki derlemeden yararlanarak kaynağı artımlı derler; sonuç assemble() ile aynıdır
+
+        İlk çağrıda tam derleme yapılır ve IR, sembol tablosu ve adresler saklanır. Sonraki
+        çağrılarda genişletilmiş akış öncekiyle karşılaştırılır: yalnızca değişen satırlar
+        yeniden ayrıştırılır, adresler ilk etkilenen konumdan itibaren kaydırılır ve yalnızca
+        değişen sembollere başvuran (veya kayan atlama) komutları yeniden kodlanır. Değişiklik
+        bölüm, .equ veya bildirim direktiflerine dokunuyorsa tam derlemeye dönülür.
+        """
+        if self.optimize:
+            # Peephole satırları sildiğinden öğe bazında durum tutulamaz: tam derleme yapılır
+            self._chunks = None
+            return self.assemble(assembly_code)
+        # tokenize() gibi .end'de durulur; sonrasındaki satırlar genişletilmez
+        items = list(_until_end(self._stream(assembly_code), self.opcode_table))
+
+        updated = False
+        if self._chunks is not None:
+            try:
+                updated = self._update(items)
+            except Exception:
+                updated = False  # Hata tam derlemede doğru satır bilgisiyle yeniden oluşur
+        if not updated:
+            self._build(items)
+
+        machine_code, literals, relocation_entries = CodeImage(), [], []
+        for chunk in self._chunks:
+            machine_code.write(chunk.base, chunk.words)
+            literals += chunk.literals
+            relocation_entries += chunk.relocations
+        symbol_table = self._symbol_table
+        relocation_data = _relocation_data(machine_code, relocation_entries, symbol_table)
+        self._write(machine_code, symbol_table, literals, relocation_entries, relocation_data)
+        return machine_code, symbol_table, literals, relocation_entries, relocation_data
+
+    def _build(self, items):
+        """Akışı baştan derler ve artımlı derleme durumunu kurar"""
+        self._chunks = None
+        chunks = [_Chunk(item, lines, end) for item, lines, end in tokenize_items(items, self.opcode_table)]
+        self.constants = ConstantGraph()
+        program = [line for chunk in chunks for line in chunk.lines]
+        symbol_table = pass1(program, self.opcode_table, self.constants)
+        self._relaxed = relax_jumps(program, symbol_table, self.opcode_table, self.constants)
+        symbol_cache = {}
+        definitions = {}
+        for chunk in chunks:
+            chunk.encode(symbol_table, self.opcode_table, symbol_cache)
+            for line in chunk.lines:
+                if line.label:
+                    definitions[line.label] = definitions.get(line.label, 0) + 1
+                if line.kind == DIRECTIVE and line.mnemonic in _DECLARATIONS:
+                    for sym in line.args.split(','):
+                        sym = sym.strip()
+                        if sym:
+                            definitions[sym] = definitions.get(sym, 0) + 1
+        self._items = items
+        self._symbol_table = symbol_table
+        self._definitions = definitions
+        self._chunks = chunks
+
+    def _update(self, items):
+        """Yeni akışı önceki derlemeye uygular; artımlı işlenemiyorsa False döndürür"""
+        old_items, chunks = self._items, self._chunks
+        if len(chunks) != len(old_items):
+            return False  # .end sonrası satırlar ayrıştırılmamış
+        if self._relaxed:
+            return False  # Uzun atlamaların boyutu tüm programın yerleşimine bağlı
+
+        # Değişen bölge: ortak önek ve sonek dışında kalan öğeler
+        limit = min(len(old_items), len(items))
+        start = 0
+        while start < limit and old_items[start] == items[start]:
+            start += 1
+        tail = 0
+        while tail < limit - start and old_items[-1 - tail] == items[-1 - tail]:
+            tail += 1
+        old_end = len(old_items) - tail
+        new_items = items[start:len(items) - tail]
+        removed = chunks[start:old_end]
+        if not new_items and not removed:
+            return True
+        if any(type(item) is Fragment for item in new_items) or any(type(chunk.item) is Fragment for chunk in removed):
+            return False
+
+        number = chunks[start - 1].end if start else 0
+        added = []
+        for item in new_items:
+            number += 1
+            line = parse_line(number, item, self.opcode_table)
+            added.append(_Chunk(item, (line,) if line else (), number))
+        for chunk in removed + added:
+            for line in chunk.lines:
+                if line.kind == EQU or (line.kind == DIRECTIVE and line.mnemonic != '.word'):
+                    return False
+
+        # Bölgenin başındaki bölüm ve konum: sonraki ilk satırın ya da önceki satırın sonu
+        position = next(((chunk.lines[0].section, chunk.lines[0].address) for chunk in chunks[start:] if chunk.lines), None)
+        if position is None:
+            previous = next((chunk.lines[-1] for chunk in reversed(chunks[:start]) if chunk.lines), None)
+            if previous is None or (previous.kind == DIRECTIVE and previous.mnemonic in LAYOUT_DIRECTIVES):
+                return False
+            position = (previous.section, previous.address + previous.size)
+        section, location = position
+        for chunk in added:
+            for line in chunk.lines:
+                line.section = section
+                line.address = location
+                location += line.size
+        delta = (location - position[1]) - sum(line.size for chunk in removed for line in chunk.lines)
+        number_delta = len(added) - len(removed)
+        if delta and self._detached(chunks[:start], chunks[old_end:], section):
+            return False
+
+        # Bölgenin etiketleri: aynı adla tek tanım dışındaki durumlar tam derlemeye bırakılır
+        symbol_table, definitions, constants = self._symbol_table, self._definitions, self.constants
+        removed_names = {line.label for chunk in removed for line in chunk.lines if line.label}
+        added_names = {line.label for chunk in added for line in chunk.lines if line.label}
+        for name in removed_names:
+            if definitions.get(name) != 1 or (name not in added_names and constants.dependents.get(name)):
+                return False
+            definitions[name] = 0
+        for name in added_names:
+            if definitions.get(name, 0) != 0 or (name not in removed_names and constants.dependents.get(name)):
+                return False
+            definitions[name] = 1
+        if sum(1 for chunk in added for line in chunk.lines if line.label) != len(added_names):
+            return False
+        changed = removed_names | added_names
+
+        # Sonraki satırların numaraları ve aynı bölümdeki adresleri kaydırılır
+        reencode = set(map(id, added))
+        shifting = delta != 0
+        org_pending = False  # Bölümde .org görüldü, henüz kod üretilmedi
+        for chunk in chunks[old_end:]:
+            chunk.end += number_delta
+            moved = False
+            for line in chunk.lines:
+                line.number += number_delta
+                if not shifting or line.section != section:
+                    continue
+                layout = line.kind == DIRECTIVE and line.mnemonic in LAYOUT_DIRECTIVES
+                if org_pending:
+                    # .org sonrası adresler kaymaz; bölümden çıkılırsa eski sayaç geri döner
+                    if line.size:
+                        shifting = False
+                    elif layout and line.mnemonic not in ('.org', '.usect', '.end'):
+                        org_pending = False
+                    continue
+                if line.kind == EQU and '$' in line.args:
+                    return False
+                line.address += delta
+                moved = True
+                if line.label and line.kind != EQU:
+                    if definitions[line.label] != 1:
+                        return False
+                    symbol_table[line.label]['value'] = line.address
+                    changed.add(line.label)
+                if layout and line.mnemonic == '.org':
+                    org_pending = True
+            if moved:
+                if chunk.relative:
+                    reencode.add(id(chunk))
+                else:
+                    chunk.shift(delta)
+
+        for chunk in added:
+            for line in chunk.lines:
+                if line.label:
+                    symbol_table[line.label] = {
+                        'value': line.address,
+                        'type': 'relative',
+                        'defined': True,
+                        'section': line.section,
+                        'is_constant': False
+                    }
+        for name in removed_names - added_names:
+            del symbol_table[name]
+        changed.update(constants.update(symbol_table, changed))
+
+        chunks[start:old_end] = added
+        symbol_cache = {}
+        for chunk in chunks:
+            if id(chunk) in reencode or (chunk.refs and not changed.isdisjoint(chunk.refs)):
+                chunk.encode(symbol_table, self.opcode_table, symbol_cache)
+        self._items = items
+        return True
+
+    @staticmethod
+    def _detached(before, after, section):
+        """Bölgeden önce konum sayacı .org/.usect ile bölümün kayıtlı adresinden ayrılmış olabilir
+        ve bölüme sonradan yeniden giriliyorsa True döndürür: kaydırma yeni adresi izleyemez"""
+        moved = any(line.kind == DIRECTIVE and (line.mnemonic == '.usect' or (line.mnemonic == '.org' and line.section == section))
+                    for chunk in before for line in chunk.lines)
+        return moved and any(line.kind == DIRECTIVE and line.mnemonic in LAYOUT_DIRECTIVES and line.mnemonic not in ('.org', '.end')
+                             for chunk in after for line in chunk.lines)
+
+    def _write(self, machine_code, symbol_table, literals, relocation_entries, relocation_data):
+        """output verilmişse nesne (ve liste) dosyasını yazar"""
+        if self.output:
+            create_object_file(
+                machine_code,
+                symbol_table,
+                literals,
+                relocation_entries=relocation_entries,
+                relocation_data=relocation_data,
+                filename=self.output,
+                listing=self.listing
+            )
+
+_INDEXED_OPERAND_RE = re.compile(r'^(-?\d+)\((R\d+)\)$')
+_INDIRECT_OPERAND_RE = re.compile(r'^@(R\d+)(\+?)$')
+_REGISTER_OPERAND_RE = re.compile(r'^R\d+$')
+_SYMBOL_OPERAND_RE = re.compile(r'^[A-Za-z_]\w*$')
+
+def _parse_immediate(operand):
+    value_str = operand[1:].strip()
+    if value_str == "''":
+        raise ValueError("Bos karakter literali gecersiz: #''")
+    value = immediate_value(operand)
+    if value is not None:
+        return {'mode': 'immediate', 'value': value, 'As': 0x3, 'register': 'R0'}
+    if _SYMBOL_OPERAND_RE.match(value_str):
+        return None  # Değeri sembol tablosuna bağlı
+    raise ValueError(f"Gecersiz operand: {operand}")
+
+def _parse_absolute(operand):
+    label = operand[1:]
+    try:
+        return {'mode': 'absolute', 'value': int(label, 0), 'As': 0x1, 'register': 'R2'}
+    except ValueError:
+        return {'mode': 'absolute', 'label': label, 'As': 0x1, 'register': 'R2'}
+
+def _parse_indirect(operand):
+    match = _INDIRECT_OPERAND_RE.match(operand)
+    if not match:
         raise ValueError(f"Gecersiz operand: {operand}")
+    if match.group(2):
+        return {'mode': 'indirect_autoinc', 'register': match.group(1), 'As': 0x3}
+    return {'mode': 'indirect', 'register': match.group(1), 'As': 0x2}
 
-    if debug_mode:
-        print(f"  Operand: {operand}")
-        print(f"  Sonuç: {result}")
-        print(f"  Symbol tablosunda 'ext_var' var mı? {'ext_var' in symbol_table if symbol_table else 'symbol_table None'}")
-        if symbol_table and 'ext_var' in symbol_table:
-            print(f"  Symbol tablosu girişi: {symbol_table['ext_var']}")
-            print(f"  Tipi: {type(symbol_table['ext_var'])}")
-    
-    return result
+def _parse_indexed(operand):
+    match = _INDEXED_OPERAND_RE.match(operand)
+    if not match:
+        raise ValueError(f"Gecersiz operand: {operand}")
+    return {'mode': 'indexed', 'offset': int(match.group(1)), 'register': match.group(2), 'As': 0x1}
+
+def _parse_name(operand):
+    if _REGISTER_OPERAND_RE.match(operand):
+        return {'mode': 'register', 'register': operand, 'As': 0x0}
+    if _SYMBOL_OPERAND_RE.match(operand):
+        return {'mode': 'symbolic', 'label': operand, 'As': 0x1, 'register': 'R0'}
+    return _parse_indexed(operand)
+
+# Operandın ilk karakterine göre ayrıştırıcı
+_OPERAND_PARSERS = {'#': _parse_immediate, '&': _parse_absolute, '@': _parse_indirect, '-': _parse_indexed}
+_OPERAND_PARSERS.update((digit, _parse_indexed) for digit in '0123456789')
+
+@lru_cache(maxsize=4096)
+def _parse_literal_operand(operand):
+    """Sembol tablosundan bağımsız operandları çözer; #SEMBOL için None döndürür"""
+    if not operand:
+        raise ValueError(f"Gecersiz operand: {operand}")
+    return _OPERAND_PARSERS.get(operand[0], _parse_name)(operand)
 
-def resolve_forward_references(symbol_table):
-    """İleri referansları çözer"""
-    for label in list(symbol_table.keys()):
-        entry = symbol_table[label]
-        if not entry.get('defined', False) and 'forward_references' in entry:
-            for ref_label in entry['forward_references']:
-                if ref_label in symbol_table and symbol_table[ref_label].get('is_constant', False):
-                    try:
-                        symbol_table[label]['value'] = symbol_table[ref_label]['value']
-                        symbol_table[label]['defined'] = True
-                    except KeyError:
-                        pass
-
-def pass1(lines):
-    """Birinci geçiş: Sembol tablosunu oluşturur"""
-    symbol_table = {}
-    current_section = 'text'  # Varsayılan bölüm
-    section_addresses = {
-        'text': 0,
-        'data': 0x0200, 
-        'bss': 0x0400
-    }
-    location_counter = section_addresses[current_section]  # Adres sayacı
+def parse_operand(operand, symbol_table=None, bw_bit=0, symbol_cache=None):
+    """Operandları ayrıştırır ve adresleme modunu belirler
 
-    placeholder_base = 0xFF00  # Geçici değerler için taban adres
-    placeholder_counter = 0
+    Dönen sözlükler önbellekte paylaşılır, değiştirilmemelidir. symbol_cache verilirse
+    sembole bağlı (#SEMBOL) sonuçlar da saklanır; sembol tablosu değiştiğinde temizlenmelidir.
+    """
+    operand = operand.strip()
+    result = _parse_literal_operand(operand)
+    if result is not None:
+        return result
+
+    if symbol_cache is not None:
+        result = symbol_cache.get(operand)
+        if result is not None:
+            return result
+
+    value_str = operand[1:].strip()
+    entry = symbol_table.get(value_str) if symbol_table else None
+    if entry is None:
+        # Tanımsız sembol: relocation ile çözülür
+        result = {'mode': 'immediate', 'As': 0x3, 'register': 'R0', 'label': value_str}
+    elif isinstance(entry, dict) and 'value' in entry:
+        result = {'mode': 'immediate', 'value': int(entry['value']), 'As': 0x3, 'register': 'R0', 'label': value_str}
+    else:
+        result = {'mode': 'immediate', 'value': int(entry), 'As': 0x3, 'register': 'R0'}
 
-    for line_num, line in enumerate(lines, 1):
-        line = line.split(';', 1)[0].strip()  # Yorumları çıkar
-        if not line:
-            continue
+    if symbol_cache is not None:
+        symbol_cache[operand] = result
+    return result
 
-        label = None
+def _program(lines, opcode_table):
+    """Ham kaynak satırlarını gerekirse ortak IR'a (SourceLine listesi) çevirir"""
+    if lines and isinstance(lines[0], SourceLine):
+        return lines
+    return tokenize(lines, opcode_table)
 
-        if line.lower().startswith('.org'):
-            # .org: Başlangıç adresini belirler
-            try:
-                addr = line[len('.org'):].strip()
-                location_counter = int(addr, 16) if addr.lower().startswith('0x') else int(addr, 0)
-                continue
-            except ValueError:
-                raise ValueError(f"Line {line_num}: Gecersiz .org adresi: '{addr}'")
-
-        if line.lower().startswith('.usect'):
-            # .usect: Özel bölüm tanımlar
-            match = re.match(r'\.usect\s+\"([^\"]+)\"\s*,\s*(\d+)', line, re.IGNORECASE)
-            if match:
-                sect_name = match.group(1)
-                size = int(match.group(2))
-                if sect_name not in section_addresses:
-                    section_addresses[sect_name] = 0
-                section_addresses[sect_name] += size
-            continue
+def define_constant(line, symbol_table, constants):
+    """.equ/.set satırını sembol tablosuna ve bağımlılık grafiğine ekler
 
-        elif line.lower().startswith('.sect'):
-            # .sect: Yeni bir bölümü başlatır
-            match = re.match(r'\.sect\s+\"([^\"]+)\"', line, re.IGNORECASE)
-            if match:
-                sect_name = match.group(1)
-                current_section = sect_name
-                if sect_name not in section_addresses:
-                    section_addresses[sect_name] = 0
-                location_counter = section_addresses[sect_name]
-            continue
+    Bağımlılıkları henüz tanımlı değilse değer geçici kalır; ConstantGraph sonradan çözer.
+    """
+    label = line.label
+    value_expr = location_expression(line)
+    try:
+        expression = compile_expression(value_expr)
+    except ValueError as e:
+        raise ValueError(f"Line {line.number}: .equ/.set ifadesi hatali: {e}")
+
+    operand_types = []
+    unresolved = False
+    for sym in expression.references:
+        entry = symbol_table.get(sym)
+        if entry is None or not entry.get("defined", False):
+            unresolved = True
+            operand_types.append('absolute')
+        else:
+            operand_types.append(entry['type'])
 
-        elif line.lower().startswith('.text'):
-            # .text: Kod bölümü
-            current_section = 'text'
-            location_counter = section_addresses.get(current_section, 0)
-            continue
-        elif line.lower().startswith('.data'):
-            # .data: Veri bölümü
-            current_section = 'data'
-            location_counter = section_addresses.get(current_section, 0x0200)
-            continue
-        elif line.lower().startswith('.bss'):
-            # .bss: Rezerve alan
-            current_section = 'bss'
-            location_counter = section_addresses.get(current_section, 0x0400)
-            continue
+    expr_ops = [op for op in expression.operators if op in '+-*/']
+    unique_types = set(operand_types)
 
-        elif line.lower().startswith('.global'):
-            # .global: Global semboller tanımlar
-            symbols = [s.strip() for s in line[len('.global'):].split(',') if s.strip()]
-            for sym in symbols:
-                symbol_table.setdefault(sym, {
-                    'value': 0,
-                    'type': 'external',
-                    'defined': False,
-                    'section': 'none',
-                    'is_constant': False
-                })
-                symbol_table[sym]['is_global'] = True
-            continue
+    try:
+        if len(unique_types) == 1 and 'absolute' in unique_types:
+            symbol_type = 'absolute'
+        elif unique_types == {'relative'}:
+            if expr_ops == ['-'] and len(operand_types) == 2:
+                symbol_type = 'absolute'
+            else:
+                raise ValueError(f"Line {line.number}: Gecersiz islem.")
+        elif 'relative' in unique_types and 'absolute' in unique_types:
+            raise ValueError(f"Line {line.number}: Gecersiz islem.")
+        elif not operand_types:
+            symbol_type = 'absolute'
+        else:
+            raise ValueError(f"Line {line.number}: Gecersiz islem.")
+    except ValueError as ve:
+        raise ValueError(f"Line {line.number}: .equ/.set ifadesi hatali: {ve}")
 
-        elif line.lower().startswith('.def'):
-            # .def: Sembol tanımlar
-            symbols = [s.strip() for s in line[len('.def'):].split(',') if s.strip()]
-            for sym in symbols:
-                symbol_table[sym] = {
-                    'value': 0,
-                    'type': 'code',
-                    'defined': True,
-                    'section': current_section,
-                    'is_constant': False
-                }
-            continue
+    value = UNRESOLVED_VALUE
+    if not unresolved:
+        try:
+            value = evaluate(expression, symbol_table)
+        except ValueError as e:
+            raise ValueError(f"Line {line.number}: .equ/.set ifadesi hatali: {e}")
+
+    constants.define(label, expression, line.number)
+    symbol_table[label] = {
+        'value': value,
+        'type': symbol_type,
+        'defined': not unresolved,
+        'section': 'const',
+        'is_constant': True,
+        'depends_on': list(expression.symbols) if unresolved else []
+    }
 
-        elif line.lower().startswith('.ref'):
-            # .ref: Dış sembol referansları
-            symbols = [s.strip() for s in line[len('.ref'):].split(',') if s.strip()]
-            for sym in symbols:
-                symbol_table[sym] = {
-                    'value': 0,
-                    'type': 'external',
-                    'defined': False,
-                    'section': 'none',
-                    'is_constant': False
-                }
-            continue
+def pass1(lines, opcode_table=opcode_table, constants=None):
+    """Birinci geçiş: Sembol tablosunu oluşturur
 
-        if line.lower() == ".end":
-            break  # Kod sonu
-
-        if '.equ' in line.lower() or '.set' in line.lower():
-            # .equ/.set: Sabit değer tanımlar
-            parts = re.split(r'\s+', line, maxsplit=2)
-            if len(parts) >= 3 and parts[1].lower() in ['.equ', '.set']:
-                label = parts[0].strip()
-                value_expr = parts[2].strip()
-                value_expr = value_expr.replace('$', f'(0x{location_counter:X})')
-                
-                symbols_in_expr = re.findall(r'\b[A-Za-z_]\w*\b', value_expr)
-                operand_types = []
-                unresolved = False
-
-                for sym in symbols_in_expr:
-                    if sym not in symbol_table or not symbol_table[sym].get("defined", False):
-                        if sym not in symbol_table:
-                            placeholder_value = placeholder_base + placeholder_counter
-                            placeholder_counter += 1
-                            symbol_table[sym] = {
-                                'value': placeholder_value,
-                                'type': 'absolute',
-                                'defined': False,
-                                'placeholder': True,
-                                'forward_references': [label]
-                            }
-                        else:
-                            symbol_table[sym].setdefault('forward_references', []).append(label)
-                        unresolved = True
-                        operand_types.append('absolute')
-                    else:
-                        operand_types.append(symbol_table[sym]['type'])
-
-                expr_ops = re.findall(r'[\+\-\*/]', value_expr)
-                unique_types = set(operand_types)
+    constants verilirse .equ/.set bağımlılık grafiği bu ConstantGraph'a kaydedilir;
+    böylece çağıran taraf sabitleri daha sonra artımlı olarak yeniden hesaplayabilir.
+    """
+    symbol_table = {}
+    if constants is None:
+        constants = ConstantGraph()
+
+    for line in _program(lines, opcode_table):
+        kind = line.kind
+
+        if kind == DIRECTIVE:
+            name = line.mnemonic
+            if name == '.global':
+                # .global: Global semboller tanımlar
+                symbols = [s.strip() for s in line.args.split(',') if s.strip()]
+                for sym in symbols:
+                    symbol_table.setdefault(sym, {
+                        'value': 0,
+                        'type': 'external',
+                        'defined': False,
+                        'section': 'none',
+                        'is_constant': False
+                    })
+                    symbol_table[sym]['is_global'] = True
+                continue
 
-                try:
-                    if len(unique_types) == 1 and 'absolute' in unique_types:
-                        symbol_type = 'absolute'
-                    elif unique_types == {'relative'}:
-                        if expr_ops == ['-'] and len(operand_types) == 2:
-                            symbol_type = 'absolute'
-                        else:
-                            raise ValueError(f"Line {line_num}: Gecersiz islem.")
-                    elif 'relative' in unique_types and 'absolute' in unique_types:
-                        raise ValueError(f"Line {line_num}: Gecersiz islem.")
-                    elif not operand_types:
-                        symbol_type = 'absolute'
-                    else:
-                        raise ValueError(f"Line {line_num}: Gecersiz islem.")
-                except ValueError as ve:
-                    raise ValueError(f"Line {line_num}: .equ/.set ifadesi hatali: {ve}")
+            elif name == '.def':
+                # .def: Sembol tanımlar
+                symbols = [s.strip() for s in line.args.split(',') if s.strip()]
+                for sym in symbols:
+                    symbol_table[sym] = {
+                        'value': 0,
+                        'type': 'code',
+                        'defined': True,
+                        'section': line.section,
+                        'is_constant': False
+                    }
+                continue
 
-                try:
-                    value = eval_value_expression(value_expr, symbol_table)
-                    if not (0 <= value <= 0xFFFF):
-                        raise ValueError(f"Line {line_num}: .equ sonucu 16-bit sinirini asiyor: {value}")
-                except Exception as e:
-                    print(f"DEBUG: Line{line_num} - Expression '{value_expr}' failed: {str(e)}")
-                    value = placeholder_base + 0x7F
-
-                symbol_table[label] = {
-                    'value': value,
-                    'type': symbol_type,
-                    'defined': not unresolved,
-                    'section': 'const',
-                    'is_constant': True,
-                    'depends_on': symbols_in_expr if unresolved else []
-                }
+            elif name == '.ref':
+                # .ref: Dış sembol referansları
+                symbols = [s.strip() for s in line.args.split(',') if s.strip()]
+                for sym in symbols:
+                    symbol_table[sym] = {
+                        'value': 0,
+                        'type': 'external',
+                        'defined': False,
+                        'section': 'none',
+                        'is_constant': False
+                    }
                 continue
 
-        if ':' in line:
-            # Etiket tanımı
-            label_part, rest = line.split(':', 1)
-            label = label_part.strip()
-            line = rest.strip()
+        elif kind == EQU:
+            # .equ/.set: Sabit değer tanımlar; ileri referanslar geçiş sonunda grafikle çözülür
+            define_constant(line, symbol_table, constants)
+            continue
 
+        label = line.label
         if label:
             if label in symbol_table and not (symbol_table[label].get('is_global', False) or symbol_table[label].get('defined', False)):
-                raise ValueError(f"Line {line_num}: Tekrarlanan etiket '{label}'")
+                raise ValueError(f"Line {line.number}: Tekrarlanan etiket '{label}'")
             symbol_table[label] = {
-                'value': location_counter,
+                'value': line.address,
                 'type': 'relative',
                 'defined': True,
-                'section': current_section,
+                'section': line.section,
                 'is_constant': False
             }
 
-        parts = re.split(r'\s+', line, maxsplit=1)
-        mnemonic = parts[0].upper() if parts else ""
-        operands = parts[1] if len(parts) > 1 else ""
-
-        if mnemonic in ['MOV', 'ADD', 'SUB', 'CMP']:
-            # Çift operandlı talimatlar
-            location_counter += 2
-            ops = [op.strip() for op in operands.split(',')] if operands else []
-            for op in ops:
-                if '@' in op or '&' in op or '#' in op:
-                    location_counter += 2
-
-        elif mnemonic in ['JMP', 'JZ', 'JNZ']:
-            # Atlama talimatları
-            location_counter += 2
-        else:
-            location_counter += 2
-
-        section_addresses[current_section] = location_counter
-
-    resolve_forward_references(symbol_table)
+    # İleri referanslı sabitler bağımlılık sırasıyla tek geçişte çözülür
+    constants.resolve(symbol_table)
     return symbol_table
 
 def eval_value_expression(expr, symbol_table):
-    """İfadeleri değerlendirir"""
+    """İfadeleri derlenmiş ifade motoruyla değerlendirir"""
     try:
-        expr = expr.strip()
-        hex_matches = re.findall(r'\b0x[0-9A-Fa-f]+\b', expr)
-        for h in hex_matches:
-            expr = expr.replace(h, str(int(h, 16)))
-        
-        bin_matches = re.findall(r'\b0b[01]+\b', expr)
-        for b in bin_matches:
-            expr = expr.replace(b, str(int(b[2:], 2)))
-        
-        symbols_in_expr = re.findall(r'\b[A-Za-z_]\w*\b', expr)
-        for sym in symbols_in_expr:
-            if sym in symbol_table:
-                sym_entry = symbol_table[sym]
-                if isinstance(sym_entry, dict):
-                    if not sym_entry.get('defined', False):
-                        raise ValueError(f"Tanımsız sembol: {sym}")
-                    expr = expr.replace(sym, str(sym_entry['value']))
-                else:
-                    expr = expr.replace(sym, str(sym_entry))
-            else:
-                raise ValueError(f"Bilinmeyen sembol: {sym}")
-        
-        allowed_chars = set("0123456789+-*/()&|^~<> ")
-        if not all(c in allowed_chars for c in expr):
-            raise ValueError(f"Geçersiz karakterler: {expr}")
-        
-        result = eval(expr, {"_builtins_": None}, {})
-        
-        if -32768 <= result <= 65535:
-            return result & 0xFFFF
-        else:
-            raise ValueError(f"16-bit sınırı aşıldı: {result}")
-            
+        return evaluate(compile_expression(expr.strip()), symbol_table)
     except Exception as e:
         raise ValueError(f"İfade hatası '{expr}': {str(e)}")
 
@@ -535,325 +1092,350 @@ def needs_relocation(operand_info, symbol_table):
             return True
     return False
 
-def pass2(lines, symbol_table, opcode_table):
-    """İkinci geçiş: Makine kodunu üretir"""
-    machine_code = []
+def _extension_word(info, symbol_table, section, location, relocation_entries):
+    """Operandın ek kelimesinin değerini döndürür; tanımsız/dış sembol için relocation ekler"""
+    if needs_relocation(info, symbol_table):
+        relocation_entries.append({
+            "section": section,
+            "offset": location,
+            "symbol": info['label'],
+            "type": "ABSOLUTE_16"
+        })
+        return 0
+    if 'label' in info:
+        label = info['label']
+        if label not in symbol_table:
+            raise ValueError(f"Etiket bulunamadi: {label}")
+        entry = symbol_table[label]
+        if isinstance(entry, dict) and 'value' in entry:
+            return int(entry['value'])
+        return int(entry)
+    if 'value' in info:
+        return int(info['value'])
+    if 'offset' in info:
+        return int(info['offset'])
+    return 0
+
+def _register(info):
+    """Operandın register numarası (register kullanmayan modlarda 0)"""
+    number = _REGISTER_FIELDS.get(info.get('register'))
+    if number is None:
+        raise ValueError(f"Gecersiz register: {info['register']}")
+    return number
+
+_REGISTER_FIELDS = dict(REGISTER_NUMBERS)
+_REGISTER_FIELDS[None] = 0
+
+def _source_operand(encoder, operand, symbol_table, bw_bit, symbol_cache):
+    """Kaynak operandı çözer; sabit üretecinin karşıladığı #sayı ek kelimesiz kodlanır"""
+    constant = encoder.constant(operand)
+    if constant is not None:
+        register, As = constant
+        return {'mode': 'constant', 'As': As, 'register': register}
+    return parse_operand(operand, symbol_table, bw_bit, symbol_cache)
+
+def _operand_fields(encoder, fmt, mnemonic, bw_bit, operands, symbol_table, symbol_cache=None):
+    """Çift/tek operandlı komutun ilk kelime alanlarını ve ek kelime operandlarını çözer
+
+    ((anahtar, kaynak reg, hedef alan), [(operand bilgisi, literal türü)], başvurulan semboller)
+    döndürür.
+    """
+    extensions = []
+    refs = []
+    if fmt == DOUBLE:
+        # Çift operandlı talimatlar: kaynak ve hedef ek kelimeleri sırayla gelir
+        src_info = _source_operand(encoder, operands[0], symbol_table, bw_bit, symbol_cache)
+        dst_info = parse_operand(operands[1], symbol_table, bw_bit, symbol_cache)
+        Ad = 1 if dst_info['mode'] in DST_EXTENSION_MODES else 0
+        fields = (encoder.key(mnemonic, bw_bit, src_info['As'], Ad), _register(src_info), _register(dst_info))
+        if src_info['mode'] in SRC_EXTENSION_MODES:
+            extensions.append((src_info, 'src'))
+        if Ad:
+            extensions.append((dst_info, 'dst'))
+        for info in (src_info, dst_info):
+            if 'label' in info:
+                refs.append(info['label'])
+    elif mnemonic == "RETI":
+        fields = (encoder.key(mnemonic, bw_bit), 0, 0)
+    else:
+        operand = operands[0] if operands else ""
+        if mnemonic == "CALL" and _SYMBOL_OPERAND_RE.match(operand) and operand not in REGISTER_NUMBERS:
+            # CALL etiket: CALL #etiket olarak kodlanır
+            operand = '#' + operand
+        operand_info = _source_operand(encoder, operand, symbol_table, bw_bit, symbol_cache)
+        if 'label' in operand_info:
+            refs.append(operand_info['label'])
+        fields = (encoder.key(mnemonic, bw_bit, operand_info['As']), 0, _register(operand_info))
+        if operand_info['mode'] in SRC_EXTENSION_MODES:
+            extensions.append((operand_info, None))
+    return fields, extensions, refs
+
+def _jump_field(offset_label, symbol_table, section, location, relocation_entries):
+    """Atlama komutunun 10-bit işaretli kelime uzaklığı alanı; tanımsız/dış hedef için relocation ekler"""
+    if offset_label not in symbol_table:
+        raise ValueError(f"Etiket bulunamadi: {offset_label}")
+    entry = symbol_table[offset_label]
+    if not entry['defined'] or entry.get('type') == 'external':
+        relocation_entries.append({
+            "section": section,
+            "offset": location,
+            "symbol": offset_label,
+            "type": "PC_RELATIVE"
+        })
+        return 0
+    if isinstance(entry, dict) and 'value' in entry:
+        target_address = int(entry['value'])
+    else:
+        target_address = int(entry)
+    offset = (target_address - (location + 2)) // 2
+    if not -512 <= offset <= 511:
+        raise ValueError(f"Atlama mesafesi cok uzak: {offset_label}, offset: {offset}")
+    return offset & 0x03FF
+
+def _relaxed_jump(encoder, line, symbol_table, literals_table, relocation_entries):
+    """Uzun biçime çevrilmiş atlamanın kelimeleri
+
+    BR'nin hedef adresi literal olarak kaydedilir; kısa atlamanın aksine mutlak olduğundan
+    linker bölümü taşıdığında yamalansın diye relocation da eklenir.
+    """
+    label = line.operands[0]
+    target = int(symbol_table[label]['value'])
+    words = encoder.relaxed_jump(line.mnemonic, target)
+    location = line.address + 2 * len(words) - 2
+    literals_table.append({'address': location, 'value': target, 'type': 'src'})
+    relocation_entries.append({
+        "section": line.section,
+        "offset": location,
+        "symbol": label,
+        "type": "ABSOLUTE_16"
+    })
+    return words
+
+@lru_cache(maxsize=8192)
+def _static_encoding(encoder, mnemonic, bw_bit, operands):
+    """Sembol içermeyen komutun (alanlar, kelimeler, ((bayt ofseti, değer, literal türü), ...)) kodlaması
+
+    Atlama, tanınmayan komut ya da sembole başvuran operand için None döndürür.
+    """
+    fmt = encoder.formats.get(mnemonic)
+    if fmt is None or fmt == JUMP:
+        return None
+    fields, extensions, refs = _operand_fields(encoder, fmt, mnemonic, bw_bit, operands, {})
+    if refs:
+        return None
+    words = [encoder.word(*fields)]
+    literals = []
+    for info, literal_type in extensions:
+        value = _extension_word(info, {}, None, 0, None)
+        if literal_type:
+            literals.append((2 * len(words), value, literal_type))
+        words.append(value & 0xFFFF)
+    return fields, tuple(words), tuple(literals)
+
+def encode_line(line, symbol_table, opcode_table, symbol_cache=None, deferred=None, out=None):
+    """Tek bir IR satırının makine kodunu üretir
+
+    (kelimeler, literal girişleri, relocation girişleri, başvurulan semboller) döndürür;
+    kelimeler line.address'ten başlayan bir array('H') dizisidir (out verilirse sonuna eklenir).
+    Artımlı derleme yalnızca başvurduğu semboller değişen satırları yeniden kodlar. deferred
+    listesi verilirse komutun ilk kelimesi yerine 0 yazılır ve (anahtar, kaynak reg, hedef alan)
+    deferred'a eklenir; encode_lines() bu kelimeleri toplu olarak üretir.
+    """
+    machine_code = array('H') if out is None else out
     literals_table = []
     relocation_entries = []
-    relocation_data = {}
-    location_counter = 0
-    start_address = None
-    current_section = 'text'
-    section_addresses = {
-        'text': 0,
-        'data': 0x0200,
-        'bss': 0x0400
-    }
-
-    location_counter = section_addresses[current_section]
-
+    refs = []
+    if symbol_cache is None:
+        symbol_cache = {}
+    kind = line.kind
+    current_section = line.section
+    location_counter = line.address
+
+    if kind == DIRECTIVE and line.mnemonic == '.word':
+        # .word: Veri kelimeleri ekler
+        if line.label:
+            symbol_table[line.label] = {'value': location_counter, 'type': 'data', 'defined': True, 'section': current_section, 'is_constant': False}
+            symbol_cache.clear()
+        for value in line.operands:
+            int_value = int(value, 16) if value.lower().startswith('0x') else int(value, 0)
+            machine_code.append(int_value & 0xFFFF)
+            location_counter += 2
+        return machine_code, literals_table, relocation_entries, refs
+
+    if kind != INSTRUCTION:
+        return machine_code, literals_table, relocation_entries, refs
+
+    mnemonic = line.mnemonic
+    encoder = encoder_for(opcode_table)
+    fmt = encoder.formats.get(mnemonic)
+    if fmt is None:
+        # Tanınmayan komutlar kod üretmez
+        return machine_code, literals_table, relocation_entries, refs
+
+    bw_bit = line.byte
+    if fmt != JUMP:
+        # Sembol içermeyen operandların kodlaması satır metnine göre önbellektedir
+        static = _static_encoding(encoder, mnemonic, bw_bit, line.operands)
+        if static is not None:
+            machine_code.extend(static[1])
+            for offset, value, literal_type in static[2]:
+                literals_table.append({'address': location_counter + offset, 'value': value, 'type': literal_type})
+            return machine_code, literals_table, relocation_entries, refs
+        fields, extensions, refs = _operand_fields(encoder, fmt, mnemonic, bw_bit, line.operands,
+                                                   symbol_table, symbol_cache)
+    else:
+        # Atlama talimatları: 10-bit işaretli kelime uzaklığı
+        extensions = ()
+        offset_label = line.operands[0] if line.operands else ""
+        refs.append(offset_label)
+        if line.size != 2:
+            # relax_jumps() menzil dışı atlamayı uzun biçime çevirmiş
+            machine_code.extend(_relaxed_jump(encoder, line, symbol_table, literals_table, relocation_entries))
+            return machine_code, literals_table, relocation_entries, refs
+        fields = (encoder.key(mnemonic), 0, _jump_field(offset_label, symbol_table, current_section, location_counter, relocation_entries))
+
+    if deferred is None:
+        machine_code.append(encoder.word(*fields))
+    else:
+        machine_code.append(0)
+        deferred.append(fields)
+    location_counter += 2
+
+    for info, literal_type in extensions:
+        extra_word = _extension_word(info, symbol_table, current_section, location_counter, relocation_entries)
+        machine_code.append(extra_word & 0xFFFF)
+        if literal_type:
+            literals_table.append({'address': location_counter, 'value': int(extra_word), 'type': literal_type})
+        location_counter += 2
+
+    return machine_code, literals_table, relocation_entries, refs
+
+def encode_lines(lines, symbol_table, opcode_table, symbol_cache=None):
+    """IR satırlarını tek çağrıda kodlar; komutların ilk kelimeleri toplu olarak üretilir
+
+    Kelimeler tek bir array('H') tamponuna yazılır; ardışık adres aralıkları bu tamponun
+    memoryview dilimleri olarak CodeImage'a eklenir. (makine kodu görüntüsü, literal
+    girişleri, relocation girişleri) döndürür.
+    """
+    if symbol_cache is None:
+        symbol_cache = {}
+    out = array('H')
+    literals_table = []
+    relocation_entries = []
+    deferred = []
+    positions = []  # Ertelenen ilk kelimelerin tampondaki indeksleri
+    runs = []       # (adres, tampon indeksi): ardışık aralıkların başlangıçları
+    expected = None
+    encoder = encoder_for(opcode_table)
+    static_encoding = _static_encoding
+    extend = out.extend
     for line in lines:
-        line = line.split(';', 1)[0].strip()
-        if not line:
-            continue
-
-        if line.lower().startswith('.org'):
-            addr = line[len('.org'):].strip()
-            location_counter = int(addr, 16) if addr.lower().startswith('0x') else int(addr, 0)
-            continue
-
-        if line.lower().startswith('.text'):
-            current_section = 'text'
-            location_counter = section_addresses.get(current_section, 0)
-            continue
-        elif line.lower().startswith('.data'):
-            current_section = 'data'
-            location_counter = section_addresses.get(current_section, 0x0200)
-            continue
-        elif line.lower().startswith('.bss'):
-            current_section = 'bss'
-            location_counter = section_addresses.get(current_section, 0x0400)
+        start = len(out)
+        kind = line.kind
+        if kind == INSTRUCTION:
+            # Sembolsüz komutlar önbellekteki kelimeleriyle doğrudan tampona eklenir
+            static = static_encoding(encoder, line.mnemonic, line.byte, line.operands)
+            if static is not None:
+                _, words, literals = static
+                extend(words)
+                address = line.address
+                if address != expected:
+                    runs.append((address, start))
+                expected = address + 2 * len(words)
+                for offset, value, literal_type in literals:
+                    literals_table.append({'address': address + offset, 'value': value, 'type': literal_type})
+                continue
+            if encoder.formats.get(line.mnemonic) == JUMP:
+                # Atlamalar: kısa biçimin ilk kelimesi toplu kodlamaya ertelenir
+                address = line.address
+                if address != expected:
+                    runs.append((address, start))
+                expected = address + line.size
+                if line.size != 2:
+                    extend(_relaxed_jump(encoder, line, symbol_table, literals_table, relocation_entries))
+                    continue
+                label = line.operands[0] if line.operands else ""
+                deferred.append((encoder.key(line.mnemonic), 0,
+                                 _jump_field(label, symbol_table, line.section, address, relocation_entries)))
+                positions.append(start)
+                out.append(0)
+                continue
+        elif kind != DIRECTIVE:
+            # Etiket ve sabit satırları kod üretmez
             continue
-
-        if line.lower() == ".end":
+        pending = len(deferred)
+        _, literals, relocations, _ = encode_line(line, symbol_table, opcode_table, symbol_cache, deferred, out)
+        if len(deferred) != pending:
+            positions.append(start)
+        count = len(out) - start
+        if count:
+            if line.address != expected:
+                runs.append((line.address, start))
+            expected = line.address + 2 * count
+        if literals:
+            literals_table += literals
+        if relocations:
+            relocation_entries += relocations
+
+    for position, word in zip(positions, encoder.words(deferred)):
+        out[position] = word
+
+    view = memoryview(out)
+    ends = [start for _, start in runs[1:]] + [len(out)]
+    machine_code = CodeImage(SectionBuffer(address, view[start:end]) for (address, start), end in zip(runs, ends))
+    return machine_code, literals_table, relocation_entries
+
+def _out_of_range(line, symbol_table):
+    """Kısa atlamanın tanımlı hedefi 10-bit uzaklık menzilinin dışındaysa True"""
+    entry = symbol_table.get(line.operands[0]) if line.operands else None
+    if not isinstance(entry, dict) or not entry.get('defined') or entry.get('type') == 'external':
+        return False  # Relocation ile çözülür
+    offset = (int(entry['value']) - (line.address + 2)) // 2
+    return not -512 <= offset <= 511
+
+def relax_jumps(program, symbol_table, opcode_table, constants):
+    """Menzil dışı atlamaları uzun biçime (BR #hedef) çevirir; adresleri sabit noktaya kadar yeniden atar
+
+    Atlamalar kısa biçimle başlar ve yalnızca uzar; böylece döngü birkaç turda sona erer.
+    Menzildeki atlamalar kısa kalır. Uzatılan atlama sayısını döndürür.
+    """
+    encoder = encoder_for(opcode_table)
+    jumps = [line for line in program if line.kind == INSTRUCTION and line.mnemonic in opcode_table["jump"]]
+    relaxed = 0
+    while True:
+        grown = [line for line in jumps if line.size == 2 and _out_of_range(line, symbol_table)]
+        if not grown:
             break
+        for line in grown:
+            line.size = encoder.relaxed_size(line.mnemonic)
+        relaxed += len(grown)
+        relayout(program, symbol_table, constants)
+    return relaxed
 
-        if line.startswith('.word'):
-            # .word: Veri kelimeleri ekler
-            if ':' in line:
-                label_part, rest = line.split(':', 1)
-                label = label_part.strip()
-                values = [v.strip() for v in re.split(r'\s*,\s*', rest.strip())]
-            else:
-                label = None
-                values = [v.strip() for v in re.split(r'\s*,\s*', line[len('.word'):].strip())]
-            for value in values:
-                int_value = int(value, 16) if value.lower().startswith('0x') else int(value, 0)
-                if label:
-                    symbol_table[label] = {'value': location_counter, 'type': 'data', 'defined': True, 'section': current_section, 'is_constant': False}
-                machine_code.append((location_counter, int_value))
-                location_counter += 2
-            continue
-
-        label = None
-        if ':' in line:
-            label_part, rest = line.split(':', 1)
-            label = label_part.strip()
-            line = rest.strip()
-
-        parts = re.split(r'\s+', line, maxsplit=1)
-        mnemonic = parts[0].upper() if parts else ""
-        operands = parts[1] if len(parts) > 1 else ""
-
-        if not mnemonic:
-            continue
-
-        if mnemonic == "NOP":
-            word = 0x4303
-            machine_code.append((location_counter, int(word)))
-            location_counter += 2
-            continue
-        
-        bw_bit = 1 if mnemonic.endswith(".B") else 0
-        mnemonic_clean = mnemonic.replace(".B", "").replace(".W", "")
-
-        if mnemonic_clean in opcode_table["double_operand"]:
-            # Çift operandlı talimatlar için makine kodu üret
-            ops = [op.strip() for op in operands.split(',')]
-            src_info = parse_operand(ops[0], symbol_table, bw_bit)
-            dst_info = parse_operand(ops[1], symbol_table, bw_bit)
-
-            if ops[0] == "#ext_var":
-                print("\nDEBUG: pass2 içinde - MOV.W #ext_var, R6 satırı")
-                print(f"  Kaynak operand bilgisi: {src_info}")
-                print(f"  'label' alanı var mı? {'label' in src_info}")
-                print(f"  Hedef operand bilgisi: {dst_info}")
-                print(f"  Symbol tablosunda 'ext_var': {symbol_table.get('ext_var', 'YOK')}")
-                print(f"  Tipi: {type(symbol_table.get('ext_var', None))}")
-                print(f"  Relocation gerekli mi? {needs_relocation(src_info, symbol_table)}")
-
-            src_reg = int(src_info['register'][1:]) if 'register' in src_info else 0
-            dst_reg = int(dst_info['register'][1:]) if 'register' in dst_info else 0
-
-            As = src_info['As']
-            Ad = 1 if dst_info['mode'] in ['indexed', 'symbolic', 'absolute'] else 0
-
-            opcode = opcode_table["double_operand"][mnemonic_clean]
-            word = (opcode << 12) | (src_reg << 8) | (Ad << 7) | (bw_bit << 6) | (As << 4) | dst_reg
-            machine_code.append((location_counter, int(word)))
-            location_counter += 2
+def pass2(lines, symbol_table, opcode_table):
+    """İkinci geçiş: Makine kodunu üretir"""
+    # Sembole bağlı operand sonuçları; sembol tablosu her değiştiğinde yeni nesil başlar
+    symbol_cache = {}
 
-            if src_info['mode'] in ['immediate', 'indexed', 'absolute', 'symbolic']:
-                if needs_relocation(src_info, symbol_table):
-                    # Relocation girişi ekle
-                    relocation_entries.append({
-                        "section": current_section,
-                        "offset": location_counter,
-                        "symbol": src_info['label'],
-                        "type": "ABSOLUTE_16"
-                    })
-                    print(f"Added relocation entry: section={current_section}, offset={location_counter}, symbol={src_info['label']}")
-                    extra_word = 0
-                else:
-                    if 'label' in src_info:
-                        if src_info['label'] not in symbol_table:
-                            raise ValueError(f"Etiket bulunamadi: {src_info['label']}")
-                        if isinstance(symbol_table[src_info['label']], dict) and 'value' in symbol_table[src_info['label']]:
-                            extra_word = int(symbol_table[src_info['label']]['value'])
-                        else:
-                            extra_word = int(symbol_table[src_info['label']])
-                    elif 'value' in src_info:
-                        extra_word = int(src_info['value'])
-                    else:
-                        extra_word = 0
-                
-                machine_code.append((location_counter, int(extra_word)))
-                literals_table.append({'address': location_counter, 'value': int(extra_word), 'type': 'src'})
-                location_counter += 2
-
-            if dst_info['mode'] in ['indexed', 'absolute', 'symbolic']:
-                if needs_relocation(dst_info, symbol_table):
-                    # Relocation girişi ekle
-                    relocation_entries.append({
-                        "section": current_section,
-                        "offset": location_counter,
-                        "symbol": dst_info['label'],
-                        "type": "ABSOLUTE_16"
-                    })
-                    print(f"Added relocation entry: section={current_section}, offset={location_counter}, symbol={dst_info['label']}")
-                    extra_word = 0
-                else:
-                    if 'label' in dst_info:
-                        if dst_info['label'] not in symbol_table:
-                            raise ValueError(f"Etiket bulunamadi: {dst_info['label']}")
-                        if isinstance(symbol_table[dst_info['label']], dict) and 'value' in symbol_table[dst_info['label']]:
-                            extra_word = int(symbol_table[dst_info['label']]['value'])
-                        else:
-                            extra_word = int(symbol_table[dst_info['label']])
-                    elif 'value' in dst_info:
-                        extra_word = int(dst_info['value'])
-                    elif 'offset' in dst_info:
-                        extra_word = int(dst_info['offset'])
-                    else:
-                        extra_word = 0
-                
-                machine_code.append((location_counter, int(extra_word)))
-                literals_table.append({'address': location_counter, 'value': int(extra_word), 'type': 'dst'})
-                location_counter += 2
-
-        elif mnemonic_clean in opcode_table["single_operand"]:
-            if mnemonic_clean == "RETI":
-                word = 0x1300
-                machine_code.append((location_counter, int(word)))
-                location_counter += 2
-            else:
-                operand_info = parse_operand(operands, symbol_table, bw_bit)
-                reg = int(operand_info['register'][1:]) if 'register' in operand_info else 0
-                As = operand_info['As']
-                
-                if mnemonic_clean == "PUSH":
-                    word = (4 << 12) | (reg << 8) | (As << 4) | 0
-                    machine_code.append((location_counter, int(word)))
-                    location_counter += 2
-                    
-                    if operand_info['mode'] in ['immediate', 'indexed', 'absolute', 'symbolic']:
-                        if needs_relocation(operand_info, symbol_table):
-                            relocation_entries.append({
-                                "section": current_section,
-                                "offset": location_counter,
-                                "symbol": operand_info['label'],
-                                "type": "ABSOLUTE_16"
-                            })
-                            print(f"Added relocation entry: section={current_section}, offset={location_counter}, symbol={operand_info['label']}")
-                            extra_word = 0
-                        else:
-                            if 'label' in operand_info:
-                                if operand_info['label'] not in symbol_table:
-                                    raise ValueError(f"Etiket bulunamadi: {operand_info['label']}")
-                                if isinstance(symbol_table[operand_info['label']], dict) and 'value' in symbol_table[operand_info['label']]:
-                                    extra_word = int(symbol_table[operand_info['label']]['value'])
-                                else:
-                                    extra_word = int(symbol_table[operand_info['label']])
-                            elif 'value' in operand_info:
-                                extra_word = int(operand_info['value'])
-                            elif 'offset' in operand_info:
-                                extra_word = int(operand_info['offset'])
-                            else:
-                                extra_word = 0
-                        
-                        machine_code.append((location_counter, int(extra_word)))
-                        location_counter += 2
-
-                elif mnemonic_clean == "CALL":
-                    word = 0x1280
-                    machine_code.append((location_counter, int(word)))
-                    location_counter += 2
-                    
-                    target = operands.strip().lstrip('#')
-                    op_info = {'label': target, 'mode': 'immediate'}
-                    print(f"CALL target: {target}, defined: {target in symbol_table and symbol_table[target].get('defined', False)}")
-                    
-                    if needs_relocation(op_info, symbol_table):
-                        relocation_entries.append({
-                            "section": current_section,
-                            "offset": location_counter,
-                            "symbol": target,
-                            "type": "ABSOLUTE_16"
-                        })
-                        print(f"Added relocation entry: section={current_section}, offset={location_counter}, symbol={target}")
-                        target_value = 0
-                    else:
-                        if target not in symbol_table:
-                            raise ValueError(f"Etiket bulunamadi: {target}")
-                        if isinstance(symbol_table[target], dict) and 'value' in symbol_table[target]:
-                            target_value = int(symbol_table[target]['value'])
-                        else:
-                            target_value = int(symbol_table[target])
-                    
-                    machine_code.append((location_counter, int(target_value)))
-                    location_counter += 2
-                else:
-                    mod = {'RRC': 0, 'SWPB': 1, 'RRA': 2, 'SXT': 3}.get(mnemonic_clean, 0)
-                    word = (1 << 15) | (0 << 13) | (mod << 7) | (bw_bit << 6) | (As << 4) | reg
-                    machine_code.append((location_counter, int(word)))
-                    location_counter += 2
-                    
-                    if operand_info['mode'] in ['immediate', 'indexed', 'absolute', 'symbolic']:
-                        if needs_relocation(operand_info, symbol_table):
-                            relocation_entries.append({
-                                "section": current_section,
-                                "offset": location_counter,
-                                "symbol": operand_info['label'],
-                                "type": "ABSOLUTE_16"
-                            })
-                            print(f"Added relocation entry: section={current_section}, offset={location_counter}, symbol={operand_info['label']}")
-                            extra_word = 0
-                        else:
-                            if 'label' in operand_info:
-                                if operand_info['label'] not in symbol_table:
-                                    raise ValueError(f"Etiket bulunamadi: {operand_info['label']}")
-                                if isinstance(symbol_table[operand_info['label']], dict) and 'value' in symbol_table[operand_info['label']]:
-                                    extra_word = int(symbol_table[operand_info['label']]['value'])
-                                else:
-                                    extra_word = int(symbol_table[operand_info['label']])
-                            elif 'value' in operand_info:
-                                extra_word = int(operand_info['value'])
-                            elif 'offset' in operand_info:
-                                extra_word = int(operand_info['offset'])
-                            else:
-                                extra_word = 0
-                        
-                        machine_code.append((location_counter, int(extra_word)))
-                        location_counter += 2
-
-        elif mnemonic_clean in opcode_table["jump"]:
-            # Atlama talimatları için makine kodu üret
-            offset_label = operands.strip()
-            if offset_label not in symbol_table:
-                raise ValueError(f"Etiket bulunamadi: {offset_label}")
-            
-            if not symbol_table[offset_label]['defined'] or symbol_table[offset_label].get('type') == 'external':
-                relocation_entries.append({
-                    "section": current_section,
-                    "offset": location_counter,
-                    "symbol": offset_label,
-                    "type": "PC_RELATIVE"
-                })
-                print(f"Added relocation entry: section={current_section}, offset={location_counter}, symbol={offset_label}")
-                offset = 0
-            else:
-                if isinstance(symbol_table[offset_label], dict) and 'value' in symbol_table[offset_label]:
-                    target_address = int(symbol_table[offset_label]['value'])
-                else:
-                    target_address = int(symbol_table[offset_label])
-                
-                offset = (target_address - (location_counter + 2)) // 2
-                
-                if not -1024 <= offset <= 1023:
-                    raise ValueError(f"Atlama mesafesi cok uzak: {offset_label}, offset: {offset}")
-            
-            opcode_base = opcode_table["jump"][mnemonic_clean]
-            word = opcode_base | (offset & 0x03FF)
-            machine_code.append((location_counter, int(word)))
-            location_counter += 2
+    machine_code, literals_table, relocation_entries = encode_lines(_program(lines, opcode_table), symbol_table, opcode_table, symbol_cache)
 
-        else:
-            continue
+    relocation_data = _relocation_data(machine_code, relocation_entries, symbol_table)
 
-    if start_address is not None:
-        machine_code.append((0xFFFE, int(start_address)))
+    return machine_code, literals_table, relocation_entries, relocation_data
 
-    relocation_data = {
+def _relocation_data(machine_code, relocation_entries, symbol_table):
+    """Nesne dosyası için relocation ve bölüm bilgisini toplar"""
+    return {
         'entries': relocation_entries,
         'symbol_table': symbol_table,
         'section_info': {
             'text': {
                 'start': 0, 
-                'size': len([mc for mc in machine_code if mc[0] < 0x0200]) * 2
+                'size': machine_code.size(0, DATA_START) * 2
             },
             'data': {
                 'start': 0x0200, 
-                'size': len([mc for mc in machine_code if 0x0200 <= mc[0] < 0x0400]) * 2
+                'size': machine_code.size(DATA_START, BSS_START) * 2
             },
             'bss': {
                 'start': 0x0400, 
@@ -862,40 +1444,34 @@ def pass2(lines, symbol_table, opcode_table):
         }
     }
 
-    print(f"pass2'dan dönen relocation_entries: {relocation_entries}")
-    return machine_code, literals_table, relocation_entries, relocation_data
+def assemble(assembly_code, output=None, listing=None):
+    """Assembly kodunu yeni bir Assembler ile derler; dosya yalnızca output verilirse yazılır"""
+    return Assembler(output=output, listing=listing).assemble(assembly_code)
+
+def create_object_file(machine_code, symbol_table, literals, relocation_entries=None, relocation_data=None, filename="output.o", listing=None):
+    """ELF32 (EM_MSP430) nesne dosyası oluşturur; istenirse metin listesini de yazar"""
+    # .data bölümü adresleri ve sembolleri bölüm başına göre (relatif) yazılır; tamponlar kopyalanmaz
+    data, text = machine_code.split(DATA_START, BSS_START)
+
+    symbols = {}
+    for symbol, info in symbol_table.items():
+        if isinstance(info, dict) and info.get('section') == 'data' and info.get('value', 0) >= DATA_START:
+            info = dict(info, value=info['value'] - DATA_START)
+        symbols[symbol] = info
+
+    relocations = []
+    for entry in relocation_entries or []:
+        if entry['section'] == 'data':
+            entry = dict(entry, offset=entry['offset'] - DATA_START)
+        relocations.append(entry)
+
+    write_elf(filename, text, data, symbols, relocations)
+    if listing:
+        create_listing_file(machine_code, symbol_table, literals, relocation_entries, relocation_data, listing)
+    return filename
 
-def assemble(assembly_code):
-    """Assembly kodunu derler"""
-    lines = assembly_code.strip().split('\n')
-    
-    # Makroları ayrıştır ve genişlet
-    parse_macros(lines)
-    lines = expand_macros(lines)
-    
-    # Sembol tablosunu oluştur
-    symbol_table = pass1(lines)
-    # Makine kodunu üret
-    machine_code, literals, relocation_entries, relocation_data = pass2(lines, symbol_table, opcode_table)
-    
-    formatted_machine_code = []
-    for addr, code in machine_code:
-        formatted_machine_code.append((addr, code))
-    
-    # ELF nesne dosyasını oluştur
-    create_object_file(
-        machine_code,
-        symbol_table,
-        literals,
-        relocation_entries=relocation_entries,
-        relocation_data=relocation_data,
-        filename="output.elf"
-    )
-
-    return formatted_machine_code, symbol_table, literals, relocation_entries, relocation_data
-
-def create_object_file(machine_code, symbol_table, literals, relocation_entries=None, relocation_data=None, filename="output.o"):
-    """ELF nesne dosyası oluşturur"""
+def create_listing_file(machine_code, symbol_table, literals, relocation_entries=None, relocation_data=None, filename="output.lst"):
+    """Nesne dosyasının okunabilir metin listesini oluşturur (--listing)"""
     with open(filename, 'w') as f:
         f.write("ELF Object File\n")
         f.write("=================\n\n")
@@ -985,6 +1561,8 @@ class AssemblerGUI:
         self.root.geometry("1000x700")
         
         self.relocation_data = None
+        # "Derle" önceki derlemeyi saklayan assembler ile artımlı çalışır
+        self.assembler = Assembler()
 
         self.style = ttk.Style()
         self.style.theme_use('clam')
@@ -1108,7 +1686,7 @@ inner
             self.status_var.set("Derleniyor...")
             self.status_bar.configure(background='#FF9800', foreground='white')
             assembly_code = self.input_text.get("1.0", tk.END)
-            machine_code, symbol_table, literals, relocation_entries, relocation_data = assemble(assembly_code)
+            machine_code, symbol_table, literals, relocation_entries, relocation_data = self.assembler.reassemble(assembly_code)
 
             print(f"GUI'de alınan relocation_entries: {relocation_entries}")
             print(f"GUI Literals Before Display: {literals}, types: {[type(lit['value']) for lit in literals]}")
@@ -1174,9 +1752,9 @@ inner
             return
 
         try:
-            with open(self.object_filename, 'r') as f:
+            with open(self.object_filename, 'rb') as f:
                 content = f.read()
-            with open(self.object_filename, 'w') as f:
+            with open(self.object_filename, 'wb') as f:
                 f.write(content)
             self.status_var.set(f"ELF Obje dosyasi kaydedildi: {self.object_filename}")
             self.status_bar.configure(background='#4CAF50', foreground='white')
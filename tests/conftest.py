@@ -0,0 +1,7 @@
+# conftest.py
+# Testler depo kökündeki düz modülleri (test4, simulator, ...) doğrudan içe aktarır
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,67 @@
+# test_asm_ir.py
+# Ortak IR: tokenize() ile hesaplanan boyut ve adresler pass2'nin ürettiği kodla birebir örtüşmeli
+
+import contextlib
+import io
+import random
+
+from asm_ir import EQU, tokenize
+from test4 import opcode_table, pass1, pass2
+
+OPERANDS = ('R4', 'R5', '@R6', '@R7+', '2(R8)', '-4(R9)', '&0x0200', '&tbl', 'tbl', 'lbl{0}')
+IMMEDIATES = ('#0', '#1', '#2', '#4', '#8', '#-1', '#0x1234', '#1234h', '#101b', "#'A'", '#N', '#lbl{0}')
+
+def _source(rng, count=120):
+    lines = ["N .equ 7", ".text"]
+    for i in range(count):
+        label = f"lbl{i}: " if rng.random() < 0.3 else "    "
+        kind = rng.random()
+        if kind < 0.45:
+            src = rng.choice(OPERANDS + IMMEDIATES).format(rng.randrange(count))
+            dst = rng.choice(OPERANDS).format(rng.randrange(count))
+            text = f"{rng.choice(('MOV', 'ADD', 'SUB', 'CMP', 'BIS', 'XOR'))}{rng.choice(('', '.B', '.W'))} {src}, {dst}"
+        elif kind < 0.65:
+            operand = rng.choice(OPERANDS + IMMEDIATES).format(rng.randrange(count))
+            text = f"{rng.choice(('PUSH', 'CALL'))} {operand}"
+        elif kind < 0.75:
+            text = f"{rng.choice(('JMP', 'JNE', 'JEQ'))} lbl{rng.randrange(count)}"
+        elif kind < 0.85:
+            text = rng.choice(("RET", "NOP", "RETI", "CLRC", "INC R5", "TST 2(R4)"))
+        elif kind < 0.9:
+            text = f".word {', '.join(str(rng.randrange(100)) for _ in range(rng.randrange(1, 4)))}"
+        elif kind < 0.95:
+            text = "; yorum"
+        else:
+            text = ""
+        lines.append(label + text + (" ; açıklama" if rng.random() < 0.2 else ""))
+    lines += [".data", "tbl: .word 1, 2, 3"]
+    # Atlama hedefleri kısa menzilde kalsın diye tüm etiketler tanımlanır
+    lines += [f"lbl{i}: NOP" for i in range(count) if f"lbl{i}:" not in "\n".join(lines)]
+    return lines
+
+def test_ir_sizes_match_encoded_words():
+    rng = random.Random(11)
+    for _ in range(20):
+        lines = _source(rng)
+        program = tokenize(lines, opcode_table)
+        with contextlib.redirect_stdout(io.StringIO()):
+            symbol_table = pass1(program, opcode_table)
+            machine_code = pass2(program, symbol_table, opcode_table)[0]
+        expected = sorted(line.address + offset for line in program for offset in range(0, line.size, 2))
+        assert sorted(address for address, _ in machine_code) == expected
+        for line in program:
+            if line.label and line.kind != EQU:
+                assert symbol_table[line.label]['value'] == line.address, line.number
+
+def test_raw_lines_match_shared_ir():
+    rng = random.Random(12)
+    for _ in range(10):
+        lines = _source(rng, 60)
+        with contextlib.redirect_stdout(io.StringIO()):
+            raw_symbols = pass1(list(lines), opcode_table)
+            raw = pass2(list(lines), raw_symbols, opcode_table)
+            program = tokenize(lines, opcode_table)
+            symbols = pass1(program, opcode_table)
+            shared = pass2(program, symbols, opcode_table)
+        assert raw_symbols == symbols
+        assert list(raw[0]) == list(shared[0]) and raw[1:3] == shared[1:3]
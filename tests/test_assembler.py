@@ -0,0 +1,62 @@
+# test_assembler.py
+# Assembler: her nesne kendi makro durumunu taşır; yeniden kullanım ve eşzamanlı derleme taze nesneyle aynı sonucu vermeli
+
+import contextlib
+import io
+from concurrent.futures import ThreadPoolExecutor
+
+import test4
+from test4 import Assembler
+
+WAIT = """.macro WAIT n
+l?: DEC n
+    JNE l?
+.endm
+"""
+
+SOURCES = [
+    WAIT + "start: WAIT R5\n    WAIT R6\n    JMP start",
+    ".macro WAIT n\n    NOP\n    MOV #n, R4\n.endm\n    WAIT 7\nend: JMP end",
+    WAIT + ".rept 3\n    WAIT R7\n.endr\n    RET",
+    "N .equ 3\n.if N > 2\n    MOV #N, R4\n.else\n    NOP\n.endif\n    RET",
+]
+
+def _compile(assemble, source):
+    """Derleme sonucunu karşılaştırılabilir biçime getirir; hatalar da sonuç sayılır"""
+    try:
+        machine_code, symbol_table, literals, relocations, relocation_data = assemble(source)
+    except Exception as e:
+        return 'hata', str(e)
+    return sorted(machine_code), {name: dict(entry) for name, entry in symbol_table.items()}, literals, relocations
+
+def _result(assemble, source):
+    """Derleyici çıktısını bastırarak _compile çağırır"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        return _compile(assemble, source)
+
+def test_reused_assembler_matches_fresh():
+    assembler = Assembler()
+    for source in SOURCES + SOURCES[::-1]:
+        assert _result(assembler.assemble, source) == _result(Assembler().assemble, source)
+    # Benzersiz etiket sayacı her derlemede baştan başlar
+    assert 'l.1' in _result(assembler.assemble, SOURCES[0])[1]
+
+def test_macros_do_not_leak_between_calls():
+    _result(test4.assemble, SOURCES[0])
+    assert _result(test4.assemble, "    WAIT R5") == _result(Assembler().assemble, "    WAIT R5")
+    # Tanımsız makro bilinmeyen komut olarak kod üretmez
+    assert _result(test4.assemble, "    WAIT R5")[0] == []
+
+def test_interleaved_streams_are_independent():
+    first, second = Assembler(), Assembler()
+    a, b = first._stream(SOURCES[0]), second._stream(SOURCES[1])
+    merged = [(x, y) for x, y in zip(a, b)]
+    expected = zip(Assembler()._stream(SOURCES[0]), Assembler()._stream(SOURCES[1]))
+    assert merged == list(expected)
+
+def test_threads_match_sequential():
+    expected = [_result(Assembler().assemble, source) for source in SOURCES]
+    # sys.stdout iş parçacıkları arasında paylaşıldığından bir kez yönlendirilir
+    with contextlib.redirect_stdout(io.StringIO()), ThreadPoolExecutor(max_workers=4) as pool:
+        results = list(pool.map(lambda source: _compile(Assembler().assemble, source), SOURCES * 8))
+    assert results == expected * 8
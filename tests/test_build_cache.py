@@ -0,0 +1,76 @@
+# test_build_cache.py
+# Kalıcı derleme önbelleği: include dosyaları değişince ya da gölgelenince eski nesne kullanılmamalı; komut satırında yalnızca istenirse açılır
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+from msp430_as import assemble_file
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SOURCE = '.include "defs.inc"\n.text\nMOV #VALUE, R5\n'
+
+def _build(tmp_path, include_dir):
+    source = tmp_path / "src" / "main.asm"
+    output = tmp_path / "main.elf"
+    _, _, _, error, cached = assemble_file(str(source), str(output), include_paths=[str(include_dir)],
+                                           cache_dir=str(tmp_path / "cache"))
+    assert error is None
+    return output.read_bytes(), cached
+
+def _setup(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "src").mkdir()
+    (tmp_path / "inc").mkdir()
+    (tmp_path / "src" / "main.asm").write_text(SOURCE)
+    (tmp_path / "inc" / "defs.inc").write_text("VALUE .equ 0x1234\n")
+
+def test_unchanged_source_hits(tmp_path, monkeypatch):
+    _setup(tmp_path, monkeypatch)
+    first, cached = _build(tmp_path, tmp_path / "inc")
+    assert not cached
+    second, cached = _build(tmp_path, tmp_path / "inc")
+    assert cached and second == first
+
+def test_edited_include_misses(tmp_path, monkeypatch):
+    _setup(tmp_path, monkeypatch)
+    first, _ = _build(tmp_path, tmp_path / "inc")
+    (tmp_path / "inc" / "defs.inc").write_text("VALUE .equ 0x4321\n")
+    second, cached = _build(tmp_path, tmp_path / "inc")
+    assert not cached and second != first
+
+def test_shadowing_include_misses(tmp_path, monkeypatch):
+    _setup(tmp_path, monkeypatch)
+    first, _ = _build(tmp_path, tmp_path / "inc")
+    # Kaynağın dizini -I dizininden önce aranır: yeni dosya eskisini gölgeler
+    (tmp_path / "src" / "defs.inc").write_text("VALUE .equ 0x4321\n")
+    second, cached = _build(tmp_path, tmp_path / "inc")
+    assert not cached and second != first
+    third, cached = _build(tmp_path, tmp_path / "inc")
+    assert cached and third == second
+
+def _cli(tmp_path, script, *args):
+    """Aracı XDG_CACHE_HOME ve HOME geçici dizine yönlendirilmiş bir süreçte çalıştırır"""
+    env = dict(os.environ, XDG_CACHE_HOME=str(tmp_path / "xdg"), HOME=str(tmp_path / "home"))
+    env.pop('MSP430_CACHE_DIR', None)
+    result = subprocess.run([sys.executable, os.path.join(ROOT, script), *args], cwd=tmp_path, env=env,
+                            capture_output=True, text=True)
+    assert result.returncode == 0, result.stdout + result.stderr
+    return result.stdout
+
+@pytest.mark.parametrize('script, args', [
+    ('msp430_as.py', ['main.asm', '-o', 'obj']),
+    ('linker.py', [os.path.join(ROOT, 'main.elf'), os.path.join(ROOT, 'utils.elf'), '-o', 'linked.elf']),
+])
+def test_cli_cache_is_opt_in(tmp_path, script, args):
+    (tmp_path / "main.asm").write_text(".text\nMOV #1, R5\n")
+    _cli(tmp_path, script, *args)
+    assert not (tmp_path / "xdg").exists() and not (tmp_path / "home").exists()
+    _cli(tmp_path, script, *args, '--cache')
+    assert (tmp_path / "xdg" / "msp430").is_dir() and not (tmp_path / "home").exists()
+    assert 'önbellekten' in _cli(tmp_path, script, *args, '--cache')
+    _cli(tmp_path, script, *args, '--cache-dir', 'own')
+    assert (tmp_path / "own").is_dir()
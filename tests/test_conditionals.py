@@ -0,0 +1,92 @@
+# test_conditionals.py
+# Koşullu derleme: .if/.elif/.else/.endif akışı, pasif dalları elle silinmiş kaynakla aynı olmalı
+
+import contextlib
+import io
+import random
+
+import pytest
+
+from test4 import Assembler
+
+HEADER = ["A .equ 1", "B .equ 0", "C .equ A + 2", "start: NOP"]
+CONDITIONS = {"A": True, "B": False, "C == 3": True, "C > 3": False, "A && !B": True, "B || C < 2": False,
+              "(C & 2) != 0": True, "-A + 1": False}
+DEFINED = {"A": True, "start": True, "C": True, "undefined_sym": False, "later": False}
+# Pasif dallar ayrıştırılmaz; bu satırlar etkin olsaydı hata verirdi
+GARBAGE = ("    MOV ###, R99", "    .rept", "    BILINMEYEN_MAKRO 1, 2, 3", "    .equ", "x .equ (")
+
+def _block(rng, depth, counter, live=True):
+    """Rastgele koşul bloğu: (kaynak satırları, etkin satırlar)"""
+    source, chosen = [], None
+    branches = rng.randrange(1, 4)
+    for i in range(branches):
+        if i == 0:
+            kind = rng.choice(('.if', '.ifdef', '.ifndef'))
+        else:
+            kind = '.else' if i == branches - 1 and rng.random() < 0.5 else '.elif'
+        if kind in ('.if', '.elif'):
+            condition = rng.choice(list(CONDITIONS))
+            taken = CONDITIONS[condition]
+        elif kind == '.else':
+            condition, taken = '', True
+        else:
+            condition = rng.choice(list(DEFINED))
+            taken = DEFINED[condition] == (kind == '.ifdef')
+        source.append(f"{kind} {condition}".rstrip())
+        body, active = _body(rng, depth, counter, live and taken and chosen is None)
+        source += body
+        if chosen is None and taken:
+            chosen = active
+    source.append(".endif")
+    return source, chosen or []
+
+def _body(rng, depth, counter, live):
+    source, active = [], []
+    for _ in range(rng.randrange(0, 4)):
+        if depth and rng.random() < 0.4:
+            block, lines = _block(rng, depth - 1, counter, live)
+            source += block
+            active += lines
+        else:
+            counter[0] += 1
+            line = f"    MOV #{counter[0]}, R4"
+            source.append(line)
+            active.append(line)
+    # Pasif dallara, etkin olsaydı hata verecek satırlar eklenir
+    source.append("    ; yorum" if live else rng.choice(GARBAGE))
+    active.append(source[-1])
+    return source, active
+
+@pytest.mark.parametrize('seed', range(30))
+def test_stream_matches_pruned_source(seed):
+    rng = random.Random(seed)
+    counter = [0]
+    source, expected = list(HEADER), list(HEADER)
+    for _ in range(4):
+        block, lines = _block(rng, 3, counter)
+        source += block
+        expected += lines
+    assert list(Assembler()._stream("\n".join(source))) == expected
+
+def test_assembled_output_matches_pruned_source():
+    source = "\n".join(HEADER + [".if C == 3", "    MOV #1, R4", ".ifdef B", "    MOV #2, R4", ".else",
+                                 "    MOV #3, R4", ".endif", ".elif A", "    MOV #4, R4", ".else",
+                                 "    MOV ###, R99", ".endif", ".ifndef later", "    RET", ".endif"])
+    pruned = "\n".join(HEADER + ["    MOV #1, R4", "    MOV #2, R4", "    RET"])
+    results = []
+    for text in (source, pruned):
+        with contextlib.redirect_stdout(io.StringIO()):
+            machine_code, symbol_table, *_ = Assembler().assemble(text)
+        results.append((sorted(machine_code), symbol_table))
+    assert results[0] == results[1]
+
+@pytest.mark.parametrize('source, message', [
+    (".if A\n    NOP", "'.if' için .endif bulunamadı"),
+    ("    NOP\n.endif", "'.endif' için .if bulunamadı"),
+    (".else", "'.else' için .if bulunamadı"),
+    (".if later\n.endif", "'.if' ifadesi çözülemedi"),
+])
+def test_invalid_conditionals_are_reported(source, message):
+    with pytest.raises(ValueError, match=message):
+        list(Assembler()._stream("A .equ 1\n" + source))
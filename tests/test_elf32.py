@@ -0,0 +1,72 @@
+# test_elf32.py
+# İkili ELF32 yazıcı/okuyucu: gidiş-dönüş ve boşluklu bölümler
+
+import contextlib
+import io
+import os
+from array import array
+
+from elf32 import EHDR, ET_EXEC, SHDR, SHT_PROGBITS, CodeImage, SectionWords, parse_elf, write_elf
+from test4 import Assembler
+
+SYMBOLS = {
+    'start': {'value': 0xF800, 'type': 'relative', 'defined': True, 'section': 'text', 'is_constant': False, 'is_global': True},
+    'ext': {'value': 0, 'type': 'external', 'defined': False, 'section': 'none', 'is_constant': False},
+}
+RELOCATIONS = [{'section': 'text', 'offset': 0xF802, 'symbol': 'ext', 'type': 'ABSOLUTE_16'}]
+
+def _write(tmp_path, text, data=None, **kwargs):
+    path = str(tmp_path / "out.elf")
+    write_elf(path, text, data if data is not None else CodeImage(), SYMBOLS, RELOCATIONS, **kwargs)
+    with open(path, 'rb') as f:
+        return bytearray(f.read())
+
+def _progbits(buf):
+    ehdr = EHDR.unpack_from(buf, 0)
+    shoff, shnum = ehdr[6], ehdr[12]
+    headers = [SHDR.unpack_from(buf, shoff + i * SHDR.size) for i in range(shnum)]
+    return [(h[3], h[5]) for h in headers if h[1] == SHT_PROGBITS]
+
+def _sparse_text():
+    text = CodeImage()
+    text.write(0xF800, array('H', (0x4031, 0x0000, 0x3FFF)))
+    text.write(0xFFFE, array('H', (0xF800,)))
+    return text
+
+def test_round_trip(tmp_path):
+    text = _sparse_text()
+    data = CodeImage()
+    data.write(0x0200, array('H', (1, 2, 3)))
+    obj = parse_elf(_write(tmp_path, text, data))
+    assert list(obj['text']) == list(text)
+    assert list(obj['data']) == list(data)
+    assert obj['symbols']['start']['value'] == 0xF800 and obj['symbols']['start']['section'] == 'text'
+    assert not obj['symbols']['ext']['defined']
+    assert obj['relocations'] == RELOCATIONS
+
+def test_sparse_section_is_not_zero_filled(tmp_path):
+    buf = _write(tmp_path, _sparse_text())
+    assert sorted(_progbits(buf)) == [(0, 0), (0xF800, 6), (0xFFFE, 2)]
+    assert len(buf) < 1024
+
+def test_pairs_and_overlaps(tmp_path):
+    # Ardışık çiftler tek parçada birleşir; aynı adrese sonraki yazım kazanır
+    text = SectionWords()
+    for addr, word in ((0x10, 1), (0x12, 2), (0x40, 3), (0x12, 4)):
+        text.append(addr, word)
+    obj = parse_elf(_write(tmp_path, text))
+    assert list(obj['text']) == [(0x10, 1), (0x12, 4), (0x40, 3)]
+
+def test_executable_has_one_segment_per_run(tmp_path):
+    buf = _write(tmp_path, _sparse_text(), elf_type=ET_EXEC, entry=0xF800)
+    obj = parse_elf(buf)
+    assert EHDR.unpack_from(buf, 0)[10] == 2 and obj['entry'] == 0xF800
+
+def test_assembled_reset_vector(tmp_path):
+    output = str(tmp_path / "vector.elf")
+    with contextlib.redirect_stdout(io.StringIO()):
+        Assembler(output=output).assemble(".org 0xF800\nstart: MOV #0x0400, R1\nhalt: JMP halt\n.org 0xFFFE\n.word 0xF800\n")
+    assert os.path.getsize(output) < 1024
+    with open(output, 'rb') as f:
+        words = dict(parse_elf(bytearray(f.read()))['text'])
+    assert words == {0xF800: 0x4031, 0xF802: 0x0400, 0xF804: 0x3FFF, 0xFFFE: 0xF800}
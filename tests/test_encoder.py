@@ -0,0 +1,92 @@
+# test_encoder.py
+# Tablo tabanlı kodlayıcı: bilinen kodlamalar, toplu ve tek tek kodlamanın eşitliği
+
+import contextlib
+import io
+import random
+
+import pytest
+
+import encoder as encoder_module
+from asm_ir import tokenize
+from encoder import NUMPY_MIN_BATCH, encoder_for
+from test4 import encode_line, encode_lines, opcode_table, pass1
+
+# Kaynak satırı -> beklenen kelimeler (MSP430x1xx kılavuzundaki kodlamalar)
+KNOWN = (
+    ("NOP", (0x4303,)),
+    ("MOV #0, R5", (0x4305,)),
+    ("MOV #1, R5", (0x4315,)),
+    ("MOV #2, R5", (0x4325,)),
+    ("MOV #4, R5", (0x4225,)),
+    ("MOV #8, R5", (0x4235,)),
+    ("MOV #-1, R5", (0x4335,)),
+    ("MOV #0xFFFF, R5", (0x4335,)),
+    ("MOV #3, R5", (0x4035, 0x0003)),
+    ("TST R5", (0x9305,)),
+    ("TST.B R5", (0x9345,)),
+    ("DEC R5", (0x8315,)),
+    ("INC 2(R5)", (0x5395, 0x0002)),
+    ("CLR &0x0200", (0x4382, 0x0200)),
+    ("INV R6", (0xE336,)),
+    ("RLA R7", (0x5707,)),
+    ("PUSH #8", (0x1232,)),
+    ("PUSH R5", (0x1205,)),
+    ("POP R5", (0x4135,)),
+    ("BR R5", (0x4500,)),
+    ("DINT", (0xC232,)),
+    ("EINT", (0xD232,)),
+    ("SETC", (0xD312,)),
+    ("RET", (0x4130,)),
+    ("RETI", (0x1300,)),
+    ("ADD @R5+, R7", (0x5537,)),
+    ("MOV 2(R4), 4(R5)", (0x4495, 0x0002, 0x0004)),
+    ("MOV.B @R4, R5", (0x4465,)),
+)
+
+# Etiketli ve etiketsiz komutların karışımı: statik ve sembollü yollar birlikte sınanır
+SOURCE = [line.format(i=i) for i in range(40) for line in (
+    "L{i}: MOV #0x10, R4", "    ADD @R5+, R7", "    MOV 2(R4), 4(R5)", "    MOV &0x0200, R4",
+    "    MOV #L{i}, R6", "    SUB #1, R5", "    JNE L{i}", "    CALL #L0", "    MOV.B @R4, R5", "    BR #L{i}")]
+
+def _program(lines):
+    with contextlib.redirect_stdout(io.StringIO()):
+        program = tokenize(lines, opcode_table)
+        symbol_table = pass1(program)
+    return program, symbol_table
+
+@pytest.mark.parametrize('source, expected', KNOWN)
+def test_known_encodings(source, expected):
+    program, symbol_table = _program([source])
+    machine_code, *_ = encode_lines(program, symbol_table, opcode_table)
+    assert tuple(word for _, word in machine_code) == expected
+
+def _random_fields(count):
+    rng = random.Random(count)
+    keys = list(encoder_for(opcode_table).base_words)
+    return [(rng.choice(keys), rng.randrange(16), rng.randrange(16)) for _ in range(count)]
+
+@pytest.mark.parametrize('count', (0, 1, NUMPY_MIN_BATCH - 1, NUMPY_MIN_BATCH, 5000))
+def test_batch_words_match_scalar(count):
+    encoder = encoder_for(opcode_table)
+    fields = _random_fields(count)
+    assert list(encoder.words(fields)) == [encoder.word(*field) for field in fields]
+
+def test_batch_words_without_numpy(monkeypatch):
+    monkeypatch.setattr(encoder_module, 'np', None)
+    encoder = encoder_for(opcode_table)
+    fields = _random_fields(1000)
+    assert list(encoder.words(fields)) == [encoder.word(*field) for field in fields]
+
+def test_encode_lines_matches_encode_line():
+    program, symbol_table = _program(SOURCE)
+    batch, batch_literals, batch_relocations = encode_lines(program, symbol_table, opcode_table)
+    scalar, literals, relocations = {}, [], []
+    for line in program:
+        words, line_literals, line_relocations, _ = encode_line(line, symbol_table, opcode_table)
+        scalar.update((line.address + 2 * i, word) for i, word in enumerate(words))
+        literals += line_literals
+        relocations += line_relocations
+    assert dict(batch) == scalar
+    assert batch_literals == literals
+    assert batch_relocations == relocations
@@ -0,0 +1,72 @@
+# test_expressions.py
+# .equ/.set ifadeleri: öncelik, taban biçimleri ve #immediate ile ortak sayı dilbilgisi
+
+import contextlib
+import io
+
+import pytest
+
+from asm_ir import immediate_value
+from expressions import compile_expression
+from test4 import Assembler
+
+def _value(text, symbols=None):
+    symbols = symbols or {}
+    return compile_expression(text).evaluate(symbols.__getitem__)
+
+@pytest.mark.parametrize('text, expected', (
+    ("1 + 2 * 3", 7),
+    ("(1 + 2) * 3", 9),
+    ("1 << 2 + 1", 8),
+    ("6 & 3 | 8", 10),
+    ("-7 / 2", -3),
+    ("-7 % 2", -1),
+    ("~0 & 0xFF", 0xFF),
+    ("2 * -3", -6),
+    ("1 + 2 == 3 && 4 > 3", 1),
+))
+def test_precedence(text, expected):
+    assert _value(text) == expected
+
+@pytest.mark.parametrize('text, expected', (
+    ("42", 42), ("0x1F", 31), ("0X1f", 31), ("1Fh", 31), ("0B1h", 0xB1),
+    ("101b", 5), ("0b101", 5), ("0B101", 5),
+))
+def test_radix_forms_match_immediates(text, expected):
+    assert _value(text) == expected
+    assert immediate_value('#' + text) == expected
+
+@pytest.mark.parametrize('text', ("0b1b", "12abc", "1 +", "(1", "1 $ 2"))
+def test_invalid_expressions(text):
+    with pytest.raises(ValueError):
+        compile_expression(text)
+
+def test_symbols():
+    assert _value("A * 2 + B", {'A': 3, 'B': 1}) == 7
+    assert compile_expression("A + A - B").symbols == ('A', 'B')
+
+def test_equ_radix_in_source():
+    with contextlib.redirect_stdout(io.StringIO()):
+        machine_code, symbol_table, *_ = Assembler().assemble("X .equ 101b\nY .equ 0B1h + X\nMOV #Y, R5\nMOV #101b, R6\n")
+    assert symbol_table['X']['value'] == 5 and symbol_table['Y']['value'] == 0xB6
+    assert [word for _, word in machine_code] == [0x4035, 0x00B6, 0x4036, 0x0005]
+
+def _assemble(source):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return Assembler().assemble(source)
+
+def test_forward_references_resolve_in_any_order():
+    _, symbol_table, *_ = _assemble("A .equ B + 1\nB .equ C * 2\nC .equ end - start\nstart: NOP\nNOP\nend: NOP\n")
+    assert [symbol_table[name]['value'] for name in ('C', 'B', 'A')] == [4, 8, 9]
+
+def test_cycle_is_reported_with_path():
+    with pytest.raises(ValueError, match=r"Döngüsel .equ bağımlılığı: (A -> B -> A|B -> A -> B)"):
+        _assemble("A .equ B + 1\nB .equ A - 1\nNOP\n")
+
+def test_undefined_dependency_is_an_error():
+    with pytest.raises(ValueError, match=r"Line 2: Tanımsız sembol: 'MISSING' \('B' sabitinde\)"):
+        _assemble("A .equ B + 1\nB .equ MISSING * 2\nMOV #A, R5\n")
+
+def test_external_dependency_is_deferred():
+    _, symbol_table, *_ = _assemble(".ref ext\nA .equ ext + 2\nNOP\n")
+    assert not symbol_table['A']['defined']
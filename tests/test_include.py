@@ -0,0 +1,92 @@
+# test_include.py
+# .include: önbellekten eklenen dosya, içeriği kaynağa elle yapıştırılmış haliyle aynı sonucu vermeli
+
+import contextlib
+import io
+
+import pytest
+
+from linker import link, read_elf
+from test4 import Assembler
+
+# Akış direktifi içermeyen başlık önceden ayrıştırılmış IR parçası olarak eklenir
+PLAIN = """; ortak tanımlar
+BASE .equ 0x0200
+SIZE .equ BASE + 4
+helper: MOV #SIZE, R5
+    RET
+"""
+# Makro ve koşul içeren dosya satır satır akıştan geçirilir
+STREAMED = """.macro CLEAR r
+    MOV #0, r
+.endm
+.if SIZE > 0x200
+    CLEAR R6
+.else
+    CLEAR R7
+.endif
+"""
+MAIN = """.include "defs.inc"
+start: MOV #BASE, R4
+.include "sub/ops.inc"
+    CLEAR R8
+    CALL #helper
+    JMP start
+"""
+
+def _result(source, include_paths=()):
+    with contextlib.redirect_stdout(io.StringIO()):
+        machine_code, symbol_table, literals, relocations, _ = Assembler(include_paths=include_paths).assemble(source)
+    return sorted(machine_code), {name: dict(entry) for name, entry in symbol_table.items()}, literals, relocations
+
+def _inlined():
+    return MAIN.replace('.include "defs.inc"', PLAIN).replace('.include "sub/ops.inc"', STREAMED)
+
+@pytest.fixture
+def headers(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "inc" / "sub").mkdir(parents=True)
+    (tmp_path / "inc" / "defs.inc").write_text(PLAIN)
+    (tmp_path / "inc" / "sub" / "ops.inc").write_text(STREAMED)
+    return tmp_path / "inc"
+
+def test_include_matches_inlined_source(headers):
+    expected = _result(_inlined())
+    # İkinci derleme ayrıştırılmış dosyaları önbellekten alır
+    assert _result(MAIN, [str(headers)]) == expected
+    assert _result(MAIN, [str(headers)]) == expected
+
+def test_edited_include_is_reparsed(headers):
+    _result(MAIN, [str(headers)])
+    (headers / "defs.inc").write_text(PLAIN.replace("0x0200", "0x0300"))
+    assert _result(MAIN, [str(headers)]) == _result(_inlined().replace("0x0200", "0x0300"))
+
+def test_nested_include_is_relative_to_including_file(headers):
+    (headers / "sub" / "ops.inc").write_text('.include "more.inc"\n' + STREAMED)
+    (headers / "sub" / "more.inc").write_text("EXTRA .equ 3\n")
+    assert _result(MAIN, [str(headers)])[1]['EXTRA']['value'] == 3
+
+@pytest.mark.parametrize('files, message', [
+    ({}, "Include dosyası bulunamadı: defs.inc"),
+    ({"defs.inc": '.include "defs.inc"\n'}, "Döngüsel .include"),
+])
+def test_include_errors(tmp_path, monkeypatch, files, message):
+    monkeypatch.chdir(tmp_path)
+    for name, text in files.items():
+        (tmp_path / name).write_text(text)
+    with pytest.raises(ValueError, match=message):
+        _result('.include "defs.inc"\n    NOP')
+
+def test_modules_sharing_a_header_link(headers, tmp_path):
+    (headers / "consts.inc").write_text("BASE .equ 0x0200\nSIZE .equ BASE + 4\n")
+    modules = {"a": ".global start\nstart: MOV #SIZE, R4\n    CALL #sub_b\n",
+               "b": ".global sub_b\nsub_b: MOV #BASE, R5\n    RET\n"}
+    outputs = []
+    for name, body in modules.items():
+        outputs.append(str(tmp_path / f"{name}.elf"))
+        with contextlib.redirect_stdout(io.StringIO()):
+            Assembler(output=outputs[-1], include_paths=[str(headers)]).assemble('.include "consts.inc"\n' + body)
+    with contextlib.redirect_stdout(io.StringIO()):
+        link(outputs, str(tmp_path / "linked.elf"))
+    symbols = read_elf(str(tmp_path / "linked.elf"))['symbols']
+    assert symbols['SIZE']['value'] == 0x204 and symbols['sub_b']['defined']
@@ -0,0 +1,169 @@
+# test_linker.py
+# Linker: adres tablosuyla relocation yamalama doğrusal taramayla aynı sonucu vermeli
+
+import contextlib
+import io
+import os
+import random
+from array import array
+
+import pytest
+
+from elf32 import CodeImage
+from linker import apply_relocations, link, read_elf
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def _reference(images, relocations, symbols):
+    """Eski yol: her relocation için parçalar baştan taranır, ilk eşleşen yamalanır"""
+    for rel in relocations:
+        value = symbols[rel['symbol'].lstrip('#@')]['value'] & 0xFFFF
+        for run in images[rel['section']].runs:
+            if run.base <= rel['offset'] < run.end:
+                run.words[(rel['offset'] - run.base) >> 1] = value
+                break
+
+def _image(rng):
+    image = CodeImage()
+    address = rng.randrange(0, 0x100, 2)
+    for _ in range(rng.randrange(1, 8)):
+        count = rng.randrange(1, 40)
+        image.write(address, array('H', [rng.randrange(0x10000) for _ in range(count)]))
+        # Boşluklu ve örtüşen parçalar
+        address = max(0, address + 2 * count + rng.randrange(-20, 40, 2))
+    return image
+
+def _copy(image):
+    return CodeImage(type(run)(run.base, array('H', run.words)) for run in image.runs)
+
+def test_index_matches_linear_scan():
+    rng = random.Random(1)
+    for _ in range(50):
+        text, data = _image(rng), _image(rng)
+        symbols = {f"s{i}": {'value': rng.randrange(0x10000), 'defined': True} for i in range(5)}
+        relocations = [{'section': rng.choice(('text', 'data')), 'offset': rng.randrange(0, 0x400, 2),
+                        'symbol': rng.choice(('', '#', '@')) + rng.choice(list(symbols)), 'type': 'ABSOLUTE_16'}
+                       for _ in range(100)]
+        expected = {'text': _copy(text), 'data': _copy(data)}
+        _reference(expected, relocations, symbols)
+        apply_relocations(text, data, relocations, symbols)
+        assert [(run.base, list(run.words)) for run in text.runs] == \
+               [(run.base, list(run.words)) for run in expected['text'].runs]
+        assert [(run.base, list(run.words)) for run in data.runs] == \
+               [(run.base, list(run.words)) for run in expected['data'].runs]
+
+def test_bundled_link_resolves_call(tmp_path):
+    output = str(tmp_path / "linked.elf")
+    with contextlib.redirect_stdout(io.StringIO()):
+        link([os.path.join(ROOT, "main.elf"), os.path.join(ROOT, "utils.elf")], output)
+    obj = read_elf(output)
+    words = dict(obj['text'])
+    func_mul = obj['symbols']['FUNC_MUL']['value']
+    assert func_mul == 0x16
+    # CALL #FUNC_MUL: 0x12B0 ardından relocation ile yamalanan adres
+    assert words[14] == 0x12B0 and words[16] == func_mul
+
+def _write_listing(path, text, symbols, relocations):
+    """Eski metin nesne biçiminde küçük bir modül yazar"""
+    with open(path, 'w') as f:
+        f.write(".text Section (Machine Code):\nAddress | Code\n")
+        for addr, word in text:
+            f.write(f"{addr:04X}    | {word:04X}\n")
+        f.write("\n.symtab Section (Symbol Table):\n")
+        f.write("Symbol | Value | Type | Section | Defined | Global\n")
+        for name, (value, section, defined) in symbols.items():
+            f.write(f"{name} | {value:04X} | label | {section} | {defined} | True\n")
+        f.write("\n.relocations Section:\nOffset | Symbol | Type | Section\n")
+        for offset, symbol in relocations:
+            f.write(f"{offset:04X} | {symbol} | ABSOLUTE_16 | text\n")
+    return str(path)
+
+def _list_scan_link(objects):
+    """Eski link yolu: (adres, kelime) listeleri ve her relocation için doğrusal tarama"""
+    linked, symbols, relocations, offset = [], {}, [], 0
+    for obj in objects:
+        for name, info in obj['symbols'].items():
+            if info['defined']:
+                symbols[name] = info['value'] + (offset if info['section'] == 'text' else 0)
+        linked += [(addr + offset, word) for addr, word in obj['text']]
+        relocations += [(rel['offset'] + offset, rel['symbol']) for rel in obj['relocations']]
+        offset += len(obj['text']) * 2
+    for rel_offset, symbol in relocations:
+        for i, (addr, word) in enumerate(linked):
+            if addr == rel_offset:
+                linked[i] = (addr, symbols[symbol.lstrip('#@')])
+                break
+    return linked
+
+def test_link_matches_list_scan(tmp_path):
+    rng = random.Random(2)
+    files = []
+    for n in range(4):
+        words = [(2 * i, rng.randrange(0x10000)) for i in range(rng.randrange(4, 30))]
+        symbols = {f"F{n}": (2 * rng.randrange(len(words)), 'text', True)}
+        relocations = [(2 * rng.randrange(len(words)), rng.choice(('#', '@', '')) + f"F{rng.randrange(4)}")
+                       for _ in range(6)]
+        files.append(_write_listing(tmp_path / f"m{n}.obj", words, symbols, relocations))
+    output = str(tmp_path / "linked.elf")
+    with contextlib.redirect_stdout(io.StringIO()):
+        link(files, output)
+    expected = _list_scan_link([read_elf(name) for name in files])
+    assert sorted(read_elf(output)['text']) == sorted(expected)
+
+def test_link_rejects_undefined_symbol(tmp_path):
+    name = _write_listing(tmp_path / "m.obj", [(0, 0x12B0), (2, 0)], {}, [(2, '#MISSING')])
+    with contextlib.redirect_stdout(io.StringIO()), pytest.raises(ValueError, match="#MISSING"):
+        link([name], str(tmp_path / "linked.elf"))
+
+def _line_split_read(filename):
+    """Eski okuyucu: satırlar strip/split ile bölüm bölüm ayrıştırılır"""
+    sections = {'text': [], 'data': [], 'symbols': {}, 'relocations': []}
+    mode = None
+    for line in open(filename):
+        line = line.strip()
+        for prefix, name in (('.text Section', 'text'), ('.data Section', 'data'), ('.symtab Section', 'symtab')):
+            if line.startswith(prefix):
+                mode = name
+                break
+        else:
+            if line.startswith('.rel') and 'Section' in line:
+                mode = 'relocation'
+            elif line and not line.startswith(('---', 'Address', 'Value', 'Symbol', 'Offset')) and '|' in line:
+                parts = [x.strip() for x in line.split('|')]
+                try:
+                    if mode in ('text', 'data'):
+                        sections[mode].append((int(parts[0], 16), int(parts[1], 16)))
+                    elif mode == 'symtab' and len(parts) >= 6:
+                        sections['symbols'][parts[0]] = {
+                            'value': int(parts[1], 16), 'type': parts[2], 'section': parts[3],
+                            'defined': parts[4].lower() == 'true', 'is_global': parts[5].lower() == 'true'}
+                    elif mode == 'relocation' and len(parts) >= 4:
+                        sections['relocations'].append({'offset': int(parts[0], 16), 'symbol': parts[1],
+                                                        'type': parts[2], 'section': parts[3]})
+                except ValueError:
+                    pass
+    return sections
+
+def test_streaming_reader_matches_line_split(tmp_path):
+    rng = random.Random(3)
+    with open(tmp_path / "m.obj", 'w') as f:
+        f.write("MSP430 Object\n=============\n\n.text Section (Machine Code):\nAddress | Code\n--------+------\n")
+        for i in range(200):
+            f.write(f"{2 * i:04X}    | {rng.randrange(0x10000):04X}\n")
+        f.write("\n.data Section (Literals):\nAddress | Value\n--------+-------\n")
+        for i in range(20):
+            f.write(f"{0x200 + 2 * i:04X}    | {rng.randrange(0x10000):04X} | word\n")
+        f.write("\n.symtab Section (Symbol Table):\n")
+        f.write("Symbol      | Value | Type      | Section | Defined | Global\n------------+-------\n")
+        for i in range(10):
+            f.write(f"S{i:<10} | {2 * i:04X}  | label     | text    | {i % 3 != 0} | {i % 2 == 0}\n")
+        f.write("bozuk | XYZ | label | text | True | True\n")
+        f.write("\n.rel.text Section:\nOffset | Symbol      | Type        | Section\n-------+------\n")
+        for i in range(15):
+            f.write(f"{4 * i:04X}   | #S{i % 10:<9} | ABSOLUTE_16 | text\n")
+    obj = read_elf(str(tmp_path / "m.obj"))
+    expected = _line_split_read(str(tmp_path / "m.obj"))
+    assert list(obj['text']) == expected['text']
+    assert list(obj['data']) == expected['data']
+    assert obj['symbols'] == expected['symbols']
+    assert obj['relocations'] == expected['relocations']
@@ -0,0 +1,120 @@
+# test_loader.py
+# Sanal bellek ve ELF yükleyici: tek tamponlu yol eski bölge sözlüğü yoluyla aynı sonucu vermeli
+
+import contextlib
+import io
+import os
+import random
+import struct
+
+import pytest
+
+from linker import read_elf
+from loader import MSP430ELFLoader, MSP430VirtualMemory
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+class _RegionMemory:
+    """Eski bellek: bölge başına ayrı bytearray ve doğrusal bölge araması"""
+    def __init__(self):
+        self.region_ranges = MSP430VirtualMemory().region_ranges
+        self.memory = {region: bytearray(end - start + 1) for region, (start, end) in self.region_ranges.items()}
+
+    def get_memory_region(self, address):
+        for region, (start, end) in self.region_ranges.items():
+            if start <= address <= end:
+                return region, address - start
+        raise ValueError(f"Geçersiz adres: 0x{address:04X}")
+
+    def write_memory(self, address, data):
+        try:
+            region, offset = self.get_memory_region(address)
+        except ValueError:
+            return False
+        if offset + len(data) > len(self.memory[region]):
+            return False
+        self.memory[region][offset:offset + len(data)] = data
+        return True
+
+    def read_memory(self, address, size):
+        try:
+            region, offset = self.get_memory_region(address)
+        except ValueError:
+            return None
+        return bytes(self.memory[region][offset:offset + size])
+
+def _region(memory, address):
+    try:
+        return memory.get_memory_region(address)
+    except ValueError:
+        return None
+
+def test_region_lookup_matches_linear_search():
+    memory, reference = MSP430VirtualMemory(), _RegionMemory()
+    for address in range(-2, 0x10002):
+        assert _region(memory, address) == _region(reference, address)
+
+def test_reads_and_writes_match_region_buffers():
+    rng = random.Random(4)
+    memory, reference = MSP430VirtualMemory(), _RegionMemory()
+    # Bölge sınırlarının çevresi ve rastgele adresler
+    edges = [a for start, end in reference.region_ranges.values() for a in (start, end - 1, end, end + 1)]
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(2000):
+            address = rng.choice(edges) if rng.random() < 0.3 else rng.randrange(0x10000)
+            data = bytes(rng.randrange(256) for _ in range(rng.randrange(1, 8)))
+            assert memory.write_memory(address, data) == reference.write_memory(address, data)
+            address = rng.choice(edges) if rng.random() < 0.3 else rng.randrange(0x10000)
+            size = rng.randrange(1, 8)
+            view = memory.read_memory(address, size)
+            expected = reference.read_memory(address, size)
+            assert (None if view is None else bytes(view)) == expected
+    for region, buffer in reference.memory.items():
+        assert bytes(memory.memory[region]) == bytes(buffer)
+
+@pytest.mark.parametrize("address", [0x1C00, 0x4400, 0xFFFE])
+def test_word_access_shares_byte_buffer(address):
+    memory = MSP430VirtualMemory()
+    memory.write_word(address, 0x1234)
+    assert bytes(memory.read_memory(address, 2)) == b'\x34\x12'
+    with contextlib.redirect_stdout(io.StringIO()):
+        memory.write_memory(address, b'\xCD\xAB')
+    assert memory.read_word(address) == 0xABCD
+
+def _word_by_word(memory, obj, text_base=0x4400, data_base=0x1C00):
+    """Eski yükleyici: her kelime ayrı write_memory çağrısıyla yazılır"""
+    counts = {'text': 0, 'data': 0}
+    for mode, base in (('text', text_base), ('data', data_base)):
+        for addr, value in obj[mode]:
+            if memory.write_memory(addr + base, struct.pack('<H', value)):
+                counts[mode] += 1
+    return counts
+
+def _loaded(filename):
+    memory, reference = MSP430VirtualMemory(), MSP430VirtualMemory()
+    with contextlib.redirect_stdout(io.StringIO()) as out:
+        ok = MSP430ELFLoader(memory).load_linked_elf(filename)
+        counts = _word_by_word(reference, read_elf(filename))
+    assert ok == (counts['text'] > 0 or counts['data'] > 0)
+    assert f"{counts['text']} .text, {counts['data']} .data" in out.getvalue()
+    return memory, reference
+
+def test_bulk_load_matches_word_by_word(tmp_path):
+    rng = random.Random(5)
+    with open(tmp_path / "m.obj", 'w') as f:
+        f.write(".text Section (Machine Code):\n")
+        # Boşluklu koşular; sonuncusu FLASH/VECTORS sınırını (0xFFC0) aşar
+        for base, count in ((0x0000, 40), (0x0100, 3), (0xBB70, 48)):
+            for i in range(count):
+                f.write(f"{base + 2 * i:04X} | {rng.randrange(0x10000):04X}\n")
+        f.write("\n.data Section (Literals):\n")
+        # Son iki kelime RAM sonunu (0x23FF) aşar ve yüklenemez
+        for i in range(0x402):
+            f.write(f"{2 * i:04X} | {rng.randrange(0x10000):04X}\n")
+    memory, reference = _loaded(str(tmp_path / "m.obj"))
+    assert memory.buffer == reference.buffer
+
+def test_bulk_load_binary_elf():
+    memory, reference = _loaded(os.path.join(ROOT, "main.elf"))
+    assert memory.buffer == reference.buffer
+    assert any(memory.buffer[0x4400:0x4480])
@@ -0,0 +1,72 @@
+# test_macros.py
+# Makro genişletme: derlenmiş şablonlar eski satır satır re.sub genişletmesiyle aynı metni üretmeli
+
+import re
+
+import pytest
+
+from test4 import Assembler, _extract_macros
+
+def _substitute(source):
+    """Eski yol: her çağrıda gövde satırları parametre parametre re.sub ile değiştirilir"""
+    lines = source.strip().split('\n')
+    macro_table = {}
+    lines = _extract_macros(lines, macro_table)
+    counter = 0
+    expanded_lines = []
+    for line in lines:
+        code_part, semicolon, comment = line.strip().partition(';')
+        tokens = code_part.split()
+        if not tokens or tokens[0] not in macro_table:
+            expanded_lines.append(line)
+            continue
+        macro = macro_table[tokens[0]]
+        args = ' '.join(tokens[1:]).replace(',', ' ').split()
+        counter += 1
+        for expanded in macro.body:
+            for param, arg in zip(macro.params, args):
+                expanded = re.sub(rf'#{re.escape(param)}\b', f'#{arg}', expanded)
+                expanded = re.sub(rf':{re.escape(param)}:', arg, expanded)
+                expanded = re.sub(rf'\b{re.escape(param)}\b', arg, expanded)
+            expanded = re.sub(r'(\w+)\?', rf'\1.{counter}', expanded)
+            if semicolon and not expanded.strip().startswith('.'):
+                expanded = expanded + " " + semicolon + comment
+            expanded_lines.append(expanded)
+    return expanded_lines
+
+MACROS = """.macro WAIT reg, count
+    MOV #count, reg
+l?: DEC reg
+    JNE l?
+.endm
+.macro LOAD dst, base, off
+    MOV off(base), dst
+    MOV &tbl_:off:, R15
+.endm
+.macro PAIR a, b
+    PUSH a
+    PUSH b
+    .word 0x10, b
+.endm
+.macro NOARGS
+    NOP
+.endm
+"""
+
+CALLS = ["    WAIT R5, 100", "    WAIT R6, 0x20 ; bekle", "    LOAD R4, R7, 4", "    LOAD R8, R9, 12 ; tablo",
+         "    PAIR R10, R11", "    PAIR R12, R11 ; yığın", "    NOARGS", "    NOARGS ; boş", "    MOV R4, R5", ""]
+
+@pytest.mark.parametrize('seed', range(5))
+def test_templates_match_substitution(seed):
+    calls = CALLS[seed:] + CALLS[:seed]
+    # Aynı çağrının tekrarı genişletme önbelleğinden gelir
+    source = MACROS + "\n".join(calls + calls)
+    assert list(Assembler()._stream(source)) == _substitute(source)
+
+def test_unique_labels_differ_per_call():
+    lines = list(Assembler()._stream(MACROS + "    WAIT R5, 1\n    WAIT R5, 1"))
+    assert [line.split(':')[0] for line in lines if ':' in line] == ['l.1', 'l.2']
+
+def test_argument_count_is_checked():
+    with pytest.raises(ValueError, match="Makro 'PAIR' 2 parametre bekliyor, 1 verildi"):
+        list(Assembler()._stream(MACROS + "    PAIR R4"))
@@ -0,0 +1,55 @@
+# test_msp430_as.py
+# Komut satırı assembler'ı: süreç havuzuyla derlenen nesneler GUI yolunun (tek Assembler) çıktısıyla aynı olmalı
+
+import contextlib
+import io
+
+from msp430_as import assemble_files, main
+from test4 import Assembler
+
+SOURCES = {
+    'a.asm': ".global start\nstart: MOV #0x1234, R4\n    CALL #sub\n    JMP start\n",
+    'b.asm': ".global sub\nsub: ADD R4, R5\n    RET\n.data\ntbl: .word 1, 2, 3\n",
+    'c.asm': ".macro TWICE r\n    INC r\n    INC r\n.endm\n.rept 4\n    TWICE R6\n.endr\n    RET\n",
+    'd.asm': "N .equ 5\n.loop N\n    NOP\n.endloop\n    MOV #N, R7\n",
+}
+
+def _write_sources(tmp_path):
+    for name, text in SOURCES.items():
+        (tmp_path / name).write_text(text)
+    return [str(tmp_path / name) for name in SOURCES]
+
+def _direct(tmp_path, source):
+    """GUI yolu: kaynak doğrudan bir Assembler ile derlenir"""
+    output = tmp_path / "direct.elf"
+    with contextlib.redirect_stdout(io.StringIO()):
+        Assembler(output=str(output)).assemble(source)
+    return output.read_bytes()
+
+def test_parallel_matches_sequential_and_direct(tmp_path):
+    sources = _write_sources(tmp_path)
+    objects = {}
+    for jobs in (1, 3):
+        (tmp_path / f"out{jobs}").mkdir()
+        results = assemble_files(sources, str(tmp_path / f"out{jobs}"), jobs=jobs)
+        # Sonuçlar giriş sırasıyla döner
+        assert [result[0] for result in results] == sources
+        assert all(result[3] is None for result in results)
+        objects[jobs] = [open(result[1], 'rb').read() for result in results]
+    assert objects[1] == objects[3]
+    assert objects[1] == [_direct(tmp_path, text) for text in SOURCES.values()]
+
+def test_failed_source_sets_exit_status(tmp_path):
+    sources = _write_sources(tmp_path)
+    (tmp_path / "bad.asm").write_text("    MOV #undefined_sym + , R4\n")
+    with contextlib.redirect_stdout(io.StringIO()) as out:
+        status = main(sources + [str(tmp_path / "bad.asm"), "-o", str(tmp_path / "out"), "-j", "2", "--no-cache"])
+    assert status == 1
+    assert "4/5 dosya derlendi" in out.getvalue()
+
+def test_duplicate_outputs_are_rejected(tmp_path):
+    (tmp_path / "x").mkdir()
+    (tmp_path / "x" / "a.asm").write_text(SOURCES['a.asm'])
+    sources = _write_sources(tmp_path)
+    with contextlib.redirect_stdout(io.StringIO()):
+        assert main([sources[0], str(tmp_path / "x" / "a.asm"), "-o", str(tmp_path / "out"), "--no-cache"]) == 2
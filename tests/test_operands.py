@@ -0,0 +1,74 @@
+# test_operands.py
+# Operand çözücü: ilk karaktere göre seçilen ayrıştırıcılar eski regex zinciriyle aynı sonucu vermeli
+
+import re
+
+import pytest
+
+from test4 import parse_operand
+
+def _cascade(operand, symbol_table=None):
+    """Eski yol: desenler sırayla denenir"""
+    operand = operand.strip()
+    if operand.startswith('#'):
+        value_str = operand[1:].strip()
+        if re.match(r"^'.'$", value_str):
+            value = ord(value_str[1])
+        elif re.match(r'^0b[01]+$', value_str) or re.match(r'^[01]+b$', value_str):
+            value = int(value_str[2:] if value_str.startswith('0b') else value_str[:-1], 2)
+        elif re.match(r'^0x[0-9a-fA-F]+$', value_str) or re.match(r'^[0-9a-fA-F]+h$', value_str):
+            value = int(value_str[2:] if value_str.startswith('0x') else value_str[:-1], 16)
+        elif value_str.isdigit():
+            value = int(value_str)
+        else:
+            entry = symbol_table[value_str]
+            if isinstance(entry, dict) and 'value' in entry:
+                return {'mode': 'immediate', 'value': int(entry['value']), 'As': 0x3, 'register': 'R0', 'label': value_str}
+            return {'mode': 'immediate', 'value': int(entry), 'As': 0x3, 'register': 'R0'}
+        return {'mode': 'immediate', 'value': value, 'As': 0x3, 'register': 'R0'}
+    if operand.startswith('&'):
+        try:
+            return {'mode': 'absolute', 'value': int(operand[1:], 0), 'As': 0x1, 'register': 'R2'}
+        except ValueError:
+            return {'mode': 'absolute', 'label': operand[1:], 'As': 0x1, 'register': 'R2'}
+    match = re.match(r'^(-?\d+)\((R\d+)\)$', operand)
+    if match:
+        return {'mode': 'indexed', 'offset': int(match.group(1)), 'register': match.group(2), 'As': 0x1}
+    if re.match(r'^@R\d+\+$', operand):
+        return {'mode': 'indirect_autoinc', 'register': operand[1:-1], 'As': 0x3}
+    if re.match(r'^@R\d+$', operand):
+        return {'mode': 'indirect', 'register': operand[1:], 'As': 0x2}
+    if re.match(r'^R\d+$', operand):
+        return {'mode': 'register', 'register': operand, 'As': 0x0}
+    if re.match(r'^[A-Za-z_]\w*$', operand):
+        return {'mode': 'symbolic', 'label': operand, 'As': 0x1, 'register': 'R0'}
+    raise ValueError(f"Gecersiz operand: {operand}")
+
+SYMBOLS = {'N': {'value': 7, 'defined': True}, 'RAW': 0x42, 'tbl': {'value': 0x200, 'defined': True}}
+
+OPERANDS = ['R0', 'R4', 'R15', ' R5 ', '@R6', '@R7+', '0(R4)', '12(R5)', '-4(R9)', '&0x0200', '&512', '&tbl',
+            'tbl', 'loop_1', '_x', '#0', '#1', '#65535', '#0x1F', '#1Fh', '#0b101', '#101b', '#0B1h', "#'A'", "#' '",
+            '#N', '#RAW', '#tbl', '# 5']
+
+@pytest.mark.parametrize('operand', OPERANDS)
+def test_dispatch_matches_cascade(operand):
+    assert parse_operand(operand, SYMBOLS) == _cascade(operand, SYMBOLS)
+    # Sembolden bağımsız sonuçlar önbellekten aynı nesne olarak gelir
+    if not operand.strip().startswith('#') or operand.strip()[1:] not in SYMBOLS:
+        assert parse_operand(operand) is parse_operand(operand)
+
+@pytest.mark.parametrize('operand', ['', '@R', '@R4++', '4(R)', '(R4)', 'R4+', '1abc', '#', "#''", '#1.5'])
+def test_invalid_operands_are_rejected(operand):
+    with pytest.raises(ValueError):
+        parse_operand(operand, SYMBOLS)
+
+def test_symbol_cache_follows_table_generations():
+    cache = {}
+    assert parse_operand('#N', SYMBOLS, symbol_cache=cache)['value'] == 7
+    assert parse_operand('#N', {'N': {'value': 9}}, symbol_cache=cache)['value'] == 7
+    assert parse_operand('#N', {'N': {'value': 9}}, symbol_cache={})['value'] == 9
+
+def test_undefined_symbol_becomes_relocated_immediate():
+    # Eski yol burada UnboundLocalError/KeyError ile çöküyordu
+    assert parse_operand('#ext_var', {}) == {'mode': 'immediate', 'As': 0x3, 'register': 'R0', 'label': 'ext_var'}
+    assert parse_operand('#-1')['value'] == 0xFFFF
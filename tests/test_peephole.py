@@ -0,0 +1,84 @@
+# test_peephole.py
+# -O peephole iyileştirmesi: program aynı sonucu daha az kelime ve çevrimle üretmeli
+
+import contextlib
+import io
+
+from loader import MSP430VirtualMemory
+from simulator import MSP430CPU
+from test4 import Assembler
+
+SOURCE = """ZERO .equ 0
+ONE .equ ZERO+1
+start: MOV #0x0400, R1
+    MOV #5, R5
+    CLR R4
+loop: MOV R5, R5
+    PUSH R4
+    POP R4
+    INC R4
+    DEC R5
+    CMP #ZERO, R5
+    JNZ loop
+    JMP skip
+    MOV R6, R6
+skip: MOV.B R7, R7
+    CMP #ONE, R4
+    PUSH R8
+lbl: POP R8
+    JMP done
+done: JMP done
+END .equ done - start
+"""
+
+def _assemble(optimize, source=SOURCE):
+    out = io.StringIO()
+    with contextlib.redirect_stdout(out):
+        result = Assembler(optimize=optimize).assemble(source)
+    return result, out.getvalue()
+
+def _run(machine_code):
+    cpu = MSP430CPU(MSP430VirtualMemory())
+    for address, word in machine_code:
+        cpu.write_word(address, word)
+    cpu.reset(pc=0)
+    return cpu, cpu.run(10_000)
+
+def test_optimized_program_behaves_the_same():
+    (plain, plain_symbols, *_), _ = _assemble(False)
+    (optimized, symbols, *_), report = _assemble(True)
+    plain_cpu, plain_stats = _run(plain)
+    cpu, stats = _run(optimized)
+    assert plain_stats['halted'] and stats['halted']
+    assert cpu.regs[4:6] == plain_cpu.regs[4:6] == [5, 0]
+    assert len(list(optimized)) == len(list(plain)) - 7
+    assert stats['cycles'] < plain_stats['cycles']
+    # Etiket adresleri ve onlara bağlı sabitler yeni yerleşimi izler
+    assert symbols['END']['value'] == symbols['done']['value'] == 28
+    assert symbols['ZERO']['value'] == 0 and symbols['ONE']['value'] == 1
+    assert 'Toplam: 7 kelime (14 bayt)' in report
+
+def test_rules_leave_labelled_and_side_effect_code():
+    # Etiketli POP'a başka yerden atlanabilir; MOV.B Rn, Rn üst baytı temizler
+    source = "start: PUSH R5\nback: POP R5\n    MOV.B R6, R6\n    JMP back\n"
+    (plain, *_), _ = _assemble(False, source)
+    (optimized, *_), _ = _assemble(True, source)
+    assert list(optimized) == list(plain)
+
+def test_without_flag_nothing_is_reported():
+    _, output = _assemble(False)
+    assert 'Peephole' not in output
+
+def test_reassemble_with_optimize_matches_assemble():
+    (expected, expected_symbols, *_), _ = _assemble(True)
+    assembler = Assembler(optimize=True)
+    with contextlib.redirect_stdout(io.StringIO()):
+        assembler.reassemble(SOURCE.replace("INC R4", "INC R4\n    NOP"))
+        machine_code, symbols, *_ = assembler.reassemble(SOURCE)
+    assert list(machine_code) == list(expected) and symbols == expected_symbols
+
+def test_location_constant_follows_deleted_instruction():
+    # Silinen MOV R5, R5 sonrası $ sabiti yeni adresi göstermeli
+    (machine_code, symbols, *_), _ = _assemble(True, "start: MOV R5, R5\nhere .equ $\nMOV #here, R7\nend: JMP end\n")
+    assert symbols['here']['value'] == 0
+    assert [word for _, word in machine_code][:2] == [0x4037, 0x0000]
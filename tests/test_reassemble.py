@@ -0,0 +1,93 @@
+# test_reassemble.py
+# Artımlı derleme: her düzenlemeden sonra reassemble() tam assemble() ile aynı sonucu vermeli
+
+import contextlib
+import io
+import random
+
+import pytest
+
+from test4 import Assembler
+
+BASE = """.global start
+.ref ext
+N .equ 4
+SIZE .equ tail - start
+.text
+start:
+    MOV #N, R4
+    MOV #SIZE, R5
+l1: ADD #1, R4
+    JNE l1
+    CALL #sub
+    MOV &tbl, R6
+    MOV tbl, R7
+    JMP tail
+.org 0x0100
+vec: .word 5
+    JMP vec
+.data
+tbl: .word 1, 2, 3
+cnt: .word 0
+.text
+sub:
+    MOV.B @R5, R6
+    RETI
+mid: NOP
+tail:
+    MOV #ext, R8
+    JMP start"""
+
+SNIPPETS = ('    NOP', '    MOV #5, R4', '    MOV #lbl{0}, R9', 'lbl{0}: NOP', '    JMP l1', '    JMP lbl{0}',
+            '', '; yorum', '    ADD &tbl, R5', 'w{0}: .word 9, 10', '    MOV 2(R4), 4(R5)', '    CALL #lbl{0}',
+            '    MOV #cnt, R5', 'x{0} .equ 3', '.data', '.text', '    MOV #undefined_sym, R4', '    MOV tail, R4')
+
+def _result(assemble, source):
+    """Derleme sonucunu karşılaştırılabilir biçime getirir; hatalar da sonuç sayılır"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        try:
+            machine_code, symbol_table, literals, relocations, relocation_data = assemble(source)
+        except Exception as e:
+            return 'hata', str(e)
+    return (sorted(machine_code), {name: dict(entry) for name, entry in symbol_table.items()},
+            literals, relocations, relocation_data['section_info'])
+
+def _check(assembler, source):
+    assert _result(assembler.reassemble, source) == _result(Assembler().assemble, source)
+
+def test_edit_after_org_in_reentered_section():
+    assembler = Assembler()
+    _check(assembler, ".org 0x100\n.text\nPUSH R4\nL0: NOP")
+    _check(assembler, ".org 0x100\nCALL #L0\n.text\nPUSH R4\nL0: NOP")
+    _check(assembler, ".org 0x100\n.text\nPUSH R4\nL0: NOP")
+
+def test_edit_after_usect():
+    assembler = Assembler()
+    _check(assembler, ".usect \"text\", 8\nNOP\n.data\n.word 1\n.text\nL0: JMP L0")
+    _check(assembler, ".usect \"text\", 8\nNOP\nNOP\n.data\n.word 1\n.text\nL0: JMP L0")
+
+@pytest.mark.parametrize('seed', range(4))
+def test_random_edits_match_full_assembly(seed):
+    rng = random.Random(seed)
+    lines = BASE.split('\n')
+    assembler = Assembler()
+    _check(assembler, BASE)
+    for _ in range(60):
+        i = rng.randrange(1, len(lines) + 1)
+        snippet = rng.choice(SNIPPETS).format(rng.randrange(6))
+        op = rng.random()
+        if op < 0.4:
+            lines.insert(i, snippet)
+        elif op < 0.7 and len(lines) > 3:
+            del lines[min(i, len(lines) - 1)]
+        else:
+            lines[min(i, len(lines) - 1)] = snippet
+        _check(assembler, '\n'.join(lines))
+
+def test_lines_after_end_are_not_expanded():
+    # assemble() .end sonrasını okumaz; açık kalan .rept orada hata vermemeli
+    source = "start: NOP\n.end\n.rept 3\nNOP\n"
+    assembler = Assembler()
+    _check(assembler, source)
+    _check(assembler, source.replace("NOP\n.end", "NOP\nNOP\n.end"))
+    assert _result(assembler.reassemble, source)[0] != 'hata'
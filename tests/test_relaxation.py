@@ -0,0 +1,98 @@
+# test_relaxation.py
+# Menzil dışı atlamaların uzun biçime çevrilmesi: davranış, relocation ve bağlama
+
+import contextlib
+import io
+
+from linker import link, read_elf
+from loader import MSP430VirtualMemory
+from simulator import MSP430CPU
+from test4 import Assembler
+
+def _pad(count):
+    return "\n".join(["    NOP"] * count)
+
+# Her iki yönde menzil dışı koşullu atlamalar (JN ve JGE ters koşulla uzatılamaz)
+FAR_JUMPS = f"""start: MOV #0x0400, R1
+    MOV #3, R5
+    CLR R6
+    CLR R7
+top: DEC R5
+    JNZ far1
+    JMP out
+back: INC R6
+    MOV #-5, R8
+    TST R8
+    JN far2
+    MOV #99, R9
+cont: JMP top
+{_pad(1100)}
+far1: INC R7
+    JEQ never
+    JMP back
+{_pad(1100)}
+far2: JGE never
+    JMP cont
+never: MOV #0xDEAD, R10
+out: JMP out
+"""
+
+def _assemble(source, output=None):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return Assembler(output=output).assemble(source)
+
+def test_relaxed_program_runs():
+    machine_code, symbol_table, *_ = _assemble(FAR_JUMPS)
+    cpu = MSP430CPU(MSP430VirtualMemory())
+    for address, word in machine_code:
+        cpu.write_word(address, word)
+    cpu.reset(pc=0)
+    stats = cpu.run(100_000)
+    assert stats['halted'] and stats['pc'] == symbol_table['out']['value']
+    assert [cpu.regs[i] for i in (5, 6, 7, 8, 9, 10)] == [0, 2, 2, 0xFFFB, 0, 0]
+
+def test_in_range_jumps_stay_short():
+    machine_code, symbol_table, *_ = _assemble("start: JMP next\nnext: JNE start\n")
+    assert len(list(machine_code)) == 2
+
+def test_range_limit_is_ten_bit_signed():
+    # Uzaklık alanı -512..+511 kelimedir
+    near = dict(_assemble(f"JMP far\n{_pad(511)}\nfar: NOP\n")[0])
+    assert near[0] == 0x3C00 | 511
+    far = dict(_assemble(f"JMP far\n{_pad(512)}\nfar: NOP\n")[0])
+    assert far[0] == 0x4030 and far[2] == 4 + 2 * 512
+
+def test_relaxation_is_silent(capsys):
+    Assembler().assemble(FAR_JUMPS)
+    assert 'atlama' not in capsys.readouterr().out
+
+def test_relaxed_branch_has_relocation():
+    machine_code, symbol_table, _, relocations, _ = _assemble(FAR_JUMPS)
+    words = dict(machine_code)
+    relaxed = [entry for entry in relocations if entry['symbol'] in ('far1', 'far2', 'cont', 'back', 'never')]
+    assert relaxed
+    for entry in relaxed:
+        assert entry['type'] == 'ABSOLUTE_16'
+        assert words[entry['offset']] == symbol_table[entry['symbol']]['value']
+
+def test_relaxed_branch_is_patched_by_linker(tmp_path):
+    # Uzatılan atlama ikinci nesnede: bağlandıktan sonra hedef taşınmış adresi göstermeli
+    first = str(tmp_path / "first.elf")
+    second = str(tmp_path / "second.elf")
+    linked = str(tmp_path / "linked.elf")
+    _assemble(".global main\nmain: NOP\n    NOP\n", first)
+    _assemble(f".global loop\nloop: JMP far\n{_pad(600)}\nfar: JMP loop\n", second)
+    with contextlib.redirect_stdout(io.StringIO()):
+        link([first, second], linked)
+    obj = read_elf(linked)
+    words = dict(obj['text'])
+    far = obj['symbols']['far']['value']
+    assert far == 4 + 4 + 2 * 600
+    assert words[4] == 0x4030 and words[6] == far
+
+def test_location_constant_follows_relaxed_jump():
+    # JMP uzayınca ardından gelen $ sabiti yeni adresi göstermeli
+    machine_code, symbol_table, *_ = _assemble("start: JMP far\nhere .equ $\nMOV #here, R7\n.org 0x0900\nfar: MOV R5, R6\n")
+    words = dict(machine_code)
+    assert symbol_table['here']['value'] == 4
+    assert words[0] == 0x4030 and words[4] == 0x4037 and words[6] == 4
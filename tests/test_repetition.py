@@ -0,0 +1,81 @@
+# test_repetition.py
+# .rept/.irp/.loop: akışa yineleme başına üretilen gövde elle açılmış kaynakla aynı kodu vermeli
+
+import contextlib
+import io
+from itertools import islice
+
+import pytest
+
+from test4 import Assembler
+
+def _result(source):
+    with contextlib.redirect_stdout(io.StringIO()):
+        machine_code, symbol_table, literals, relocations, _ = Assembler().assemble(source)
+    return sorted(machine_code), {name: dict(entry) for name, entry in symbol_table.items()}, literals, relocations
+
+REPEATED = """N .equ 2
+.irp r, R4, R5
+.rept N
+l?: DEC r ; say
+    JNE l?
+.endr
+.endr
+.loop N + 1
+    .word 0x11
+.endloop
+.rept 0
+    NOP
+.endr
+I .set 0
+.loop
+    ADD #2, R6
+I .set I + 1
+    .break I >= 3
+.endloop
+    RET"""
+
+UNROLLED = """N .equ 2
+l.1: DEC R4 ; say
+    JNE l.1
+l.2: DEC R4 ; say
+    JNE l.2
+l.3: DEC R5 ; say
+    JNE l.3
+l.4: DEC R5 ; say
+    JNE l.4
+    .word 0x11
+    .word 0x11
+    .word 0x11
+I .set 0
+    ADD #2, R6
+I .set I + 1
+    ADD #2, R6
+I .set I + 1
+    ADD #2, R6
+I .set I + 1
+    RET"""
+
+def test_blocks_match_unrolled_source():
+    assert _result(REPEATED) == _result(UNROLLED)
+
+def test_macro_with_nested_rept_gets_labels_per_iteration():
+    source = ".macro SPIN r\n.rept 2\nl?: DEC r\n    JNE l?\n.endr\n.endm\n    SPIN R6\n    SPIN R7"
+    labels = [line.split(':')[0] for line in Assembler()._stream(source) if ':' in line]
+    assert len(set(labels)) == 4
+    _result(source)  # Yinelenen etiket hatası olmamalı
+
+def test_large_rept_is_streamed():
+    lines = Assembler()._stream(".rept 100000000\n    NOP\n.endr")
+    assert list(islice(lines, 3)) == ['NOP'] * 3
+
+@pytest.mark.parametrize('source, message', [
+    (".rept 2\n    NOP", "'.rept' için .endr bulunamadı"),
+    (".rept -1\n    NOP\n.endr", "negatif olamaz"),
+    (".rept X\n    NOP\n.endr", "'.rept' ifadesi çözülemedi"),
+    (".irp\n    NOP\n.endr", "'.irp' bir sembol adı bekliyor"),
+    ("    .break", "yalnızca .loop bloğu içinde"),
+])
+def test_invalid_blocks_are_reported(source, message):
+    with pytest.raises(ValueError, match=message):
+        list(Assembler()._stream(source))
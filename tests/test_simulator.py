@@ -0,0 +1,89 @@
+# test_simulator.py
+# Simülatör: paketteki bağlanmış program ve blok çevirisinin yorumlayıcıyla tutarlılığı
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+from loader import MSP430VirtualMemory
+from simulator import MSP430CPU
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def test_bundled_program_runs():
+    result = subprocess.run([sys.executable, 'simulator.py', 'linked_output.elf', '100000'],
+                            cwd=ROOT, capture_output=True, text=True)
+    assert result.returncode == 0, result.stdout + result.stderr
+    # main: R4 = 0x1234, &0x0200 ile eşit olduğundan EQUAL'daki sonsuz döngüde kalır
+    assert 'R0=0012' in result.stdout and 'R4=1234' in result.stdout
+
+# GUI şablonundaki gecikme döngüsü: mov #0xFFFF,r5 / dec r5 / tst r5 / jne / jmp $
+DELAY_LOOP = (0x4035, 0xFFFF, 0x8315, 0x9305, 0x23FD, 0x3FFF)
+# mov #0x0300,r6 / mov #40,r7 / l: mov r7,0(r6) / incd r6 / dec r7 / jne l / add r4,r5 / jmp $ (bellek yazan döngü)
+# mov #0x1234,r4 / br #$ (paketteki programın sonu gibi mutlak dallanmayla sonsuz döngü)
+BRANCH_SELF = (0x4034, 0x1234, 0x4030, 0x4404)
+STORE_LOOP = (0x4036, 0x0300, 0x4037, 0x0028, 0x4786, 0x0000, 0x5326, 0x8317, 0x23FB, 0x5405, 0x3FFF)
+
+def _load(program, translate, fast_forward=True):
+    cpu = MSP430CPU(MSP430VirtualMemory(), translate=translate, fast_forward=fast_forward)
+    for i, word in enumerate(program):
+        cpu.write_word(0x4400 + 2 * i, word)
+    cpu.reset(pc=0x4400)
+    return cpu
+
+def _state(cpu):
+    return list(cpu.regs), cpu.cycles, cpu.instructions, cpu.halted, bytes(cpu.memory.read_memory(0x0300, 0x60))
+
+# SR hedefli bayrak yazan komutlar: mov #0x0104,r2 / xor #3,r2 / add #8,r2 / and #0x010F,sr / jmp $
+SR_WRITES = (0x4032, 0x0104, 0xE032, 0x0003, 0x5232, 0xF032, 0x010F, 0x3FFF)
+
+@pytest.mark.parametrize('program', (DELAY_LOOP, BRANCH_SELF, STORE_LOOP, SR_WRITES))
+@pytest.mark.parametrize('fast_forward', (True, False))
+def test_blocks_match_interpreter(program, fast_forward):
+    for budget in (1, 2, 5, 7, 100, 1001, 65537, 300_001):
+        reference = _load(program, translate=False)
+        reference.run(budget)
+        translated = _load(program, translate=True, fast_forward=fast_forward)
+        translated.run(budget)
+        assert _state(translated) == _state(reference), budget
+
+def test_budget_is_not_overshot_across_runs():
+    reference = _load(STORE_LOOP, translate=False)
+    translated = _load(STORE_LOOP, translate=True)
+    for budget in (3, 4, 10, 17, 50, 400):
+        reference.run(budget)
+        translated.run(budget)
+        assert _state(translated) == _state(reference)
+
+def test_sr_destination_keeps_result():
+    cpu = _load(SR_WRITES, translate=True)
+    cpu.run(100)
+    # 0x0104 ^ 3 = 0x0107; + 8 = 0x010F; & 0x010F = 0x010F
+    assert cpu.regs[2] == 0x010F and cpu.halted
+
+def _countdown(count, step_word, *step_ext):
+    """mov #count,r5 / l: <adım> / jne l / jmp $"""
+    offset = -(2 + len(step_ext)) & 0x3FF
+    return (0x4035, count, step_word, *step_ext, 0x2000 | offset, 0x3FFF)
+
+# sub #3,r5 (her sayaç sıfıra ulaşır) / sub #2,r5 (tek sayaç hiç ulaşmaz) / sub.b #1,r5 / add #-5,r5
+COUNTDOWNS = [_countdown(count, *step)
+              for count in (1, 3, 0x1233, 0xFFFF)
+              for step in ((0x8035, 0x0003), (0x8325,), (0x8355,), (0x5035, 0xFFFB))]
+
+@pytest.mark.parametrize('program', COUNTDOWNS)
+def test_fast_forward_matches_full_iteration(program):
+    for budget in (4, 9, 1000, 300_001):
+        reference = _load(program, translate=True, fast_forward=False)
+        reference.run(budget)
+        fast = _load(program, translate=True)
+        fast.run(budget)
+        assert _state(fast) == _state(reference), budget
+
+def test_fast_forward_skips_delay_loop():
+    cpu = _load(DELAY_LOOP, translate=True)
+    stats = cpu.run(300_001)
+    assert cpu.regs[5] == 0 and stats['skipped_cycles'] > 200_000
+    assert _load(DELAY_LOOP, translate=True, fast_forward=False).run(300_001)['skipped_cycles'] == 0